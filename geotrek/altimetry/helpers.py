@@ -1,9 +1,11 @@
+import hashlib
 import logging
+from array import array
+from collections import defaultdict
 
 from django.contrib.gis.geos import GEOSGeometry
 from django.utils import translation
 from django.utils.translation import ugettext as _
-from django.contrib.gis.geos import LineString
 from django.conf import settings
 from django.db import connection
 
@@ -14,40 +16,106 @@ from pygal.style import LightSolarizedStyle
 logger = logging.getLogger(__name__)
 
 
+class ElevationProfileArrays(object):
+    """Elevation profile stored by columns: distance from start (meters),
+    x and y (in API_SRID) and elevation.
+
+    Iterating gives ``(distance, x, y, z)`` steps, as ``AltimetryHelper.elevation_profile()``.
+    """
+    __slots__ = ('distances', 'xs', 'ys', 'zs')
+
+    def __init__(self):
+        self.distances = array('d')
+        self.xs = array('d')
+        self.ys = array('d')
+        self.zs = array('d')
+
+    def append(self, distance, x, y, z):
+        self.distances.append(distance)
+        self.xs.append(x)
+        self.ys.append(y)
+        self.zs.append(z)
+
+    def __len__(self):
+        return len(self.distances)
+
+    def __iter__(self):
+        return zip(self.distances, self.xs, self.ys, self.zs)
+
+
 class AltimetryHelper(object):
+    PROFILES_SQL = """
+        WITH geoms AS ({source}),
+             parts AS (SELECT geoms.id, COALESCE(d.path[1], 1) AS part, d.geom,
+                              CASE WHEN ST_GeometryType(geoms.geom) = 'ST_MultiLineString'
+                                   THEN SUM(ST_Length(d.geom)) OVER (PARTITION BY geoms.id ORDER BY d.path[1])
+                                   ELSE 0 END AS start
+                       FROM geoms, ST_Dump(geoms.geom) AS d
+                       WHERE ST_GeometryType(d.geom) = 'ST_LineString'),
+             points2dm AS (SELECT parts.id, parts.part, p.path[1] AS n, parts.start + ST_M(p.geom) AS distance
+                           FROM parts, ST_DumpPoints(ST_AddMeasure(ST_Force2D(parts.geom), 0,
+                                                                   ST_Length(parts.geom))) AS p),
+             points3d AS (SELECT parts.id, parts.part, p.path[1] AS n, ST_Transform(p.geom, {srid}) AS geom
+                          FROM parts, ST_DumpPoints(parts.geom) AS p)
+        SELECT points2dm.id, points2dm.distance, ST_X(points3d.geom), ST_Y(points3d.geom), ST_Z(points3d.geom)
+        FROM points2dm JOIN points3d USING (id, part, n)
+        ORDER BY points2dm.id, points2dm.part, points2dm.n;
+    """
+
+    @classmethod
+    def _elevation_profiles(cls, source, params):
+        cursor = connection.cursor()
+        cursor.execute(cls.PROFILES_SQL.format(source=source, srid=settings.API_SRID), params)
+        profiles = defaultdict(ElevationProfileArrays)
+        for pk, distance, x, y, z in cursor.fetchall():
+            profiles[pk].append(distance, x, y, z)
+        return profiles
+
+    @classmethod
+    def elevation_profiles(cls, geometries):
+        """Extract elevation profiles of several 3D geometries in one query.
+
+        Returns a list of ``ElevationProfileArrays``, in the same order as ``geometries``.
+        """
+        ewkbs = [geometry.hexewkb.decode() if geometry else None for geometry in geometries]
+        source = "SELECT g.id, g.geom FROM unnest(%s::geometry[]) WITH ORDINALITY AS g(geom, id)"
+        profiles = cls._elevation_profiles(source, [ewkbs])
+        return [profiles[i + 1] for i in range(len(ewkbs))]
+
+    @classmethod
+    def elevation_profiles_of_queryset(cls, queryset):
+        """Extract elevation profiles of objects of the queryset in one query,
+        without loading their geometries.
+
+        Returns a dict of ``ElevationProfileArrays`` by primary key.
+        """
+        sql, params = queryset.values_list('pk', 'geom_3d').query.sql_with_params()
+        source = "SELECT DISTINCT ON (id) id, geom FROM ({}) AS source(id, geom)".format(sql)
+        return cls._elevation_profiles(source, params)
+
     @classmethod
     def elevation_profile(cls, geometry3d, precision=None, offset=0):
         """Extract elevation profile from a 3D geometry.
 
-        :precision:  geometry sampling in meters
+        :precision:  geometry sampling in meters (not used, geometry3d is already sampled)
         """
-        precision = precision or settings.ALTIMETRIC_PROFILE_PRECISION
-
-        if geometry3d.geom_type == 'MultiLineString':
-            profile = []
-            for subcoords in geometry3d.coords:
-                subline = LineString(subcoords, srid=geometry3d.srid)
-                offset += subline.length
-                subprofile = AltimetryHelper.elevation_profile(subline, precision, offset)
-                profile.extend(subprofile)
-            return profile
-
-        # Add measure to 2D version of geometry3d
-        # Get distance from origin for each vertex
-        sql = """
-        WITH line2d AS (SELECT ST_Force2D('%(ewkt)s'::geometry) AS geom),
-             line_measure AS (SELECT ST_Addmeasure(geom, 0, ST_length(geom)) AS geom FROM line2d),
-             points2dm AS (SELECT (ST_DumpPoints(geom)).geom AS point FROM line_measure)
-        SELECT (%(offset)s + ST_M(point)) FROM points2dm;
-        """ % {'offset': offset, 'ewkt': geometry3d.ewkt}
-        cursor = connection.cursor()
-        cursor.execute(sql)
-        pointsm = cursor.fetchall()
-        # Join (offset+distance, x, y, z) together
-        geom3dapi = geometry3d.transform(settings.API_SRID, clone=True)
-        assert len(pointsm) == len(geom3dapi.coords), 'Cannot map distance to xyz'
-        dxyz = [pointsm[i] + v for i, v in enumerate(geom3dapi.coords)]
-        return dxyz
+        profile = cls.elevation_profiles([geometry3d])[0]
+        return [(offset + d, x, y, z) for d, x, y, z in profile]
+
+    @classmethod
+    def chart_cache_key(cls, kind, geometry, *args):
+        """Cache key of a chart computed from ``geometry``.
+
+        It is built from the geometry content and the ``ALTIMETRIC_*``
+        settings, so that cached charts never need to be invalidated.
+        """
+        digest = hashlib.sha1(bytes(geometry.ewkb) if geometry else b'')
+        for name in sorted(dir(settings)):
+            if name.startswith('ALTIMETRIC_'):
+                digest.update(('%s=%r;' % (name, getattr(settings, name))).encode())
+        for arg in args:
+            digest.update(('%s;' % arg).encode())
+        return 'altimetry_%s_%s' % (kind, digest.hexdigest())
 
     @classmethod
     def altimetry_limits(cls, profile):
@@ -34,6 +34,8 @@ class Command(PrepareImageCommand):
     def handle_instance(self, instance):
         rooturl = self.options.get('url', self.DEFAULT_URL)
         for language, name in settings.MAPENTITY_CONFIG['TRANSLATED_LANGUAGES']:
+            # Fill SVG charts cache
+            instance.get_elevation_profile_svg(language)
             refreshed = instance.prepare_elevation_chart(language, rooturl)
             if not refreshed:
                 logger.info('%s profile up-to-date.' % instance.get_elevation_chart_path(language))
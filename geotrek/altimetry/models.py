@@ -2,6 +2,7 @@ import os
 
 from django.conf import settings
 from django.contrib.gis.db import models
+from django.core.cache import caches
 from django.utils.translation import get_language, ugettext_lazy as _
 from django.urls import reverse
 
@@ -48,16 +49,39 @@ class AltimetryMixin(models.Model):
         return self
 
     def get_elevation_profile(self):
+        profile = getattr(self, '_elevation_profile', None)
+        if profile is not None:
+            return list(profile)
         return AltimetryHelper.elevation_profile(self.geom_3d)
 
+    @classmethod
+    def prefetch_elevation_profiles(cls, objects):
+        """Compute elevation profiles of all objects in one query.
+        """
+        objects = list(objects)
+        profiles = AltimetryHelper.elevation_profiles([obj.geom_3d for obj in objects])
+        for obj, profile in zip(objects, profiles):
+            obj._elevation_profile = profile
+        return objects
+
     def get_elevation_area(self):
         return AltimetryHelper.elevation_area(self.geom)
 
-    def get_elevation_limits(self):
-        return AltimetryHelper.altimetry_limits(self.get_elevation_profile())
+    def get_elevation_limits(self, profile=None):
+        if profile is None:
+            profile = self.get_elevation_profile()
+        return AltimetryHelper.altimetry_limits(profile)
 
     def get_elevation_profile_svg(self, language=None):
-        return AltimetryHelper.profile_svg(self.get_elevation_profile(), language)
+        """SVG elevation chart, rendered only if geometry (or settings) changed.
+        """
+        cache = caches['fat']
+        key = AltimetryHelper.chart_cache_key('svg', self.geom_3d, language or get_language())
+        svg = cache.get(key)
+        if svg is None:
+            svg = AltimetryHelper.profile_svg(self.get_elevation_profile(), language)
+            cache.set(key, svg, None)
+        return svg
 
     def get_elevation_chart_url(self, language=None):
         """Generic url. Will fail if there is no such url defined
@@ -94,6 +118,14 @@ class AltimetryMixin(models.Model):
         # Do nothing if image is up-to-date
         if is_file_newer(path, self.date_update):
             return False
+        # Reuse chart converted for the same geometry if any
+        cache = caches['fat']
+        key = AltimetryHelper.chart_cache_key('png', self.geom_3d, language)
+        png = cache.get(key)
+        if png is not None:
+            with open(path, 'wb') as f:
+                f.write(png)
+            return True
         # Download converted chart as png using convertit
         source = smart_urljoin(rooturl, self.get_elevation_chart_url(language))
         convertit_download(source,
@@ -101,4 +133,6 @@ class AltimetryMixin(models.Model):
                            from_type=HttpSVGResponse.content_type,
                            to_type='image/png',
                            headers={'Accept-Language': language})
+        with open(path, 'rb') as f:
+            cache.set(key, f.read(), None)
         return True
@@ -57,6 +57,20 @@ class ElevationTest(TestCase):
         self.assertEqual(profile[5][3], 20.0)
         self.assertEqual(profile[6][3], 22.0)
 
+    @skipIf(not settings.TREKKING_TOPOLOGY_ENABLED, 'Test with dynamic segmentation only')
+    def test_elevation_profiles_of_queryset(self):
+        profiles = AltimetryHelper.elevation_profiles_of_queryset(Path.objects.filter(pk=self.path.pk))
+        self.assertEqual(list(profiles.keys()), [self.path.pk])
+        self.assertEqual(list(profiles[self.path.pk]), self.path.get_elevation_profile())
+
+    @skipIf(not settings.TREKKING_TOPOLOGY_ENABLED, 'Test with dynamic segmentation only')
+    def test_prefetch_elevation_profiles(self):
+        path = Path.prefetch_elevation_profiles([Path.objects.get(pk=self.path.pk)])[0]
+        with self.assertNumQueries(0):
+            profile = path.get_elevation_profile()
+        self.assertEqual(len(profile), 7)
+        self.assertEqual(profile[-1][3], 22.0)
+
     @skipIf(not settings.TREKKING_TOPOLOGY_ENABLED, 'Test with dynamic segmentation only')
     def test_elevation_limits(self):
         limits = self.path.get_elevation_limits()
@@ -132,6 +146,23 @@ class ElevationProfileTest(TestCase):
         profile = AltimetryHelper.elevation_profile(geom)
         self.assertEqual(len(profile), 4)
 
+    def test_elevation_profile_multilinestring_distances(self):
+        geom = MultiLineString(LineString((1.5, 2.5, 8), (2.5, 2.5, 10)),
+                               LineString((2.5, 2.5, 6), (2.5, 0, 7)),
+                               srid=settings.SRID)
+        profile = AltimetryHelper.elevation_profile(geom)
+        self.assertEqual([step[0] for step in profile], [1.0, 2.0, 3.5, 6.0])
+        self.assertEqual([step[3] for step in profile], [8, 10, 6, 7])
+
+    def test_elevation_profiles_keep_order(self):
+        geom1 = LineString((1.5, 2.5, 8), (2.5, 2.5, 10), srid=settings.SRID)
+        geom2 = LineString((2.5, 2.5, 6), (2.5, 0, 7), (0, 0, 9), srid=settings.SRID)
+        profiles = AltimetryHelper.elevation_profiles([geom2, geom1])
+        self.assertEqual(len(profiles), 2)
+        self.assertEqual(list(profiles[0]), AltimetryHelper.elevation_profile(geom2))
+        self.assertEqual(list(profiles[1]), AltimetryHelper.elevation_profile(geom1))
+        self.assertEqual(list(profiles[0].zs), [6, 7, 9])
+
     def test_elevation_svg_output(self):
         geom = LineString((1.5, 2.5, 8), (2.5, 2.5, 10),
                           srid=settings.SRID)
@@ -1,9 +1,12 @@
 import os
+from unittest import mock
 
 from django.test import TestCase
 from django.conf import settings
+from django.contrib.gis.geos import LineString
 from django.utils.translation import get_language
 
+from geotrek.altimetry.helpers import AltimetryHelper
 from geotrek.trekking.factories import TrekFactory
 from geotrek.trekking.models import Trek
 
@@ -19,3 +22,24 @@ class AltimetryMixinTest(TestCase):
         self.assertTrue(os.listdir(basefolder))
         directory = os.listdir(basefolder)
         self.assertIn('%s-%s-%s.png' % (Trek._meta.model_name, str(trek.pk), get_language()), directory)
+
+    def test_elevation_chart_svg_cached_by_geometry(self):
+        trek = TrekFactory.create(no_path=True)
+        trek.geom_3d = LineString((1.5, 2.5, 8), (2.5, 2.5, 10), srid=settings.SRID)
+        other = TrekFactory.create(no_path=True)
+        other.geom_3d = trek.geom_3d.clone()
+        svg = trek.get_elevation_profile_svg('en')
+        with mock.patch.object(AltimetryHelper, 'profile_svg') as profile_svg:
+            self.assertEqual(other.get_elevation_profile_svg('en'), svg)
+            self.assertFalse(profile_svg.called)
+            other.geom_3d = LineString((1.5, 2.5, 8), (2.5, 3.5, 12), srid=settings.SRID)
+            other.get_elevation_profile_svg('en')
+            self.assertTrue(profile_svg.called)
+
+    def test_chart_cache_key(self):
+        geom = LineString((1.5, 2.5, 8), (2.5, 2.5, 10), srid=settings.SRID)
+        key = AltimetryHelper.chart_cache_key('svg', geom, 'en')
+        self.assertEqual(key, AltimetryHelper.chart_cache_key('svg', geom.clone(), 'en'))
+        self.assertNotEqual(key, AltimetryHelper.chart_cache_key('svg', geom, 'fr'))
+        with self.settings(ALTIMETRIC_PROFILE_COLOR='#000000'):
+            self.assertNotEqual(key, AltimetryHelper.chart_cache_key('svg', geom, 'en'))
@@ -15,6 +15,7 @@ from mapentity.views import JSONResponseMixin, LastModifiedMixin
 
 from geotrek.common.views import PublicOrReadPermMixin
 
+from .helpers import AltimetryHelper
 from .models import AltimetryMixin
 
 
@@ -40,18 +41,23 @@ class ElevationChart(LastModifiedMixin, BaseDetailView):
 class ElevationProfile(LastModifiedMixin, JSONResponseMixin,
                        PublicOrReadPermMixin, BaseDetailView):
     """Extract elevation profile from a path and return it as JSON"""
+    # Precomputed profiles by primary key (see ``AltimetryHelper.elevation_profiles_of_queryset()``)
+    profiles = None
 
     def get_context_data(self, **kwargs):
         """
         Put elevation profile into response context.
         """
         data = {}
-        elevation_profile = self.object.get_elevation_profile()
+        if self.profiles is not None and self.object.pk in self.profiles:
+            elevation_profile = list(self.profiles[self.object.pk])
+        else:
+            elevation_profile = self.object.get_elevation_profile()
         # Formatted as distance, elevation, [lng, lat]
         for step in elevation_profile:
             formatted = step[0], step[3], step[1:3]
             data.setdefault('profile', []).append(formatted)
-        data['limits'] = dict(zip(['ceil', 'floor'], self.object.get_elevation_limits()))
+        data['limits'] = dict(zip(['ceil', 'floor'], self.object.get_elevation_limits(elevation_profile)))
         return data
 
 
@@ -63,7 +69,7 @@ class ElevationArea(LastModifiedMixin, JSONResponseMixin, PublicOrReadPermMixin,
         """Used by the ``view_cache_response_content`` decorator.
         """
         obj = self.get_object()
-        return 'altimetry_dem_area_%s' % obj.pk
+        return AltimetryHelper.chart_cache_key('dem_area', obj.geom)
 
     @view_cache_response_content()
     def dispatch(self, *args, **kwargs):
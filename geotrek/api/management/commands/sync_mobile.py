@@ -18,6 +18,7 @@ from django.utils import translation
 from django.utils.translation import ugettext as _
 from geotrek.common.models import FileType  # NOQA
 from geotrek.common import models as common_models
+from geotrek.common.utils import intersecting_map
 from geotrek.flatpages.models import FlatPage
 from geotrek.tourism import models as tourism_models
 from geotrek.trekking import models as trekking_models
@@ -274,7 +275,7 @@ class Command(BaseCommand):
         self.sync_global_media()
         self.sync_treks_media()
 
-    def sync_trek_by_pk_media(self, trek):
+    def sync_trek_by_pk_media(self, trek, touristic_contents=None, touristic_events=None):
         url_trek = os.path.join('nolang')
         zipname_trekid = os.path.join(url_trek, "{}.zip".format(trek.pk))
         zipfullname_trekid = os.path.join(self.tmp_root, zipname_trekid)
@@ -288,11 +289,15 @@ class Command(BaseCommand):
             if poi.resized_pictures:
                 self.sync_media_file(poi.resized_pictures[0][1], prefix=trek.pk, directory=url_trek,
                                      zipfile=trekid_zipfile)
-        for touristic_content in trek.published_touristic_contents:
+        if touristic_contents is None:
+            touristic_contents = trek.published_touristic_contents
+        if touristic_events is None:
+            touristic_events = trek.published_touristic_events
+        for touristic_content in touristic_contents:
             if touristic_content.resized_pictures:
                 self.sync_media_file(touristic_content.resized_pictures[0][1], prefix=trek.pk, directory=url_trek,
                                      zipfile=trekid_zipfile)
-        for touristic_event in trek.published_touristic_events:
+        for touristic_event in touristic_events:
             if touristic_event.resized_pictures:
                 self.sync_media_file(touristic_event.resized_pictures[0][1], prefix=trek.pk, directory=url_trek,
                                      zipfile=trekid_zipfile)
@@ -326,9 +331,17 @@ class Command(BaseCommand):
         treks = trekking_models.Trek.objects.existing().filter(published=True).order_by('pk')
         if self.portal:
             treks = treks.filter(Q(portal__name__in=self.portal) | Q(portal=None))
-
+        treks = list(treks.select_related('practice'))
+
+        # Nearby contents and events of all treks are loaded at once
+        touristic_contents = intersecting_map(
+            treks, tourism_models.TouristicContent,
+            queryset=tourism_models.TouristicContent.objects.existing().filter(published=True))
+        touristic_events = intersecting_map(
+            treks, tourism_models.TouristicEvent,
+            queryset=tourism_models.TouristicEvent.objects.existing().filter(published=True))
         for trek in treks:
-            self.sync_trek_by_pk_media(trek)
+            self.sync_trek_by_pk_media(trek, touristic_contents[trek.pk], touristic_events[trek.pk])
 
     def sync_global_media(self):
         url_media_nolang = os.path.join('nolang')
@@ -362,27 +375,16 @@ class Command(BaseCommand):
     def sync_trek_tiles(self, trek, zipfile):
         """ Add tiles to zipfile for the specified Trek object.
         """
-
-        if self.verbosity == 2:
-            self.stdout.write("\x1b[36m**\x1b[0m \x1b[1mnolang/{}/tiles/\x1b[0m ...".format(trek.pk), ending="")
-            self.stdout.flush()
-
-        def _radius2bbox(lng, lat, radius):
-            return (lng - radius, lat - radius,
-                    lng + radius, lat + radius)
-
         tiles = ZipTilesBuilder(zipfile, prefix='/{}/tiles/'.format(trek.pk), **self.builder_args)
 
-        geom = trek.geom
-        if geom.geom_type == 'MultiLineString':
-            geom = geom[0]  # FIXME
-        geom.transform(4326)
+        geom = trek.geom.transform(4326, clone=True)
+        tiles.add_geom_coverage(geom, settings.MOBILE_TILES_RADIUS_LARGE, settings.MOBILE_TILES_LOW_ZOOMS)
+        tiles.add_geom_coverage(geom, settings.MOBILE_TILES_RADIUS_SMALL, settings.MOBILE_TILES_HIGH_ZOOMS)
 
-        for (lng, lat) in geom.coords:
-            large = _radius2bbox(lng, lat, settings.MOBILE_TILES_RADIUS_LARGE)
-            small = _radius2bbox(lng, lat, settings.MOBILE_TILES_RADIUS_SMALL)
-            tiles.add_coverage(bbox=large, zoomlevels=settings.MOBILE_TILES_LOW_ZOOMS)
-            tiles.add_coverage(bbox=small, zoomlevels=settings.MOBILE_TILES_HIGH_ZOOMS)
+        if self.verbosity == 2:
+            self.stdout.write("\x1b[36m**\x1b[0m \x1b[1mnolang/{}/tiles/\x1b[0m ({} tiles) ...".format(
+                trek.pk, len(tiles.tiles)), ending="")
+            self.stdout.flush()
 
         tiles.run()
 
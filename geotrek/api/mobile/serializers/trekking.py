@@ -1,11 +1,12 @@
 import os
 from django.conf import settings
+from django.db.models import Manager
 from rest_framework import serializers
 from rest_framework_gis import serializers as geo_serializers
 
 from geotrek.api.mobile.serializers.tourism import InformationDeskSerializer
 from geotrek.api.v2.functions import Transform, Length, StartPoint, EndPoint
-from geotrek.zoning.models import City, District
+from geotrek.zoning.helpers import linear_zoning
 
 if 'geotrek.trekking' in settings.INSTALLED_APPS:
     from geotrek.trekking import models as trekking_models
@@ -35,37 +36,43 @@ if 'geotrek.trekking' in settings.INSTALLED_APPS:
                 'id', 'pk', 'pictures', 'name', 'description', 'type', 'geometry',
             )
 
+    class TrekBaseListSerializer(geo_serializers.GeoFeatureModelListSerializer):
+        def to_representation(self, data):
+            # Cities and districts of all treks are resolved at once, and
+            # passed to treks serializers through context
+            treks = list(data.all() if isinstance(data, Manager) else data)
+            self.context['treks_zoning'] = linear_zoning(treks)
+            return super(TrekBaseListSerializer, self).to_representation(treks)
+
     class TrekBaseSerializer(geo_serializers.GeoFeatureModelSerializer):
         cities = serializers.SerializerMethodField(read_only=True)
         districts = serializers.SerializerMethodField(read_only=True)
         length = serializers.SerializerMethodField(read_only=True)
         departure_city = serializers.SerializerMethodField(read_only=True)
 
+        def get_zoning(self, obj):
+            treks_zoning = self.context.setdefault('treks_zoning', {})
+            if obj.pk not in treks_zoning:
+                treks_zoning.update(linear_zoning([obj]))
+            return treks_zoning[obj.pk]
+
         def get_cities(self, obj):
-            qs = City.objects.all()
-            cities = qs.filter(geom__intersects=(obj.geom, 0))
-            return cities.values_list('code', flat=True)
+            return self.get_zoning(obj)['cities']
 
         def get_departure_city(self, obj):
-            qs = City.objects.all()
-            if obj.start_point:
-                city = qs.filter(geom__covers=(obj.start_point, 0)).first()
-                if city:
-                    return city.code
-            return None
+            return self.get_zoning(obj)['departure_city']
 
         def get_length(self, obj):
             return round(obj.length_2d_m, 1)
 
         def get_districts(self, obj):
-            qs = District.objects.all()
-            districts = qs.filter(geom__intersects=(obj.geom, 0))
-            return [district.pk for district in districts]
+            return self.get_zoning(obj)['districts']
 
         class Meta:
             model = trekking_models.Trek
             id_field = 'pk'
             geo_field = 'geometry'
+            list_serializer_class = TrekBaseListSerializer
 
     class TrekListSerializer(TrekBaseSerializer):
         first_picture = serializers.SerializerMethodField(read_only=True)
@@ -114,12 +121,7 @@ if 'geotrek.trekking' in settings.INSTALLED_APPS:
             return obj.parking_location.transform(settings.API_SRID, clone=True).coords
 
         def get_arrival_city(self, obj):
-            qs = City.objects.all()
-            if obj.end_point:
-                city = qs.filter(geom__covers=(obj.end_point, 0)).first()
-                if city:
-                    return city.code
-            return None
+            return self.get_zoning(obj)['arrival_city']
 
         def get_information_desks(self, obj):
             return [
@@ -7,6 +7,7 @@ from geotrek.api.mobile.serializers import trekking as api_serializers_trekking
 from geotrek.api.mobile.serializers import tourism as api_serializers_tourism
 
 from geotrek.api.v2.functions import Transform, Length, StartPoint, EndPoint
+from geotrek.tourism import models as tourism_models
 from geotrek.trekking import models as trekking_models
 
 from rest_framework_extensions.mixins import DetailSerializerMixin
@@ -27,7 +28,7 @@ class TrekViewSet(DetailSerializerMixin, viewsets.ReadOnlyModelViewSet):
         lang = self.request.LANGUAGE_CODE
         queryset = trekking_models.Trek.objects.existing()\
             .select_related('topo_object') \
-            .prefetch_related('topo_object__aggregations', 'attachments') \
+            .prefetch_related('topo_object__aggregations', trekking_models.Trek.pictures_prefetch()) \
             .order_by('pk').annotate(length_2d_m=Length('geom'))
         if not self.action == 'list':
             queryset = queryset.annotate(geom2d_transformed=Transform(F('geom'), settings.API_SRID))
@@ -50,7 +51,7 @@ class TrekViewSet(DetailSerializerMixin, viewsets.ReadOnlyModelViewSet):
         trek = self.get_object()
         root_pk = self.request.GET.get('root_pk') or trek.pk
         qs = trek.pois.filter(published=True).select_related('topo_object', 'type', )\
-            .prefetch_related('topo_object__aggregations', 'attachments') \
+            .prefetch_related('topo_object__aggregations', trekking_models.POI.pictures_prefetch()) \
             .annotate(geom2d_transformed=Transform(F('geom'), settings.API_SRID)) \
             .order_by('pk')
         data = api_serializers_trekking.POIListSerializer(qs, many=True, context={'root_pk': root_pk}).data
@@ -60,7 +61,8 @@ class TrekViewSet(DetailSerializerMixin, viewsets.ReadOnlyModelViewSet):
     def touristic_contents(self, request, *args, **kwargs):
         trek = self.get_object()
         root_pk = self.request.GET.get('root_pk') or trek.pk
-        qs = trek.touristic_contents.filter(published=True).prefetch_related('attachments') \
+        qs = trek.touristic_contents.filter(published=True) \
+            .prefetch_related(tourism_models.TouristicContent.pictures_prefetch()) \
             .annotate(geom2d_transformed=Transform(F('geom'), settings.API_SRID)) \
             .order_by('pk')
         data = api_serializers_tourism.TouristicContentListSerializer(qs, many=True, context={'root_pk': root_pk}).data
@@ -70,7 +72,8 @@ class TrekViewSet(DetailSerializerMixin, viewsets.ReadOnlyModelViewSet):
     def touristic_events(self, request, *args, **kwargs):
         trek = self.get_object()
         root_pk = self.request.GET.get('root_pk') or trek.pk
-        qs = trek.trek.touristic_events.filter(published=True).prefetch_related('attachments') \
+        qs = trek.trek.touristic_events.filter(published=True) \
+            .prefetch_related(tourism_models.TouristicEvent.pictures_prefetch()) \
             .annotate(geom2d_transformed=Transform(F('geom'), settings.API_SRID)) \
             .order_by('pk')
         data = api_serializers_tourism.TouristicEventListSerializer(qs, many=True, context={'root_pk': root_pk}).data
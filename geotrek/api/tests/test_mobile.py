@@ -264,6 +264,15 @@ class APIAccessTestCase(BaseApiTest):
         self.assertIsNone(json_response.get('features')[0].get('properties').get('description'))
         self.assertIsNone(json_response.get('features')[0].get('properties').get('description_teaser'))
 
+    def test_trek_list_zoning(self):
+        response = self.get_treks_list('fr')
+        self.assertEqual(response.status_code, 200)
+        properties = next(feature['properties'] for feature in response.json()['features']
+                          if feature['properties']['id'] == self.trek.pk)
+        self.assertEqual(properties['cities'], [self.city.code])
+        self.assertEqual(properties['districts'], [self.district.pk])
+        self.assertEqual(properties['departure_city'], self.city.code)
+
     def test_poi_list(self):
         response = self.get_poi_list(self.trek.pk, 'fr')
         #  test response code
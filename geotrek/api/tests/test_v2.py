@@ -1,3 +1,5 @@
+import json
+
 from django.contrib.auth.models import User
 from django.core.urlresolvers import reverse
 from django.db.models import Count
@@ -167,6 +169,23 @@ class APIAnonymousTestCase(BaseApiTest):
         response = self.get_trek_list()
         self.assertEqual(response.status_code, 401)
 
+    def test_trek_list_stream(self):
+        for params in ({}, {'format': 'geojson', 'dim': '3'}, {'page_size': 5, 'page': 2}):
+            response = self.get_trek_list(params)
+            params['stream'] = 'true'
+            stream_response = self.get_trek_list(params)
+            self.assertEqual(stream_response.status_code, 200)
+            self.assertTrue(stream_response.streaming)
+            stream_json = json.loads(b''.join(stream_response.streaming_content).decode())
+            for link in ('next', 'previous'):
+                if stream_json[link]:
+                    stream_json[link] = stream_json[link].replace('&stream=true', '')
+            self.assertEqual(stream_json, response.json())
+
+    def test_trek_list_stream_invalid_page(self):
+        response = self.get_trek_list({'stream': 'true', 'page': 100})
+        self.assertEqual(response.status_code, 404)
+
     def test_trek_detail(self):
         self.client.logout()
         id_trek = trek_models.Trek.objects.annotate(
@@ -1,6 +1,8 @@
 from django.db.models import Func
 from django.db.models.fields import FloatField, CharField
-from django.contrib.gis.db.models import GeometryField, PointField
+from django.contrib.gis.db.models import GeometryField
+
+from geotrek.common.functions import StartPoint, EndPoint  # noqa
 
 
 def Transform(geom, srid):
@@ -53,19 +55,3 @@ class Area(Func):
     """
     function = 'ST_Area'
     output_field = FloatField()
-
-
-class StartPoint(Func):
-    """
-    ST_StartPoint postgis function
-    """
-    function = 'ST_StartPoint'
-    output_field = PointField()
-
-
-class EndPoint(Func):
-    """
-    ST_EndPoint postgis function
-    """
-    function = 'ST_EndPoint'
-    output_field = PointField()
@@ -1,7 +1,13 @@
+import json
 from collections import OrderedDict
 
+from django.core.paginator import InvalidPage
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
 
 
 class StandardResultsSetPagination(PageNumberPagination):
@@ -20,3 +26,47 @@ class StandardResultsSetPagination(PageNumberPagination):
             ]))
         else:
             return super(StandardResultsSetPagination, self).get_paginated_response(data)
+
+    def paginate_queryset_lazy(self, queryset, request, view=None):
+        """
+        Same as ``paginate_queryset()``, but return the page queryset
+        instead of the list of its objects.
+        """
+        self.request = request
+        page_size = self.get_page_size(request)
+        paginator = self.django_paginator_class(queryset, page_size)
+        page_number = request.query_params.get(self.page_query_param, 1)
+        if page_number in self.last_page_strings:
+            page_number = paginator.num_pages
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+        return self.page.object_list
+
+    def dumps(self, data):
+        return json.dumps(data, cls=JSONEncoder, ensure_ascii=not api_settings.UNICODE_JSON,
+                          separators=(',', ':') if api_settings.COMPACT_JSON else (', ', ': '))
+
+    def get_streaming_response(self, items):
+        """
+        Same as ``get_paginated_response()``, but items (serialized objects,
+        as JSON strings) are written one by one.
+        """
+        if self.request.query_params.get('format', 'json') == 'geojson':
+            header = OrderedDict([('type', 'FeatureCollection')])
+            key = 'features'
+        else:
+            header = OrderedDict()
+            key = 'results'
+        header['count'] = self.page.paginator.count
+        header['next'] = self.get_next_link()
+        header['previous'] = self.get_previous_link()
+
+        def content():
+            yield self.dumps(header)[:-1] + ',"%s":[' % key
+            for i, item in enumerate(items):
+                yield item if i == 0 else ',' + item
+            yield ']}'
+
+        return StreamingHttpResponse(content(), content_type='application/json')
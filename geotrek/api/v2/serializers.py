@@ -271,7 +271,8 @@ if 'geotrek.trekking' in settings.INSTALLED_APPS:
         def get_steps(self, obj):
             qs = obj.children \
                 .select_related('topo_object', 'difficulty') \
-                .prefetch_related('topo_object__aggregations', 'themes', 'networks', 'attachments') \
+                .prefetch_related('topo_object__aggregations', 'themes', 'networks',
+                                  trekking_models.Trek.pictures_prefetch()) \
                 .annotate(geom2d_transformed=Transform(F('geom'), settings.API_SRID),
                           geom3d_transformed=Transform(F('geom_3d'), settings.API_SRID),
                           length_2d_m=Length('geom'),
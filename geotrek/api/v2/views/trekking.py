@@ -14,7 +14,8 @@ class TrekViewSet(api_viewsets.GeotrekViewset):
     serializer_detail_class = api_serializers.TrekDetailSerializer
     queryset = trekking_models.Trek.objects.existing() \
         .select_related('topo_object', 'difficulty', 'practice') \
-        .prefetch_related('topo_object__aggregations', 'themes', 'networks', 'attachments') \
+        .prefetch_related('topo_object__aggregations', 'themes', 'networks',
+                          trekking_models.Trek.pictures_prefetch()) \
         .annotate(geom2d_transformed=Transform(F('geom'), settings.API_SRID),
                   geom3d_transformed=Transform(F('geom_3d'), settings.API_SRID),
                   length_2d_m=Length('geom'),
@@ -118,7 +119,7 @@ class POIViewSet(api_viewsets.GeotrekViewset):
     serializer_detail_class = api_serializers.POIDetailSerializer
     queryset = trekking_models.POI.objects.existing() \
         .select_related('topo_object', 'type', ) \
-        .prefetch_related('topo_object__aggregations', 'attachments') \
+        .prefetch_related('topo_object__aggregations', trekking_models.POI.pictures_prefetch()) \
         .annotate(geom2d_transformed=Transform(F('geom'), settings.API_SRID),
                   geom3d_transformed=Transform(F('geom_3d'), settings.API_SRID)) \
         .order_by('pk')  # Required for reliable pagination
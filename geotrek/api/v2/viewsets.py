@@ -6,6 +6,7 @@ from rest_framework_extensions.mixins import DetailSerializerMixin
 
 from geotrek.api.v2 import pagination as api_pagination, filters as api_filters
 from geotrek.api.v2.serializers import override_serializer
+from geotrek.common.utils import iterate_in_chunks
 
 
 class GeotrekViewset(DetailSerializerMixin, viewsets.ReadOnlyModelViewSet):
@@ -26,6 +27,24 @@ class GeotrekViewset(DetailSerializerMixin, viewsets.ReadOnlyModelViewSet):
         dimension = self.request.query_params.get('dim', '2')
         return override_serializer(format_output, dimension, base_serializer_class)
 
+    def list(self, request, *args, **kwargs):
+        if request.query_params.get('stream', 'false').lower() in ('true', '1'):
+            return self.stream_list(request)
+        return super(GeotrekViewset, self).list(request, *args, **kwargs)
+
+    def stream_list(self, request):
+        """
+        Same output as ``list()``, but objects are fetched and serialized one
+        by one while the response is sent, to keep memory usage low.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginator.paginate_queryset_lazy(queryset, request, view=self)
+        serializer_class = self.get_serializer_class()
+        context = self.get_serializer_context()
+        items = (self.paginator.dumps(serializer_class(obj, context=context).data)
+                 for obj in iterate_in_chunks(page))
+        return self.paginator.get_streaming_response(items)
+
     def get_serializer_context(self):
         return {
             'request': self.request,
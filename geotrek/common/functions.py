@@ -0,0 +1,35 @@
+from django.db.models import Func
+from django.db.models.fields import FloatField
+from django.contrib.gis.db.models import PointField
+
+
+class StartPoint(Func):
+    """
+    ST_StartPoint postgis function
+    """
+    function = 'ST_StartPoint'
+    output_field = PointField()
+
+
+class EndPoint(Func):
+    """
+    ST_EndPoint postgis function
+    """
+    function = 'ST_EndPoint'
+    output_field = PointField()
+
+
+class X(Func):
+    """
+    ST_X postgis function
+    """
+    function = 'ST_X'
+    output_field = FloatField()
+
+
+class Y(Func):
+    """
+    ST_Y postgis function
+    """
+    function = 'ST_Y'
+    output_field = FloatField()
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from geotrek.common.models import Attachment
+from geotrek.common.thumbnails import prepare_resized_pictures
+
+
+class Command(BaseCommand):
+    help = "Generate resized (watermarked) pictures of all attachments"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', '-p', action='store', dest='processes', type=int, default=None,
+                            help="Number of processes (default: number of CPUs)")
+
+    def handle(self, *args, **options):
+        attachments = Attachment.objects.exclude(attachment_file='')
+        count = prepare_resized_pictures(attachments.iterator(), processes=options['processes'])
+        if options['verbosity'] > 0:
+            self.stdout.write("{count} pictures prepared".format(count=count))
@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0005_auto_20191029_1110'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attachment',
+            name='source_etag',
+            field=models.CharField(blank=True, db_column='etag_source', default='', editable=False, max_length=256, verbose_name='Source ETag'),
+        ),
+        migrations.AddField(
+            model_name='attachment',
+            name='source_last_modified',
+            field=models.CharField(blank=True, db_column='date_modification_source', default='', editable=False, max_length=64, verbose_name='Source last modification'),
+        ),
+    ]
@@ -2,10 +2,9 @@ import os
 import logging
 import shutil
 import datetime
-import hashlib
 
 from django.conf import settings
-from django.db.models import Manager as DefaultManager
+from django.db.models import Manager as DefaultManager, Prefetch
 from django.db import models
 from django.utils.translation import ugettext_lazy as _
 from django.template.defaultfilters import slugify
@@ -16,6 +15,7 @@ from easy_thumbnails.alias import aliases
 from embed_video.backends import detect_backend, VideoDoesntExistException
 from PIL.Image import DecompressionBombError
 
+from geotrek.common.thumbnails import is_picture, resize_picture
 from geotrek.common.utils import classproperty
 
 logger = logging.getLogger(__name__)
@@ -83,12 +83,27 @@ class PicturesMixin(object):
         """
         if hasattr(self, '_pictures'):
             return self._pictures
-        all_attachments = self.attachments.all().order_by('-starred', 'attachment_file')
-        return [a for a in all_attachments if a.is_image and a.title != 'mapimage']
+        if hasattr(self, 'prefetched_attachments'):
+            # Sorted by the query (see pictures_prefetch())
+            all_attachments = self.prefetched_attachments
+        else:
+            all_attachments = self.attachments.all().order_by('-starred', 'attachment_file')
+        return [a for a in all_attachments if is_picture(a)]
 
     @pictures.setter
     def pictures(self, values):
         self._pictures = values
+        self.__dict__.pop('_resized_pictures', None)
+
+    @classmethod
+    def pictures_prefetch(cls):
+        """
+        Prefetch of attachments sorted as pictures, to be used in querysets
+        ``prefetch_related()`` (one query for all objects).
+        """
+        from geotrek.common.models import Attachment
+        attachments = Attachment.objects.order_by('-starred', 'attachment_file')
+        return Prefetch('attachments', queryset=attachments, to_attr='prefetched_attachments')
 
     @property
     def serializable_pictures(self):
@@ -117,27 +132,16 @@ class PicturesMixin(object):
 
     @property
     def resized_pictures(self):
-        resized = []
-        for picture in self.pictures:
-            thumbnailer = get_thumbnailer(picture.attachment_file)
-            try:
-                # Uppercase options aren't used by prepared options (a primary
-                # use of prepared options is to generate the filename -- these
-                # options don't alter the filename).
-                text = settings.THUMBNAIL_COPYRIGHT_FORMAT.format(author=picture.author, title=picture.title,
-                                                                  legend=picture.legend)
-                ali = thumbnailer.get_options({'size': (800, 800),
-                                               'TEXT': text,
-                                               'SIZE_WATERMARK': settings.THUMBNAIL_COPYRIGHT_SIZE,
-                                               'watermark': hashlib.md5(text.encode('utf-8')).hexdigest()
-                                               })
-
-                thdetail = thumbnailer.get_thumbnail(ali)
-            except (IOError, InvalidImageFormatError, DecompressionBombError) as e:
-                logger.info(_("Image {} invalid or missing from disk: {}.").format(picture.attachment_file, e))
-            else:
-                resized.append((picture, thdetail))
-        return resized
+        # Memoized, since it is read several times per object (thumbnails
+        # are looked up on disk and in database)
+        if not hasattr(self, '_resized_pictures'):
+            resized = []
+            for picture in self.pictures:
+                thdetail = resize_picture(picture)
+                if thdetail is not None:
+                    resized.append((picture, thdetail))
+            self._resized_pictures = resized
+        return self._resized_pictures
 
     @property
     def picture_print(self):
@@ -252,11 +256,14 @@ class BasePublishableMixin(models.Model):
         abstract = True
 
     def save(self, *args, **kwargs):
+        self.update_publication_date()
+        super(BasePublishableMixin, self).save(*args, **kwargs)
+
+    def update_publication_date(self):
         if self.publication_date is None and self.any_published:
             self.publication_date = datetime.date.today()
         if self.publication_date is not None and not self.any_published:
             self.publication_date = None
-        super(BasePublishableMixin, self).save(*args, **kwargs)
 
     @property
     def any_published(self):
@@ -2,14 +2,17 @@ import os
 from PIL import Image
 
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
 from django.db.models import Q
+from django.db.models.signals import post_save
+from django.dispatch import receiver
 from django.utils.translation import ugettext_lazy as _
 
 from paperclip.models import FileType as BaseFileType, Attachment as BaseAttachment
 
 from geotrek.authent.models import StructureOrNoneRelated
 from geotrek.common.mixins import PictogramMixin, OptionalPictogramMixin
+from geotrek.common.thumbnails import is_picture, resize_picture
 
 
 class Organism(StructureOrNoneRelated):
@@ -50,11 +53,24 @@ class FileType(StructureOrNoneRelated, BaseFileType):
 class Attachment(BaseAttachment):
 
     creation_date = models.DateField(verbose_name=_("Creation Date"), db_column="date_creation", null=True, blank=True)
+    # Validators of the imported file, to download it again only if modified
+    source_etag = models.CharField(verbose_name=_("Source ETag"), db_column="etag_source", max_length=256,
+                                   blank=True, default='', editable=False)
+    source_last_modified = models.CharField(verbose_name=_("Source last modification"), db_column="date_modification_source",
+                                            max_length=64, blank=True, default='', editable=False)
 
     class Meta(BaseAttachment.Meta):
         db_table = 'fl_t_fichier'
 
 
+@receiver(post_save, sender=Attachment, dispatch_uid="on_attachment_saved")
+def on_attachment_saved(sender, instance, **kwargs):
+    """ Prepare the resized picture once saved, instead of at first display.
+    """
+    if instance.attachment_file and is_picture(instance):
+        transaction.on_commit(lambda: resize_picture(instance))
+
+
 class Theme(PictogramMixin):
 
     label = models.CharField(verbose_name=_("Label"), max_length=128, db_column='theme')
@@ -1,22 +1,27 @@
 import os
+import queue
 import re
+import threading
 import requests
 from requests.auth import HTTPBasicAuth
 import xlrd
 import xml.etree.ElementTree as ET
 from functools import reduce
-from urllib.request import urlopen
-from collections import Iterable
+from collections import Hashable, Iterable, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
 
-from ftplib import FTP
+from ftplib import FTP, all_errors as ftplib_errors
 from os.path import dirname
 from urllib.parse import urlparse
 
-from django.db import models, connection
+from django.db import models, connection, transaction
 from django.db.utils import DatabaseError
 from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
 from django.contrib.gis.gdal import DataSource, GDALException, CoordTransform
 from django.contrib.gis.geos import Point
+from django.core.exceptions import FieldDoesNotExist
 from django.core.files.base import ContentFile
 from django.template.loader import render_to_string
 from django.utils import translation
@@ -26,6 +31,7 @@ from django.conf import settings
 from paperclip.models import attachment_upload
 
 from geotrek.authent.models import default_structure
+from geotrek.common.mixins import BasePublishableMixin
 from geotrek.common.models import FileType, Attachment
 
 if 'modeltranslation' in settings.INSTALLED_APPS:
@@ -49,6 +55,65 @@ class ValueImportError(ImportError):
     pass
 
 
+class ReadAheadPager(object):
+    """
+    Iterate on pages of a paginated web service, downloading next pages in a
+    background thread while rows of the current page are imported.
+
+    ``fetch(skip)`` returns the decoded page starting at ``skip`` and the
+    total number of rows. At most ``ahead`` pages are waiting to be read.
+    """
+    end = object()
+
+    def __init__(self, fetch, size, skip=0, ahead=2):
+        self.fetch = fetch
+        self.size = size
+        self.skip = skip
+        self.total = None
+        self.pages = queue.Queue(maxsize=ahead)
+        self.stopped = threading.Event()
+
+    def put(self, item):
+        # Give up if pages are not read anymore
+        while not self.stopped.is_set():
+            try:
+                self.pages.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def run(self):
+        skip = self.skip
+        try:
+            while True:
+                page, total = self.fetch(skip)
+                if not self.put((page, total)):
+                    return
+                skip += self.size
+                if skip >= total:
+                    break
+        except Exception as e:
+            self.put(e)
+            return
+        self.put(self.end)
+
+    def __iter__(self):
+        thread = threading.Thread(target=self.run, daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = self.pages.get()
+                if item is self.end:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                page, self.total = item
+                yield page
+        finally:
+            self.stopped.set()
+
+
 class Parser(object):
     label = None
     model = None
@@ -69,9 +134,15 @@ class Parser(object):
     non_fields = {}
     natural_keys = {}
     field_options = {}
+    # Number of rows read ahead in batch mode (None to save row by row)
+    batch_size = None
 
     def __init__(self, progress_cb=None, user=None, encoding='utf8'):
         self.warnings = {}
+        self.pending = []
+        self.pending_eids = set()
+        self.prefetched_objects = None
+        self.prefetched_natural_keys = {}
         self.line = 0
         self.nb_success = 0
         self.nb_created = 0
@@ -246,10 +317,17 @@ class Parser(object):
         except RowImportError as warnings:
             self.add_warning(str(warnings))
             return
+        if self.batch_size:
+            # Written and completed by flush()
+            self.pending.append((self.line, row, self.obj, operation, update_fields))
+            return
         if operation == "created":
             self.obj.save()
         else:
             self.obj.save(update_fields=update_fields)
+        self.parse_obj_relations(row, operation, update_fields)
+
+    def parse_obj_relations(self, row, operation, update_fields):
         update_fields += self.parse_fields(row, self.m2m_fields)
         update_fields += self.parse_fields(row, self.m2m_constant_fields)
         update_fields += self.parse_fields(row, self.non_fields, non_field=True)
@@ -288,7 +366,11 @@ class Parser(object):
             except RowImportError as warnings:
                 self.add_warning(str(warnings))
                 return
-            objects = self.model.objects.filter(**eid_kwargs)
+            batched = self.batch_size and isinstance(self.eid_val, Hashable)
+            if batched and self.eid_val in self.pending_eids:
+                # Same identifier twice in a batch: write the first one before
+                self.flush()
+            objects = self.get_objects(eid_kwargs)
         if len(objects) == 0 and self.update_only:
             if self.warn_on_missing_objects:
                 self.add_warning(_("Bad value '{eid_val}' for field '{eid_src}'. No object with this identifier").format(eid_val=self.eid_val, eid_src=self.eid_src))
@@ -315,10 +397,202 @@ class Parser(object):
         for self.obj in objects:
             self.parse_obj(row, operation)
             self.to_delete.discard(self.obj.pk)
+        if self.eid is not None and batched:
+            self.pending_eids.add(self.eid_val)
         self.nb_success += 1  # FIXME
         if self.progress_cb:
             self.progress_cb(float(self.line) / self.nb, self.line, self.eid_val)
 
+    def get_objects(self, eid_kwargs):
+        eid_val = self.eid_val
+        if self.prefetched_objects is not None and isinstance(eid_val, str) and eid_val in self.prefetched_objects:
+            return self.prefetched_objects[eid_val]
+        return self.model.objects.filter(**eid_kwargs)
+
+    def can_prefetch(self, model, name):
+        """Values of text fields can be matched without the database"""
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return False
+        return isinstance(field, (models.CharField, models.TextField)) and not field.is_relation
+
+    def prefetch_objects(self, rows):
+        """Fetch objects of all the rows of a batch with one query"""
+        self.prefetched_objects = None
+        if self.eid is None or not self.can_prefetch(self.model, self.eid):
+            return
+        eid_vals = set()
+        for row in rows:
+            try:
+                eid_vals.add(self.get_eid_kwargs(row)[self.eid])
+            except ImportError:
+                continue  # Reported when parsing the row
+        eid_vals = [eid_val for eid_val in eid_vals if isinstance(eid_val, str)]
+        prefetched = {eid_val: [] for eid_val in eid_vals}
+        lookup = {'{0}__in'.format(self.eid): eid_vals}
+        for obj in self.model.objects.filter(**lookup).order_by('pk'):
+            prefetched[getattr(obj, self.eid)].append(obj)
+        self.prefetched_objects = prefetched
+
+    def get_natural_key_values(self, val, mapping, partial, many):
+        """Same as filter_fk/filter_m2m + get_mapping, without warnings"""
+        if many:
+            if not val:
+                return []
+            if self.separator and not isinstance(val, list):
+                val = val.split(self.separator)
+            val = [subval.strip() for subval in val if isinstance(subval, str)]
+        elif isinstance(val, str):
+            val = [val]
+        else:
+            return []
+        values = []
+        for subval in val:
+            if partial:
+                subval = next((j for i, j in mapping.items() if i in subval), None)
+            elif mapping is not None:
+                subval = mapping.get(subval)
+            if isinstance(subval, str):
+                values.append(subval)
+        return values
+
+    def prefetch_natural_keys(self, rows):
+        """Fetch related objects of all the rows of a batch with one query per field"""
+        values = defaultdict(set)
+        for fields, constant in ((self.fields, False), (self.m2m_fields, False),
+                                 (self.constant_fields, True), (self.m2m_constant_fields, True)):
+            for dst, src in fields.items():
+                if dst not in self.natural_keys or hasattr(self, 'filter_{0}'.format(dst)):
+                    continue
+                field = self.model._meta.get_field(dst)
+                if not isinstance(field, (models.ForeignKey, models.ManyToManyField)):
+                    continue
+                options = self.field_options.get(dst, {})
+                if options.get('fk'):
+                    continue
+                model = field.rel.to
+                natural_key = self.natural_keys[dst]
+                if not self.can_prefetch(model, natural_key):
+                    continue
+                if constant:
+                    vals = [src]
+                elif isinstance(src, str):
+                    vals = []
+                    src = self.normalize_src(src)
+                    for row in rows:
+                        try:
+                            vals.append(self.get_part(dst, src, row))
+                        except (KeyError, IndexError, TypeError):
+                            continue
+                else:
+                    continue
+                for val in vals:
+                    values[(model, natural_key)].update(self.get_natural_key_values(
+                        val, options.get('mapping'), options.get('partial', False),
+                        isinstance(field, models.ManyToManyField)))
+        for (model, natural_key), vals in values.items():
+            prefetched = self.prefetched_natural_keys.setdefault((model, natural_key), {})
+            vals = vals - set(prefetched)
+            if not vals:
+                continue
+            found = defaultdict(list)
+            for obj in model.objects.filter(**{'{0}__in'.format(natural_key): vals}):
+                found[getattr(obj, natural_key)].append(obj)
+            for val in vals:
+                if len(found[val]) <= 1:
+                    prefetched[val] = found[val][0] if found[val] else None
+                # else not cached: get() raises MultipleObjectsReturned as usual
+
+    def get_related(self, model, fields):
+        """Same as model.objects.get(**fields), using prefetched natural keys"""
+        if len(fields) == 1:
+            (natural_key, val), = fields.items()
+            prefetched = self.prefetched_natural_keys.get((model, natural_key), {})
+            if isinstance(val, str) and val in prefetched:
+                if prefetched[val] is None:
+                    raise model.DoesNotExist
+                return prefetched[val]
+        return model.objects.get(**fields)
+
+    def get_or_create_related(self, model, fields):
+        """Same as model.objects.get_or_create(**fields), using prefetched natural keys"""
+        try:
+            return self.get_related(model, fields), False
+        except model.DoesNotExist:
+            obj = model.objects.create(**fields)
+        if len(fields) == 1:
+            (natural_key, val), = fields.items()
+            prefetched = self.prefetched_natural_keys.get((model, natural_key))
+            if prefetched is not None and val in prefetched:
+                prefetched[val] = obj
+        return obj, True
+
+    def can_bulk_create(self):
+        """bulk_create() does not call save(): only allowed if it has no side effect"""
+        if self.model._meta.parents:
+            return False
+        return all(klass in (models.Model, BasePublishableMixin)
+                   for klass in self.model.__mro__ if 'save' in vars(klass))
+
+    def create_objects(self, pending):
+        objs = [obj for line, row, obj, operation, update_fields in pending if operation == "created"]
+        if not objs:
+            return
+        if self.can_bulk_create():
+            for obj in objs:
+                if isinstance(obj, BasePublishableMixin):
+                    obj.update_publication_date()
+            try:
+                with transaction.atomic():
+                    self.model.objects.bulk_create(objs)
+                return
+            except DatabaseError:
+                if settings.DEBUG:
+                    raise
+                for obj in objs:
+                    obj.pk = None
+        # Save one by one to report the faulty line
+        for self.line, row, self.obj, operation, update_fields in pending:
+            if operation == "created":
+                self.parse_safely(self.save_created)
+
+    def save_created(self):
+        # Savepoint, so that next objects can be saved after a failure
+        with transaction.atomic():
+            self.obj.save()
+
+    def complete_obj(self, row, operation, update_fields):
+        if operation != "created":
+            self.obj.save(update_fields=update_fields)
+        self.parse_obj_relations(row, operation, update_fields)
+
+    def flush(self):
+        """Write objects of the current batch, then parse their relations"""
+        pending, self.pending = self.pending, []
+        if self.prefetched_objects is not None:
+            # Objects have been created or modified: query them again if needed
+            for eid_val in self.pending_eids:
+                self.prefetched_objects.pop(eid_val, None)
+        self.pending_eids = set()
+        line = self.line
+        self.create_objects(pending)
+        # Objects which creation failed are already reported
+        self.complete_objects([item for item in pending if item[2].pk is not None])
+        self.line = line
+
+    def complete_objects(self, pending):
+        for self.line, row, self.obj, operation, update_fields in pending:
+            self.parse_safely(self.complete_obj, row, operation, update_fields)
+
+    def parse_rows(self, rows):
+        self.prefetch_objects(rows)
+        self.prefetch_natural_keys(rows)
+        for row in rows:
+            self.parse_safely(self.parse_row, row)
+        self.flush()
+        self.prefetched_objects = None
+
     def report(self, output_format='txt'):
         context = {
             'nb_success': self.nb_success,
@@ -358,12 +632,12 @@ class Parser(object):
         if fk:
             fields[fk] = getattr(self.obj, fk)
         if create:
-            val, created = model.objects.get_or_create(**fields)
+            val, created = self.get_or_create_related(model, fields)
             if created:
                 self.add_warning(_("{model} '{val}' did not exist in Geotrek-Admin and was automatically created").format(model=model._meta.verbose_name.title(), val=val))
             return val
         try:
-            return model.objects.get(**fields)
+            return self.get_related(model, fields)
         except model.DoesNotExist:
             self.add_warning(_("{model} '{val}' does not exists in Geotrek-Admin. Please add it").format(model=model._meta.verbose_name.title(), val=val))
             return None
@@ -383,13 +657,13 @@ class Parser(object):
             if fk:
                 fields[fk] = getattr(self.obj, fk)
             if create:
-                subval, created = model.objects.get_or_create(**fields)
+                subval, created = self.get_or_create_related(model, fields)
                 if created:
                     self.add_warning(_("{model} '{val}' did not exist in Geotrek-Admin and was automatically created").format(model=model._meta.verbose_name.title(), val=subval))
                 dst.append(subval)
                 continue
             try:
-                dst.append(model.objects.get(**fields))
+                dst.append(self.get_related(model, fields))
             except model.DoesNotExist:
                 self.add_warning(_("{model} '{val}' does not exists in Geotrek-Admin. Please add it").format(model=model._meta.verbose_name.title(), val=subval))
                 continue
@@ -440,24 +714,35 @@ class Parser(object):
         if self.filename and not os.path.exists(self.filename):
             raise GlobalImportError(_("File does not exists at: {filename}").format(filename=self.filename))
         self.start()
+        rows = []
         for i, row in enumerate(self.next_row()):
             if limit and i >= limit:
                 break
-            try:
-                self.parse_row(row)
-            except DatabaseError as e:
-                if settings.DEBUG:
-                    raise
-                self.add_warning(str(e).decode('utf8'))
-            except (ValueImportError, RowImportError) as e:
-                self.add_warning(str(e))
-            except Exception as e:
-                raise
-                if settings.DEBUG:
-                    raise
-                self.add_warning(str(e))
+            if not self.batch_size:
+                self.parse_safely(self.parse_row, row)
+                continue
+            rows.append(row)
+            if len(rows) >= self.batch_size:
+                self.parse_rows(rows)
+                rows = []
+        if rows:
+            self.parse_rows(rows)
         self.end()
 
+    def parse_safely(self, parse, *args):
+        try:
+            parse(*args)
+        except DatabaseError as e:
+            if settings.DEBUG:
+                raise
+            self.add_warning(str(e))
+        except (ValueImportError, RowImportError) as e:
+            self.add_warning(str(e))
+        except Exception as e:
+            if settings.DEBUG:
+                raise
+            self.add_warning(str(e))
+
 
 class ShapeParser(Parser):
     def next_row(self):
@@ -522,11 +807,69 @@ class AtomParser(Parser):
             yield row
 
 
+class AttachmentDownload(object):
+    """
+    Result of ``AttachmentParserMixin.fetch_attachment()``: the up to date
+    attachment if any, else the downloaded content.
+    """
+    def __init__(self, attachment=None, content=None, etag='', last_modified='', warning=None):
+        self.attachment = attachment
+        self.content = content
+        self.etag = etag
+        self.last_modified = last_modified
+        self.warning = warning
+
+
+class AttachmentDownloader(object):
+    """
+    Run ``fetch`` for each job in a thread pool, ahead of the import of the
+    related objects. Results are expected in the order of jobs, and at most
+    ``ahead`` of them are kept in memory.
+    """
+    def __init__(self, executor, fetch, jobs, ahead):
+        self.executor = executor
+        self.fetch = fetch
+        self.jobs = list(jobs)
+        self.indexes = {key: i for i, (key, args) in enumerate(self.jobs)}
+        self.ahead = ahead
+        self.futures = {}
+        self.submitted = 0
+        self.submit(ahead)
+
+    def submit(self, end):
+        while self.submitted < min(end, len(self.jobs)):
+            key, args = self.jobs[self.submitted]
+            self.futures[self.submitted] = self.executor.submit(self.fetch, *args)
+            self.submitted += 1
+
+    def get(self, key):
+        """Returns None if job ``key`` is unknown or has been skipped"""
+        index = self.indexes.pop(key, None)
+        if index is None:
+            return None
+        # Jobs before this one will not be asked anymore
+        for skipped in [i for i in self.futures if i < index]:
+            self.futures.pop(skipped).cancel()
+        self.submitted = max(self.submitted, index)
+        self.submit(index + 1 + self.ahead)
+        future = self.futures.pop(index, None)
+        if future is None:
+            return None
+        return future.result()
+
+    def close(self):
+        for future in self.futures.values():
+            future.cancel()
+        self.futures = {}
+
+
 class AttachmentParserMixin(object):
     download_attachments = True
     base_url = ''
     delete_attachments = False
     filetype_name = "Photographie"
+    download_concurrency = 4  # Number of attachments downloaded at the same time
+    download_timeout = 60  # seconds
     non_fields = {
         'attachments': _("Attachments"),
     }
@@ -544,96 +887,272 @@ class AttachmentParserMixin(object):
                 raise GlobalImportError(_("FileType '{name}' does not exists in "
                                           "Geotrek-Admin. Please add it").format(name=self.filetype_name))
         self.creator, created = get_user_model().objects.get_or_create(username='import', defaults={'is_active': False})
+        # HTTP sessions and FTP connections are kept by download threads
+        self.executor = ThreadPoolExecutor(max_workers=self.download_concurrency)
+        self.local = threading.local()
+        self.connections = []
+        self.downloads = None
+        self.prefetched_attachments = None
+
+    def end(self):
+        super(AttachmentParserMixin, self).end()
+        self.executor.shutdown()
+        for opened in self.connections:
+            try:
+                opened.close()
+            except Exception:
+                pass
 
     def filter_attachments(self, src, val):
         if not val:
             return []
         return [(subval.strip(), '', '') for subval in val.split(self.separator) if subval.strip()]
 
+    def get_session(self):
+        session = getattr(self.local, 'session', None)
+        if session is None:
+            session = self.local.session = requests.Session()
+            self.connections.append(session)
+        return session
+
+    def get_ftp(self, parsed_url, reconnect=False):
+        ftps = self.local.__dict__.setdefault('ftps', {})
+        key = (parsed_url.hostname, parsed_url.port, parsed_url.username, parsed_url.password)
+        ftp = ftps.get(key)
+        if ftp is not None and reconnect:
+            ftp.close()
+            ftp = None
+        if ftp is None:
+            ftp = ftps[key] = FTP(timeout=self.download_timeout)
+            self.connections.append(ftp)
+            ftp.connect(parsed_url.hostname, parsed_url.port or 21)
+            ftp.login(user=parsed_url.username, passwd=parsed_url.password)
+        return ftp
+
+    def ftp_call(self, url, action):
+        """Run action(ftp, filename) in the directory of url, reconnecting once if needed"""
+        parsed_url = urlparse(url)
+        directory, filename = dirname(parsed_url.path), parsed_url.path.split('/')[-1:][0]
+        try:
+            ftp = self.get_ftp(parsed_url)
+            ftp.cwd(directory)
+        except ftplib_errors:
+            # Connection may have been closed by the server
+            ftp = self.get_ftp(parsed_url, reconnect=True)
+            ftp.cwd(directory)
+        return action(ftp, filename)
+
     def has_size_changed(self, url, attachment):
         parsed_url = urlparse(url)
         if parsed_url.scheme == 'ftp':
-            directory = dirname(parsed_url.path)
-
-            ftp = FTP(parsed_url.hostname)
-            ftp.login(user=parsed_url.username, passwd=parsed_url.password)
-            ftp.cwd(directory)
-            size = ftp.size(parsed_url.path.split('/')[-1:][0])
+            size = self.ftp_call(url, lambda ftp, filename: ftp.size(filename))
             return size != attachment.attachment_file.size
 
         if parsed_url.scheme == 'http' or parsed_url.scheme == 'https':
-            response = requests.head(url, allow_redirects=True)
+            response = self.request_attachment(url, method='head')
             size = response.headers.get('content-length')
             return size is not None and int(size) != attachment.attachment_file.size
 
         return True
 
-    def download_attachment(self, url):
+    def request_attachment(self, url, method='get', headers=None):
+        try:
+            return getattr(self.get_session(), method)(url, headers=headers, allow_redirects=True,
+                                                        timeout=self.download_timeout)
+        except requests.exceptions.RequestException as e:
+            raise ValueImportError('Failed to load attachment: {exc}'.format(exc=e))
+
+    def get_validators(self, response):
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        return {
+            'etag': etag[:256] if isinstance(etag, str) else '',
+            'last_modified': last_modified[:64] if isinstance(last_modified, str) else '',
+        }
+
+    def fetch_attachment(self, url, attachments):
+        """
+        Look for an up to date attachment among ``attachments`` (imported
+        with the same file name), else download the file. Runs in download
+        threads: warnings are returned instead of being added.
+        """
         parsed_url = urlparse(url)
+        http = parsed_url.scheme in ('http', 'https')
+        failed = _("Failed to download '{url}'").format(url=url)
+        response = None
+        for attachment in attachments:
+            if http and (attachment.source_etag or attachment.source_last_modified):
+                if response is None:
+                    headers = {}
+                    if attachment.source_etag:
+                        headers['If-None-Match'] = attachment.source_etag
+                    if attachment.source_last_modified:
+                        headers['If-Modified-Since'] = attachment.source_last_modified
+                    response = self.request_attachment(url, headers=headers)
+                    if response.status_code == 304:
+                        return AttachmentDownload(attachment)
+                    if response.status_code != 200:
+                        # Keep the previous version
+                        return AttachmentDownload(attachment, warning=failed)
+                validators = self.get_validators(response)
+                if validators['etag'] == attachment.source_etag and (
+                        validators['etag'] or validators['last_modified'] == attachment.source_last_modified):
+                    return AttachmentDownload(attachment, **validators)
+            elif http:
+                # Imported before validators were stored
+                head = self.request_attachment(url, method='head')
+                size = head.headers.get('content-length')
+                if size is None or int(size) == attachment.attachment_file.size:
+                    return AttachmentDownload(attachment, **self.get_validators(head))
+            elif not self.has_size_changed(url, attachment):
+                return AttachmentDownload(attachment)
+        if http and self.download_attachments:
+            if response is None:
+                response = self.request_attachment(url)
+            if response.status_code != requests.codes.ok:
+                return AttachmentDownload(warning=failed)
+            return AttachmentDownload(content=response.content, **self.get_validators(response))
         if parsed_url.scheme == 'ftp':
+            content = BytesIO()
+            try:
+                self.ftp_call(url, lambda ftp, filename: ftp.retrbinary('RETR ' + filename, content.write))
+            except ftplib_errors:
+                return AttachmentDownload(warning=failed)
+            return AttachmentDownload(content=content.getvalue())
+        return AttachmentDownload()
+
+    def download_attachment(self, url):
+        download = self.fetch_attachment(url, [])
+        if download.warning:
+            self.add_warning(download.warning)
+        return download.content
+
+    def get_attachments(self, obj):
+        if self.prefetched_attachments is not None:
+            return self.prefetched_attachments.get(obj.pk, [])
+        return Attachment.objects.attachments_for_object(obj)
+
+    def prefetch_attachments(self, objs):
+        """Fetch attachments of several objects with one query"""
+        objs = {obj.pk: obj for obj in objs}
+        content_type = ContentType.objects.get_for_model(self.model)
+        self.prefetched_attachments = defaultdict(list)
+        for attachment in Attachment.objects.filter(content_type=content_type, object_id__in=list(objs)):
+            attachment.content_object = objs[attachment.object_id]
+            self.prefetched_attachments[attachment.object_id].append(attachment)
+
+    def get_matching_attachments(self, attachments, name):
+        matching = []
+        for attachment in attachments:
+            upload_name, ext = os.path.splitext(attachment_upload(attachment, name))
+            existing_name = attachment.attachment_file.name
+            if re.search(r"^{name}(_[a-zA-Z0-9]{{7}})?{ext}$".format(
+                    name=upload_name, ext=ext), existing_name):
+                matching.append(attachment)
+        return matching
+
+    def start_downloads(self, items):
+        """Start fetching attachments of (obj, src, val, existing attachments) items"""
+        jobs = []
+        for obj, src, val, attachments in items:
             try:
-                response = urlopen(url)
+                attachments_val = self.filter_attachments(src, val)
             except Exception:
-                self.add_warning(_("Failed to download '{url}'").format(url=url))
-                return None
-            return response.read()
-        else:
-            if self.download_attachments:
-                try:
-                    response = requests.get(url)
-                except requests.exceptions.RequestException as e:
-                    raise ValueImportError('Failed to load attachment: {exc}'.format(exc=e))
-                if response.status_code != requests.codes.ok:
-                    self.add_warning(_("Failed to download '{url}'").format(url=url))
-                    return None
-                return response.content
-            return None
+                continue  # Reported when parsing attachments of this object
+            for url, legend, author in attachments_val:
+                url = self.base_url + url
+                matching = self.get_matching_attachments(attachments, os.path.basename(url))
+                jobs.append(((obj.pk, url), (url, matching)))
+        return AttachmentDownloader(self.executor, self.fetch_attachment, jobs, 2 * self.download_concurrency)
+
+    def get_attachments_val(self, row):
+        """Same as get_val() for attachments non-field, without warnings"""
+        src = self.normalize_src(self.non_fields['attachments'])
+        srcs = src if isinstance(src, list) else [src]
+        val = []
+        for subsrc in srcs:
+            try:
+                val.append(self.get_part('attachments', subsrc, row))
+            except (KeyError, IndexError, TypeError):
+                val.append(None)
+        return src, (val if isinstance(src, list) else val[0])
+
+    def complete_objects(self, pending):
+        if 'attachments' not in self.non_fields:
+            return super(AttachmentParserMixin, self).complete_objects(pending)
+        self.prefetch_attachments([obj for line, row, obj, operation, update_fields in pending])
+        items = []
+        for line, row, obj, operation, update_fields in pending:
+            src, val = self.get_attachments_val(row)
+            items.append((obj, src, val, self.get_attachments(obj)))
+        self.downloads = self.start_downloads(items)
+        try:
+            super(AttachmentParserMixin, self).complete_objects(pending)
+        finally:
+            self.downloads.close()
+            self.downloads = None
+            self.prefetched_attachments = None
 
     def save_attachments(self, src, val):
         updated = False
-        attachments_to_delete = list(Attachment.objects.attachments_for_object(self.obj))
-        for url, legend, author in self.filter_attachments(src, val):
-            url = self.base_url + url
-            legend = legend or ""
-            author = author or ""
-            name = os.path.basename(url)
-            found = False
-            for attachment in attachments_to_delete:
-                upload_name, ext = os.path.splitext(attachment_upload(attachment, name))
-                existing_name = attachment.attachment_file.name
-                if re.search(r"^{name}(_[a-zA-Z0-9]{{7}})?{ext}$".format(
-                        name=upload_name, ext=ext), existing_name
-                ) and not self.has_size_changed(url, attachment):
-                    found = True
+        attachments_to_delete = list(self.get_attachments(self.obj))
+        downloads = self.downloads
+        if downloads is None:
+            downloads = self.start_downloads([(self.obj, src, val, attachments_to_delete)])
+        try:
+            for url, legend, author in self.filter_attachments(src, val):
+                url = self.base_url + url
+                legend = legend or ""
+                author = author or ""
+                name = os.path.basename(url)
+                download = downloads.get((self.obj.pk, url))
+                if download is None or (download.attachment is not None
+                                        and download.attachment not in attachments_to_delete):
+                    download = self.fetch_attachment(url, self.get_matching_attachments(attachments_to_delete, name))
+                if download.warning:
+                    self.add_warning(download.warning)
+
+                attachment = download.attachment
+                if attachment is not None:
                     attachments_to_delete.remove(attachment)
+                    modified = False
                     if author != attachment.author or legend != attachment.legend:
                         attachment.author = author
                         attachment.legend = legend
+                        modified = updated = True
+                    if (download.etag or download.last_modified) and (
+                            download.etag != attachment.source_etag
+                            or download.last_modified != attachment.source_last_modified):
+                        attachment.source_etag = download.etag
+                        attachment.source_last_modified = download.last_modified
+                        modified = True
+                    if modified:
                         attachment.save()
-                        updated = True
-                    break
-            if found:
-                continue
-
-            parsed_url = urlparse(url)
-
-            attachment = Attachment()
-            attachment.content_object = self.obj
-            attachment.filetype = self.filetype
-            attachment.creator = self.creator
-            attachment.author = author
-            attachment.legend = legend
-
-            if (parsed_url.scheme in ('http', 'https') and self.download_attachments) or parsed_url.scheme == 'ftp':
-                content = self.download_attachment(url)
-                if content is None:
                     continue
-                f = ContentFile(content)
-                attachment.attachment_file.save(name, f, save=False)
-            else:
-                attachment.attachment_link = url
-            attachment.save()
-            updated = True
+
+                parsed_url = urlparse(url)
+
+                attachment = Attachment()
+                attachment.content_object = self.obj
+                attachment.filetype = self.filetype
+                attachment.creator = self.creator
+                attachment.author = author
+                attachment.legend = legend
+
+                if (parsed_url.scheme in ('http', 'https') and self.download_attachments) or parsed_url.scheme == 'ftp':
+                    if download.content is None:
+                        continue
+                    f = ContentFile(download.content)
+                    attachment.attachment_file.save(name, f, save=False)
+                    attachment.source_etag = download.etag
+                    attachment.source_last_modified = download.last_modified
+                else:
+                    attachment.attachment_link = url
+                attachment.save()
+                updated = True
+        finally:
+            if downloads is not self.downloads:
+                downloads.close()
 
         if self.delete_attachments:
             for att in attachments_to_delete:
@@ -652,30 +1171,32 @@ class TourInSoftParser(AttachmentParserMixin, Parser):
             return self.root['value']
         return self.root['d']['results']
 
-    def get_nb(self):
+    def get_nb(self, root=None):
+        if root is None:
+            root = self.root
         if self.version_tourinsoft == 3:
-            return int(self.root['odata.count'])
-        return int(self.root['d']['__count'])
+            return int(root['odata.count'])
+        return int(root['d']['__count'])
+
+    def get_page(self, skip):
+        params = {
+            '$format': 'json',
+            '$inlinecount': 'allpages',
+            '$top': 1000,
+            '$skip': skip,
+        }
+        response = requests.get(self.url, params=params)
+        if response.status_code != 200:
+            raise GlobalImportError(_("Failed to download {url}. HTTP status code {status_code}").format(url=self.url, status_code=response.status_code))
+        root = response.json()
+        return root, self.get_nb(root)
 
     def next_row(self):
-        skip = 0
-        while True:
-            params = {
-                '$format': 'json',
-                '$inlinecount': 'allpages',
-                '$top': 1000,
-                '$skip': skip,
-            }
-            response = requests.get(self.url, params=params)
-            if response.status_code != 200:
-                raise GlobalImportError(_("Failed to download {url}. HTTP status code {status_code}").format(url=self.url, status_code=response.status_code))
-            self.root = response.json()
-            self.nb = self.get_nb()
+        # Next pages are downloaded and decoded in background
+        for root, nb in ReadAheadPager(self.get_page, 1000):
+            self.root, self.nb = root, nb
             for row in self.items:
                 yield {self.normalize_field_name(src): val for src, val in row.items()}
-            skip += 1000
-            if skip >= self.nb:
-                return
 
     def filter_attachments(self, src, val):
         if not val:
@@ -750,28 +1271,29 @@ class TourInSoftParser(AttachmentParserMixin, Parser):
 
 
 class TourismSystemParser(AttachmentParserMixin, Parser):
+    size = 1000
+
     @property
     def items(self):
         return self.root['data']
 
+    def get_page(self, skip):
+        params = {
+            'size': self.size,
+            'start': skip,
+        }
+        response = requests.get(self.url, params=params, auth=HTTPBasicAuth(self.login, self.password))
+        if response.status_code != 200:
+            raise GlobalImportError(_("Failed to download {url}. HTTP status code {status_code}").format(url=self.url, status_code=response.status_code))
+        root = response.json()
+        return root, int(root['metadata']['total'])
+
     def next_row(self):
-        size = 1000
-        skip = 0
-        while True:
-            params = {
-                'size': size,
-                'start': skip,
-            }
-            response = requests.get(self.url, params=params, auth=HTTPBasicAuth(self.login, self.password))
-            if response.status_code != 200:
-                raise GlobalImportError(_("Failed to download {url}. HTTP status code {status_code}").format(url=self.url, status_code=response.status_code))
-            self.root = response.json()
-            self.nb = int(self.root['metadata']['total'])
+        # Next pages are downloaded and decoded in background
+        for root, nb in ReadAheadPager(self.get_page, self.size):
+            self.root, self.nb = root, nb
             for row in self.items:
                 yield {self.normalize_field_name(src): val for src, val in row.items()}
-            skip += size
-            if skip >= self.nb:
-                return
 
     def filter_attachments(self, src, val):
         result = []
@@ -124,3 +124,18 @@ class CommandTests(TestCase):
         self.assertTrue(os.path.exists(self.picture.attachment_file.path))
         self.assertFalse(os.path.exists("{name}.120x120_q85_crop.png".format(name=self.picture.attachment_file.path)))
         self.assertEqual(Thumbnail.objects.count(), 0)
+
+    def test_prepare_thumbnails(self):
+        output = StringIO()
+        content = POIFactory(geom='SRID=%s;POINT(1 1)' % settings.SRID)
+        AttachmentFactory(content_object=content, attachment_file=get_dummy_uploaded_image())
+        AttachmentFactory(content_object=content)
+        self.assertEqual(Thumbnail.objects.count(), 0)
+        call_command('prepare_thumbnails', processes=1, stdout=output)
+        self.assertIn("1 pictures prepared", output.getvalue())
+        self.assertEqual(Thumbnail.objects.count(), 1)
+        # Then only looked up, once per object
+        resized_pictures = content.resized_pictures
+        self.assertEqual(len(resized_pictures), 1)
+        self.assertIs(content.resized_pictures, resized_pictures)
+        self.assertEqual(Thumbnail.objects.count(), 1)
@@ -1,4 +1,8 @@
+from geotrek.common.factories import AttachmentFactory
 from geotrek.common.models import Theme
+from geotrek.common.utils.testdata import get_dummy_uploaded_image
+from geotrek.trekking.factories import POIFactory
+from geotrek.trekking.models import POI
 from django.core.files import File
 from django.test import TestCase
 import os
@@ -24,3 +28,23 @@ class ThemeModelTest(TestCase):
         for f in os.listdir(self.directory):
             if f not in self.files:
                 os.remove(os.path.join(self.directory, f))
+
+
+class PicturesMixinTest(TestCase):
+    def setUp(self):
+        self.poi = POIFactory.create()
+        self.picture1 = AttachmentFactory(content_object=self.poi,
+                                          attachment_file=get_dummy_uploaded_image('a.png'))
+        self.picture2 = AttachmentFactory(content_object=self.poi, starred=True,
+                                          attachment_file=get_dummy_uploaded_image('b.png'))
+        AttachmentFactory(content_object=self.poi, title='mapimage',
+                          attachment_file=get_dummy_uploaded_image('c.png'))
+        AttachmentFactory(content_object=self.poi)
+
+    def test_pictures(self):
+        self.assertEqual(self.poi.pictures, [self.picture2, self.picture1])
+
+    def test_pictures_prefetch(self):
+        poi = POI.objects.prefetch_related(POI.pictures_prefetch()).get(pk=self.poi.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(poi.pictures, [self.picture2, self.picture1])
@@ -12,9 +12,11 @@ from django.test.utils import override_settings
 from django.template.exceptions import TemplateDoesNotExist
 
 from geotrek.authent.factories import StructureFactory
+from geotrek.authent.models import default_structure
 from geotrek.trekking.models import Trek
 from geotrek.common.models import Organism, FileType, Attachment
-from geotrek.common.parsers import ExcelParser, AttachmentParserMixin, TourInSoftParser
+from geotrek.common.parsers import (Parser, ExcelParser, AttachmentParserMixin, TourInSoftParser,
+                                    ReadAheadPager, GlobalImportError)
 
 
 class OrganismParser(ExcelParser):
@@ -32,6 +34,20 @@ class AttachmentParser(AttachmentParserMixin, OrganismEidParser):
     non_fields = {'attachments': 'photo'}
 
 
+class OrganismBatchParser(Parser):
+    model = Organism
+    url = 'http://example.com/organisms'
+    fields = {'organism': 'name'}
+    eid = 'organism'
+    batch_size = 2
+    rows = []
+
+    def next_row(self):
+        self.nb = len(self.rows)
+        for name in self.rows:
+            yield {'NAME': name}
+
+
 class ParserTests(TestCase):
     def test_bad_parser_class(self):
         with self.assertRaisesRegexp(CommandError, "Failed to import parser class 'geotrek.common.DoesNotExist'"):
@@ -80,6 +96,37 @@ class ParserTests(TestCase):
         self.assertEqual(organisms[0].organism, "Comité Théodule")
         self.assertEqual(organisms[1].organism, "Comité Hippolyte")
 
+    def test_create_batch(self):
+        filename = os.path.join(os.path.dirname(__file__), 'data', 'organism.xls')
+        call_command('import', 'geotrek.common.tests.test_parsers.OrganismEidParser', filename, batch_size=10, verbosity=0)
+        self.assertEqual(Organism.objects.count(), 1)
+        self.assertEqual(Organism.objects.get().organism, "Comité Théodule")
+
+    def test_updated_batch(self):
+        Organism.objects.create(organism="B", structure=default_structure())
+        parser = OrganismBatchParser()
+        parser.rows = ["A", "B", "C"]
+        parser.parse()
+        self.assertEqual(Organism.objects.count(), 3)
+        self.assertEqual((parser.nb_created, parser.nb_updated, parser.nb_unmodified), (2, 0, 1))
+        self.assertEqual(parser.line, 3)
+        self.assertEqual(parser.nb_success, 3)
+
+    def test_duplicate_eid_in_batch(self):
+        parser = OrganismBatchParser()
+        parser.rows = ["A", "A", "B"]
+        parser.parse()
+        self.assertEqual(Organism.objects.filter(organism="A").count(), 1)
+        self.assertEqual((parser.nb_created, parser.nb_unmodified), (2, 1))
+
+    def test_database_error_in_batch(self):
+        parser = OrganismBatchParser()
+        parser.rows = ["A", "B" * 200, "C"]
+        parser.parse()
+        self.assertEqual(sorted(Organism.objects.values_list('organism', flat=True)), ["A", "C"])
+        self.assertEqual(list(parser.warnings.keys()), ["Line 2"])
+        self.assertIn("value too long", parser.warnings["Line 2"][0])
+
     def test_report_format_text(self):
         parser = OrganismParser()
         self.assertRegex(parser.report(), '0/0 lines imported.')
@@ -105,7 +152,7 @@ class AttachmentParserTests(TestCase):
         if os.path.exists(settings.MEDIA_ROOT):
             rmtree(settings.MEDIA_ROOT)
 
-    @mock.patch('requests.get')
+    @mock.patch('requests.Session.get')
     def test_attachment(self, mocked):
         mocked.return_value.status_code = 200
         mocked.return_value.content = ''
@@ -118,7 +165,7 @@ class AttachmentParserTests(TestCase):
         self.assertEqual(attachment.filetype, self.filetype)
         self.assertTrue(os.path.exists(attachment.attachment_file.path), True)
 
-    @mock.patch('requests.get')
+    @mock.patch('requests.Session.get')
     def test_attachment_with_other_filetype_with_structure(self, mocked):
         """
         It will always take the one without structure first
@@ -137,7 +184,7 @@ class AttachmentParserTests(TestCase):
         self.assertEqual(attachment.filetype.structure, None)
         self.assertTrue(os.path.exists(attachment.attachment_file.path), True)
 
-    @mock.patch('requests.get')
+    @mock.patch('requests.Session.get')
     def test_attachment_with_no_filetype_photographie(self, mocked):
         self.filetype.delete()
         mocked.return_value.status_code = 200
@@ -146,8 +193,8 @@ class AttachmentParserTests(TestCase):
         with self.assertRaisesRegexp(CommandError, "FileType 'Photographie' does not exists in Geotrek-Admin. Please add it"):
             call_command('import', 'geotrek.common.tests.test_parsers.AttachmentParser', filename, verbosity=0)
 
-    @mock.patch('requests.get')
-    @mock.patch('requests.head')
+    @mock.patch('requests.Session.get')
+    @mock.patch('requests.Session.head')
     def test_attachment_not_updated(self, mocked_head, mocked_get):
         mocked_get.return_value.status_code = 200
         mocked_get.return_value.content = ''
@@ -158,6 +205,40 @@ class AttachmentParserTests(TestCase):
         self.assertEqual(mocked_get.call_count, 1)
         self.assertEqual(Attachment.objects.count(), 1)
 
+    @mock.patch('requests.Session.get')
+    def test_attachment_conditional_request(self, mocked):
+        mocked.return_value.status_code = 200
+        mocked.return_value.content = ''
+        mocked.return_value.headers = {'ETag': '"v1"', 'Last-Modified': 'Wed, 21 Oct 2015 07:28:00 GMT'}
+        filename = os.path.join(os.path.dirname(__file__), 'data', 'organism.xls')
+        call_command('import', 'geotrek.common.tests.test_parsers.AttachmentParser', filename, verbosity=0)
+        attachment = Attachment.objects.get()
+        self.assertEqual(attachment.source_etag, '"v1"')
+        self.assertEqual(attachment.source_last_modified, 'Wed, 21 Oct 2015 07:28:00 GMT')
+        mocked.return_value.status_code = 304
+        call_command('import', 'geotrek.common.tests.test_parsers.AttachmentParser', filename, verbosity=0)
+        self.assertEqual(mocked.call_count, 2)
+        self.assertEqual(mocked.call_args[1]['headers'], {
+            'If-None-Match': '"v1"',
+            'If-Modified-Since': 'Wed, 21 Oct 2015 07:28:00 GMT',
+        })
+        self.assertEqual(Attachment.objects.get().pk, attachment.pk)
+
+    @mock.patch('requests.Session.get')
+    def test_attachment_modified(self, mocked):
+        mocked.return_value.status_code = 200
+        mocked.return_value.content = ''
+        mocked.return_value.headers = {'ETag': '"v1"'}
+        filename = os.path.join(os.path.dirname(__file__), 'data', 'organism.xls')
+        call_command('import', 'geotrek.common.tests.test_parsers.AttachmentParser', filename, verbosity=0)
+        mocked.return_value.content = 'new'
+        mocked.return_value.headers = {'ETag': '"v2"'}
+        call_command('import', 'geotrek.common.tests.test_parsers.AttachmentParser', filename, verbosity=0)
+        self.assertEqual(mocked.call_count, 2)
+        attachment = Attachment.objects.order_by('pk').last()
+        self.assertEqual(attachment.source_etag, '"v2"')
+        self.assertEqual(attachment.attachment_file.read(), b'new')
+
 
 class TourInSoftParserTests(TestCase):
 
@@ -173,3 +254,52 @@ class TourInSoftParserTests(TestCase):
         parser = TestTourParser()
         result = parser.filter_attachments('', 'a||b||c##||||##d||e||f')
         self.assertListEqual(result, [['a', 'b', 'c'], ['d', 'e', 'f']])
+
+
+class ReadAheadPagerTests(TestCase):
+    def fetch(self, skip):
+        self.skips.append(skip)
+        return list(range(skip, min(skip + 3, 10))), 10
+
+    def setUp(self):
+        self.skips = []
+
+    def test_all_pages(self):
+        pager = ReadAheadPager(self.fetch, 3)
+        self.assertEqual(list(pager), [[0, 1, 2], [3, 4, 5], [6, 7, 8], [9]])
+        self.assertEqual(pager.total, 10)
+        self.assertEqual(self.skips, [0, 3, 6, 9])
+
+    def test_skip(self):
+        self.assertEqual(list(ReadAheadPager(self.fetch, 3, skip=6)), [[6, 7, 8], [9]])
+
+    def test_error(self):
+        def fetch(skip):
+            if skip:
+                raise GlobalImportError("Failed to download")
+            return [0, 1], 4
+
+        with self.assertRaisesRegexp(GlobalImportError, "Failed to download"):
+            list(ReadAheadPager(fetch, 2))
+
+    @mock.patch('requests.get')
+    def test_tourinsoft_pages(self, mocked):
+        def mocked_json():
+            skip = mocked.call_args[1]['params']['$skip']
+            return {'d': {'__count': 1500, 'results': [{'id': i} for i in range(skip, min(skip + 1000, 1500))]}}
+
+        mocked.return_value.status_code = 200
+        mocked.return_value.json = mocked_json
+
+        class TestTourParser(TourInSoftParser):
+            def __init__(self):
+                self.model = Trek
+                super(TestTourParser, self).__init__()
+
+        parser = TestTourParser()
+        rows = list(parser.next_row())
+        self.assertEqual(len(rows), 1500)
+        self.assertEqual(rows[-1], {'ID': 1499})
+        self.assertEqual(parser.nb, 1500)
+        # Last page is still available to subclasses
+        self.assertEqual(parser.items[-1], {'id': 1499})
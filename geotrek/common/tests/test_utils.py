@@ -1,16 +1,22 @@
 from unittest import mock
 
-from django.contrib.gis.geos import Point
+from django.conf import settings
+from django.contrib.gis.geos import LineString, MultiPolygon, Point, Polygon
 from django.db import connection
 from django.test import TestCase, override_settings
 
-from ..utils import sql_extent, uniquify, format_coordinates
+from ..utils import sql_extent, uniquify, format_coordinates, intersecting, intersecting_map, intersecting_pairs
 from ..utils.postgresql import debug_pg_notices
 from ..utils.import_celery import (create_tmp_destination,
                                    subclasses,
                                    )
 
 from geotrek.common.parsers import Parser
+from geotrek.core.factories import PathFactory
+from geotrek.tourism.factories import TouristicContentFactory
+from geotrek.tourism.models import TouristicContent
+from geotrek.zoning.factories import CityFactory
+from geotrek.zoning.models import City
 
 
 class UtilsTest(TestCase):
@@ -65,3 +71,37 @@ class UtilsTest(TestCase):
     def test_format_coordinates_custom_srid(self):
         geom = Point(x=333958, y=5160979, srid=3857)
         self.assertEqual(format_coordinates(geom), 'X: 500000 / Y: 4649776 (WGS 84 / UTM zone 31N)')
+
+
+class IntersectingMapTest(TestCase):
+
+    def test_same_as_intersecting(self):
+        contents = [TouristicContentFactory.create(geom=Point(x, 0, srid=settings.SRID))
+                    for x in (0, 10, 20, 100000)]
+        contents[2].delete()
+        result = intersecting_map(TouristicContent.objects.existing(), TouristicContent)
+        self.assertEqual(len(result), 3)
+        for content in TouristicContent.objects.existing():
+            self.assertEqual(result[content.pk], list(intersecting(TouristicContent, content)))
+        self.assertEqual(result[contents[0].pk], [contents[1]])
+        self.assertEqual(result[contents[3].pk], [])
+
+    def test_filtered_queryset(self):
+        content1 = TouristicContentFactory.create(geom=Point(0, 0, srid=settings.SRID))
+        content2 = TouristicContentFactory.create(geom=Point(10, 0, srid=settings.SRID), published=False)
+        result = intersecting_map([content1, content2], TouristicContent,
+                                  queryset=TouristicContent.objects.filter(published=True))
+        self.assertEqual(result, {content1.pk: [], content2.pk: [content1]})
+
+    def test_ordering_along_lines(self):
+        city1 = CityFactory.create(geom=MultiPolygon(Polygon.from_bbox((0, 0, 10, 10)), srid=settings.SRID))
+        city2 = CityFactory.create(geom=MultiPolygon(Polygon.from_bbox((10, 0, 20, 10)), srid=settings.SRID))
+        path1 = PathFactory.create(geom=LineString((15, 5), (5, 5), srid=settings.SRID))
+        path2 = PathFactory.create(geom=LineString((5, 6), (15, 6), srid=settings.SRID))
+        pairs = intersecting_pairs([path1, path2], City, distance=0)
+        self.assertEqual([pair[:2] for pair in pairs],
+                         [(path1.pk, city2.pk), (path1.pk, city1.pk), (path2.pk, city1.pk), (path2.pk, city2.pk)])
+        self.assertAlmostEqual(pairs[1][2], 0.5)
+        with self.assertNumQueries(2):
+            result = intersecting_map([path1, path2], City, distance=0)
+        self.assertEqual(result, {path1.pk: [city2, city1], path2.pk: [city1, city2]})
@@ -0,0 +1,68 @@
+import hashlib
+import logging
+from multiprocessing import Pool
+
+from django.conf import settings
+from django.db import connections
+from django.utils.translation import ugettext as _
+
+from easy_thumbnails.exceptions import InvalidImageFormatError
+from easy_thumbnails.files import get_thumbnailer
+from PIL.Image import DecompressionBombError
+
+logger = logging.getLogger(__name__)
+
+
+def is_picture(attachment):
+    """
+    Attachments named 'mapimage' override map screenshots, they are not
+    pictures of the object.
+    """
+    return attachment.is_image and attachment.title != 'mapimage'
+
+
+def resized_picture_options(thumbnailer, picture):
+    # Uppercase options aren't used by prepared options (a primary
+    # use of prepared options is to generate the filename -- these
+    # options don't alter the filename).
+    text = settings.THUMBNAIL_COPYRIGHT_FORMAT.format(author=picture.author, title=picture.title,
+                                                      legend=picture.legend)
+    return thumbnailer.get_options({'size': (800, 800),
+                                    'TEXT': text,
+                                    'SIZE_WATERMARK': settings.THUMBNAIL_COPYRIGHT_SIZE,
+                                    'watermark': hashlib.md5(text.encode('utf-8')).hexdigest()
+                                    })
+
+
+def resize_picture(picture):
+    """
+    Returns the 800x800 watermarked thumbnail of the picture (generated if it
+    was not prepared), or None if the image is invalid.
+    """
+    thumbnailer = get_thumbnailer(picture.attachment_file)
+    try:
+        return thumbnailer.get_thumbnail(resized_picture_options(thumbnailer, picture))
+    except (IOError, InvalidImageFormatError, DecompressionBombError) as e:
+        logger.info(_("Image {} invalid or missing from disk: {}.").format(picture.attachment_file, e))
+        return None
+
+
+def _prepare_resized_picture(pk):
+    from geotrek.common.models import Attachment
+    picture = Attachment.objects.filter(pk=pk).first()
+    return picture is not None and resize_picture(picture) is not None
+
+
+def prepare_resized_pictures(attachments, processes=None):
+    """
+    Generate thumbnails of pictures among ``attachments`` on a pool of
+    ``processes`` processes (number of CPUs if None), so that they are only
+    looked up afterwards. Returns the number of valid pictures.
+    """
+    pks = [attachment.pk for attachment in attachments if is_picture(attachment)]
+    if processes == 1 or len(pks) < 2:
+        return sum(_prepare_resized_picture(pk) for pk in pks)
+    # Each process has to open its own database connection
+    connections.close_all()
+    with Pool(processes) as pool:
+        return sum(pool.imap_unordered(_prepare_resized_picture, pks, chunksize=10))
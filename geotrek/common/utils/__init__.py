@@ -1,6 +1,8 @@
 import logging
 
+from django.core.exceptions import FieldDoesNotExist
 from django.db import connection
+from django.db.models import prefetch_related_objects
 from django.utils.timezone import utc
 from django.utils.translation import pgettext
 from django.conf import settings
@@ -87,6 +89,9 @@ def uniquify(values):
 def intersecting(cls, obj, distance=None, ordering=True):
     """
     Small helper to filter all model instances by geometry intersection
+
+    Models whose geometries are subdivided in ``pieces`` (zoning layers) are
+    filtered by intersection with their pieces, which is much faster.
     """
     qs = cls.objects
     if not obj.geom:
@@ -96,14 +101,20 @@ def intersecting(cls, obj, distance=None, ordering=True):
     if distance is None:
         distance = obj.distance(cls)
     if distance:
-        qs = qs.filter(geom__dwithin=(obj.geom, Distance(m=distance)))
+        lookup = {'geom__dwithin': (obj.geom, Distance(m=distance))}
+    else:
+        lookup = {'geom__intersects': obj.geom}
+    try:
+        pieces = cls._meta.get_field('pieces')
+    except FieldDoesNotExist:
+        qs = qs.filter(**lookup)
     else:
-        qs = qs.filter(geom__intersects=obj.geom)
-        if obj.geom.geom_type == 'LineString' and ordering:
-            # FIXME: move transform from DRF viewset to DRF itself and remove transform here
-            ewkt = obj.geom.transform(settings.SRID, clone=True).ewkt
-            qs = qs.extra(select={'ordering': 'ST_LineLocatePoint(ST_GeomFromEWKT(\'{ewkt}\'), ST_StartPoint((ST_Dump(ST_Intersection(ST_GeomFromEWKT(\'{ewkt}\'), geom))).geom))'.format(ewkt=ewkt)})
-            qs = qs.extra(order_by=['ordering'])
+        qs = qs.filter(pk__in=pieces.related_model.objects.filter(**lookup).values(pieces.field.name))
+    if not distance and obj.geom.geom_type == 'LineString' and ordering:
+        # FIXME: move transform from DRF viewset to DRF itself and remove transform here
+        ewkt = obj.geom.transform(settings.SRID, clone=True).ewkt
+        qs = qs.extra(select={'ordering': 'ST_LineLocatePoint(ST_GeomFromEWKT(\'{ewkt}\'), ST_StartPoint((ST_Dump(ST_Intersection(ST_GeomFromEWKT(\'{ewkt}\'), geom))).geom))'.format(ewkt=ewkt)})
+        qs = qs.extra(order_by=['ordering'])
 
     if obj.__class__ == cls:
         # Prevent self intersection
@@ -111,6 +122,119 @@ def intersecting(cls, obj, distance=None, ordering=True):
     return qs
 
 
+def intersecting_pairs(objects, cls, distance=None, ordering=True):
+    """
+    Batch version of ``intersecting()``: return ``(object pk, instance pk, fraction)``
+    tuples for all ``cls`` instances intersecting ``objects``, with one lateral
+    join per distinct distance (using spatial indexes).
+
+    ``fraction`` is the position of the intersection along linear objects
+    (``None`` for other geometries or with a distance).
+    """
+    objects = list(objects)
+    if not objects:
+        return []
+    if distance is None:
+        by_distance = {}
+        for obj in objects:
+            by_distance.setdefault(obj.distance(cls) or 0, []).append(obj.pk)
+    else:
+        by_distance = {distance: [obj.pk for obj in objects]}
+    model = objects[0].__class__
+    source = model._meta.get_field('geom')
+    target = cls._meta.get_field('geom')
+    context = {
+        'source_table': source.model._meta.db_table,
+        'source_pk': source.model._meta.pk.column,
+        'source_geom': source.column,
+        'target_table': target.model._meta.db_table,
+        'target_pk': target.model._meta.pk.column,
+        'target_geom': target.column,
+    }
+    conditions = []
+    if any(field.name == 'deleted' for field in cls._meta.get_fields()):
+        conditions.append('NOT t.{}'.format(cls._meta.get_field('deleted').column))
+    if model == cls:
+        # Prevent self intersection
+        conditions.append('t.{target_pk} <> s.{source_pk}')
+    pairs = []
+    cursor = connection.cursor()
+    for dist, pks in sorted(by_distance.items()):
+        if dist:
+            where = ['ST_DWithin(t.{target_geom}, s.{source_geom}, %s)'] + conditions
+            fraction = 'NULL::float'
+            params = [dist, pks]
+        else:
+            where = ['ST_Intersects(t.{target_geom}, s.{source_geom})'] + conditions
+            fraction = """CASE WHEN %s AND GeometryType(s.{source_geom}) = 'LINESTRING' THEN (
+                SELECT min(ST_LineLocatePoint(s.{source_geom}, CASE GeometryType(d.geom)
+                    WHEN 'LINESTRING' THEN ST_StartPoint(d.geom) ELSE ST_PointOnSurface(d.geom) END))
+                FROM ST_Dump(ST_Intersection(s.{source_geom}, t.{target_geom})) AS d) END"""
+            params = [ordering, pks]
+        sql = """
+            SELECT s.{source_pk}, t.{target_pk}, """ + fraction + """
+            FROM {source_table} AS s
+            JOIN LATERAL (
+                SELECT t.{target_pk}, t.{target_geom} FROM {target_table} AS t
+                WHERE """ + ' AND '.join(where) + """
+            ) AS t ON true
+            WHERE s.{source_pk} = ANY(%s)
+        """
+        cursor.execute(sql.format(**context), params)
+        pairs.extend(cursor.fetchall())
+    pairs.sort(key=lambda pair: (pair[0], pair[2] is None, pair[2] or 0.0, pair[1]))
+    return pairs
+
+
+def intersecting_map(objects, cls, distance=None, ordering=True, queryset=None):
+    """
+    Return ``{object pk: [cls instances]}`` for ``objects``, like calling
+    ``intersecting()`` on each of them, but with a query per distinct distance
+    and a query to load instances. Instances are
+    taken from ``queryset`` (``cls.objects.existing()`` by default), which may be
+    filtered (e.g. published only).
+    """
+    objects = list(objects)
+    result = {obj.pk: [] for obj in objects}
+    pairs = intersecting_pairs(objects, cls, distance=distance, ordering=ordering)
+    if not pairs:
+        return result
+    if queryset is None:
+        queryset = cls.objects
+        if hasattr(queryset, 'existing'):
+            queryset = queryset.existing()
+    instances = queryset.filter(pk__in=set(pair[1] for pair in pairs))
+    positions = {}
+    for position, instance in enumerate(instances):
+        positions[instance.pk] = (position, instance)
+    for source_pk, target_pk, fraction in pairs:
+        if target_pk in positions:
+            position, instance = positions[target_pk]
+            result[source_pk].append((fraction is None, fraction or 0.0, position, instance))
+    for source_pk, values in result.items():
+        result[source_pk] = [value[-1] for value in sorted(values, key=lambda value: value[:3])]
+    return result
+
+
+def iterate_in_chunks(queryset, chunk_size=100):
+    """
+    Iterate on queryset with a server-side cursor, prefetching related
+    objects chunk by chunk (``iterator()`` ignores ``prefetch_related()``).
+    """
+    lookups = queryset._prefetch_related_lookups
+    chunk = []
+    for obj in queryset.iterator():
+        chunk.append(obj)
+        if len(chunk) == chunk_size:
+            prefetch_related_objects(chunk, *lookups)
+            for chunk_obj in chunk:
+                yield chunk_obj
+            chunk = []
+    prefetch_related_objects(chunk, *lookups)
+    for chunk_obj in chunk:
+        yield chunk_obj
+
+
 def format_coordinates(geom):
     if settings.DISPLAY_SRID in [4326, 3857]:  # WGS84 formatting
         location = geom.centroid.transform(4326, clone=True)
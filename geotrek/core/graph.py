@@ -1,6 +1,12 @@
+import json
 import math
+import uuid
 from collections import defaultdict
 
+from django.core.cache import caches
+
+from geotrek.common.functions import StartPoint, EndPoint, X, Y
+
 
 def path_modifier(path):
     length = 0.0 if math.isnan(path.length) else path.length
@@ -55,3 +61,186 @@ def graph_edges_nodes_of_qs(qs):
         'edges': dict(edges),
         'nodes': dict(nodes),
     }
+
+
+def path_extremities_of_qs(qs):
+    """
+    Iterate on (pk, length, start coords, end coords) of paths, reading
+    extremities with SQL functions instead of loading full geometries.
+    """
+    qs = qs.annotate(start_x=X(StartPoint('geom')), start_y=Y(StartPoint('geom')),
+                     end_x=X(EndPoint('geom')), end_y=Y(EndPoint('geom')))
+    for values in qs.values_list('pk', 'length', 'start_x', 'start_y', 'end_x', 'end_y').order_by('pk'):
+        pk, length, start_x, start_y, end_x, end_y = values
+        length = 0.0 if length is None or math.isnan(length) else length
+        yield pk, length, (start_x, start_y), (end_x, end_y)
+
+
+class PathGraph(object):
+    """
+    Graph of the paths network (same form as ``graph_edges_nodes_of_qs()``),
+    updated incrementally with paths changed since the previous build.
+
+    Each change increments the graph revision and is recorded on the edges,
+    so that clients holding a previous ``version`` can be sent a delta.
+    """
+    cache_key = 'path_graph'
+    # (latest, version, serialized graph) of the full graph
+    json_cache_key = 'path_graph_json'
+    # Above this proportion of changed paths, the graph is rebuilt from scratch
+    rebuild_ratio = 0.5
+
+    def __init__(self):
+        # A new generation is started at each full build: revisions of
+        # different generations are not comparable.
+        self.generation = uuid.uuid4().hex[:8]
+        self.revision = 0
+        self.latest = None  # date_update of the latest path taken into account
+        self.edges = {}
+        self.nodes = defaultdict(dict)
+        self.node_ids = {}  # coords -> node id, kept forever so that ids are stable
+        self.node_edges = defaultdict(set)
+        self.edge_revisions = {}
+        self.node_revisions = {}
+        self.removed = {}  # edge id -> revision
+
+    @property
+    def version(self):
+        return '%s-%s' % (self.generation, self.revision)
+
+    @classmethod
+    def get_queryset(cls):
+        from .models import Path
+        return Path.objects.exclude(draft=True)
+
+    @classmethod
+    def load(cls, latest):
+        """
+        Return the graph, up to date with ``latest`` (``Path.latest_updated()``).
+        """
+        cache = caches['fat']
+        graph = cache.get(cls.cache_key)
+        if graph is None or not isinstance(graph, cls):
+            graph = cls()
+        if graph.update(latest):
+            cache.set(cls.cache_key, graph)
+            cache.delete(cls.json_cache_key)
+        return graph
+
+    @classmethod
+    def load_json(cls, latest):
+        """
+        Return version and serialized full graph, up to date with ``latest``.
+        Serialization is cached, so that the graph is neither unpickled nor
+        dumped again while paths do not change.
+        """
+        cache = caches['fat']
+        cached = cache.get(cls.json_cache_key)
+        if cached is not None and cached[0] is not None and latest is not None and cached[0] >= latest:
+            return cached[1], cached[2]
+        graph = cls.load(latest)
+        serialized = json.dumps(graph.as_dict())
+        cache.set(cls.json_cache_key, (graph.latest, graph.version, serialized))
+        return graph.version, serialized
+
+    def update(self, latest):
+        """
+        Apply changes of paths modified since the previous update.
+        Returns False if the graph was already up to date.
+        """
+        if self.latest is not None and latest is not None and self.latest >= latest:
+            return False
+        qs = self.get_queryset()
+        if self.latest is None:
+            changed, removed = list(path_extremities_of_qs(qs)), set()
+        else:
+            changed = list(path_extremities_of_qs(qs.filter(date_update__gte=self.latest)))
+            removed = set(self.edges) - set(qs.values_list('pk', flat=True))
+            if len(changed) + len(removed) > len(self.edges) * self.rebuild_ratio:
+                # Most of the network has changed, start a new generation
+                self.__init__()
+                return self.update(latest)
+        revision = self.revision + 1
+        modified = False
+        for pk, length, start, end in changed:
+            modified |= self._set_edge(pk, length, start, end, revision)
+        for pk in removed:
+            self._remove_edge(pk, revision)
+            modified = True
+        if modified:
+            self.revision = revision
+        self.latest = latest
+        return True
+
+    def _node_id(self, coords):
+        if coords not in self.node_ids:
+            self.node_ids[coords] = len(self.node_ids) + 1
+        return self.node_ids[coords]
+
+    def _set_edge(self, pk, length, start, end, revision):
+        nodes_id = [self._node_id(start), self._node_id(end)]
+        edge = {'id': pk, 'length': length, 'nodes_id': nodes_id}
+        if self.edges.get(pk) == edge:
+            return False
+        if pk in self.edges:
+            self._remove_edge(pk, revision)
+        k_start, k_end = nodes_id
+        self.nodes[k_start][k_end] = pk
+        self.nodes[k_end][k_start] = pk
+        for k_node in nodes_id:
+            self.node_edges[k_node].add(pk)
+            self.node_revisions[k_node] = revision
+        self.edges[pk] = edge
+        self.edge_revisions[pk] = revision
+        self.removed.pop(pk, None)
+        return True
+
+    def _remove_edge(self, pk, revision):
+        edge = self.edges.pop(pk)
+        self.edge_revisions.pop(pk, None)
+        self.removed[pk] = revision
+        k_start, k_end = edge['nodes_id']
+        for k_node, k_other in ((k_start, k_end), (k_end, k_start)):
+            self.node_revisions[k_node] = revision
+            self.node_edges[k_node].discard(pk)
+            if self.nodes[k_node].get(k_other) == pk:
+                del self.nodes[k_node][k_other]
+                # Another path may link the same nodes
+                for other_pk in self.node_edges[k_node]:
+                    if k_other in self.edges[other_pk]['nodes_id']:
+                        self.nodes[k_node][k_other] = other_pk
+                        break
+            if not self.nodes[k_node]:
+                del self.nodes[k_node]
+                del self.node_edges[k_node]
+
+    def as_dict(self):
+        return {
+            'edges': self.edges,
+            'nodes': dict(self.nodes),
+        }
+
+    def delta(self, since):
+        """
+        Return changes since the specified ``version``, or None if they
+        cannot be computed (unknown or outdated version).
+
+        ``nodes`` contains the complete adjacency of every node touched by
+        changes (empty if the node no longer exists), ``removed`` the ids
+        of deleted edges.
+        """
+        try:
+            generation, revision = since.split('-')
+            revision = int(revision)
+        except (AttributeError, ValueError):
+            return None
+        if generation != self.generation or revision > self.revision:
+            return None
+        return {
+            'version': self.version,
+            'edges': {pk: self.edges[pk] for pk, rev in self.edge_revisions.items() if rev > revision},
+            'nodes': {k_node: self.nodes.get(k_node, {})
+                      for k_node, rev in self.node_revisions.items() if rev > revision},
+            'removed': [pk for pk, rev in self.removed.items() if rev > revision and pk not in self.edges],
+        }
+
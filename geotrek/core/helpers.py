@@ -1,9 +1,10 @@
 import json
 import logging
+from contextlib import contextmanager
 
 from django.conf import settings
 from django.contrib.gis.geos import GEOSGeometry
-from django.db import connection
+from django.db import connection, transaction
 from django.contrib.gis.geos import Point
 from django.db.models.query import QuerySet
 
@@ -97,43 +98,51 @@ class TopologyHelper(object):
         PathAggregation.objects.filter(topo_object=topology).delete()
 
         try:
+            # Fetch all paths at once, instead of one query per aggregation
+            path_pks = [pk for subtopology in objdict for pk in subtopology['paths']]
+            paths_by_pk = Path.objects.in_bulk(path_pks)
             counter = 0
-            for j, subtopology in enumerate(objdict):
-                last_topo = j == len(objdict) - 1
-                positions = subtopology.get('positions', {})
-                paths = subtopology['paths']
-                # Create path aggregations
-                for i, path in enumerate(paths):
-                    last_path = i == len(paths) - 1
-                    # Javascript hash keys are parsed as a string
-                    idx = str(i)
-                    start_position, end_position = positions.get(idx, (0.0, 1.0))
-                    path = Path.objects.get(pk=path)
-                    topology.add_path(path, start=start_position, end=end_position, order=counter, reload=False)
-                    if not last_topo and last_path:
+            # Topology geometry is computed once, when all aggregations are created
+            with cls.deferred_geometry():
+                for j, subtopology in enumerate(objdict):
+                    last_topo = j == len(objdict) - 1
+                    positions = subtopology.get('positions', {})
+                    paths = subtopology['paths']
+                    # Create path aggregations
+                    for i, path in enumerate(paths):
+                        last_path = i == len(paths) - 1
+                        # Javascript hash keys are parsed as a string
+                        idx = str(i)
+                        start_position, end_position = positions.get(idx, (0.0, 1.0))
+                        try:
+                            path = paths_by_pk[int(path)]
+                        except KeyError:
+                            raise Path.DoesNotExist("Path matching query does not exist.")
+                        topology.add_path(path, start=start_position, end=end_position, order=counter, reload=False)
+                        if not last_topo and last_path:
+                            counter += 1
+                            # Intermediary marker.
+                            # make sure pos will be [X, X]
+                            # [0, X] or [X, 1] or [X, 0] or [1, X] --> X
+                            # [0.0, 0.0] --> 0.0  : marker at beginning of path
+                            # [1.0, 1.0] --> 1.0  : marker at end of path
+                            pos = -1
+                            if start_position == end_position:
+                                pos = start_position
+                            if start_position == 0.0:
+                                pos = end_position
+                            elif start_position == 1.0:
+                                pos = end_position
+                            elif end_position == 0.0:
+                                pos = start_position
+                            elif end_position == 1.0:
+                                pos = start_position
+                            elif len(paths) == 1:
+                                pos = end_position
+                            assert pos >= 0, "Invalid position (%s, %s)." % (start_position, end_position)
+                            topology.add_path(path, start=pos, end=pos, order=counter, reload=False)
                         counter += 1
-                        # Intermediary marker.
-                        # make sure pos will be [X, X]
-                        # [0, X] or [X, 1] or [X, 0] or [1, X] --> X
-                        # [0.0, 0.0] --> 0.0  : marker at beginning of path
-                        # [1.0, 1.0] --> 1.0  : marker at end of path
-                        pos = -1
-                        if start_position == end_position:
-                            pos = start_position
-                        if start_position == 0.0:
-                            pos = end_position
-                        elif start_position == 1.0:
-                            pos = end_position
-                        elif end_position == 0.0:
-                            pos = start_position
-                        elif end_position == 1.0:
-                            pos = start_position
-                        elif len(paths) == 1:
-                            pos = end_position
-                        assert pos >= 0, "Invalid position (%s, %s)." % (start_position, end_position)
-                        topology.add_path(path, start=pos, end=pos, order=counter, reload=False)
-                    counter += 1
-        except (AssertionError, ValueError, KeyError, Path.DoesNotExist) as e:
+        except (AssertionError, ValueError, KeyError, TypeError, Path.DoesNotExist) as e:
             raise ValueError("Invalid serialized topology : %s" % e)
         topology.save()
         return topology
@@ -168,6 +177,39 @@ class TopologyHelper(object):
         topology.save()
         return topology
 
+    @classmethod
+    @contextmanager
+    def deferred_geometry(cls):
+        """
+        Postpone the computation of topologies geometries while path
+        aggregations are written inside this block.
+
+        Touched topologies are queued by the ``e_r_evenement_troncon`` triggers,
+        and each one is rebuilt once when leaving the block (see
+        ``ft_evenements_geometry_flush`` in ``sql/30_evenements_troncons.sql``).
+        If the block is left through an exception, its writes are rolled back.
+        """
+        if not settings.TREKKING_TOPOLOGY_ENABLED:
+            yield
+            return
+        with transaction.atomic():
+            cursor = connection.cursor()
+            cursor.execute("SELECT set_config('geotrek.defer_evenement_geometry', 'on', true)")
+            yield
+            cursor.execute("SELECT set_config('geotrek.defer_evenement_geometry', 'off', true)")
+            cursor.execute("SELECT ft_evenements_geometry_flush()")
+
+    @classmethod
+    def recompute(cls, pks):
+        """
+        Rebuild geometry and altimetry of the specified topologies, once each.
+        """
+        pks = sorted(set(int(pk) for pk in pks))
+        if not pks or not settings.TREKKING_TOPOLOGY_ENABLED:
+            return
+        cursor = connection.cursor()
+        cursor.execute("SELECT update_geometry_of_evenement(id) FROM unnest(%s::integer[]) AS id", [pks])
+
     @classmethod
     def serialize(cls, topology, with_pk=True):
         # Point topology
@@ -308,3 +350,24 @@ class PathHelper(object):
         wkt = "ST_GeomFromText('%s', %s)" % (geom, settings.SRID)
         disjoint = sqlfunction('SELECT * FROM check_path_not_overlap', str(pk), wkt)
         return disjoint[0]
+
+    @classmethod
+    def overlaps(cls, paths=None):
+        """
+        Returns ``(path id, other path id, duplicate)`` tuples for paths of
+        ``paths`` (list of ids, all if None) overlapping another path.
+        ``duplicate`` is True if both have the same geometry.
+        """
+        cursor = connection.cursor()
+        cursor.execute("SELECT troncon, autre, doublon FROM troncons_chevauchements(%s::integer[])", [paths])
+        return cursor.fetchall()
+
+    @classmethod
+    def duplicates(cls, paths=None):
+        """
+        Returns lists of ids of paths with the same geometry (same geometry
+        hash), for paths of ``paths`` (list of ids, all if None).
+        """
+        cursor = connection.cursor()
+        cursor.execute("SELECT * FROM troncons_doublons(%s::integer[])", [paths])
+        return [row[0] for row in cursor.fetchall()]
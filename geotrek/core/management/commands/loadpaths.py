@@ -1,11 +1,84 @@
+import csv
+from io import StringIO
+
 from django.contrib.gis.gdal import DataSource, GDALException
+from geotrek.core.helpers import PathHelper
 from geotrek.core.models import Path
 from geotrek.authent.models import Structure
 from django.contrib.gis.geos.collections import Polygon, LineString
 from django.core.management.base import BaseCommand, CommandError
 from django.conf import settings
 from django.db.utils import IntegrityError, InternalError
-from django.db import transaction
+from django.db import connection, transaction
+
+
+BULK_SNAP_SQL = """
+    WITH extremities AS (
+        SELECT s.id, e.n, CASE e.n WHEN 0 THEN ST_StartPoint(s.geom) ELSE ST_EndPoint(s.geom) END AS point
+        FROM loadpaths_staging s, (VALUES (0), (1)) AS e(n)
+    ), closest AS (
+        SELECT x.id, x.n, x.point, c.geom AS other, ST_ClosestPoint(c.geom, x.point) AS closest
+        FROM extremities x
+        LEFT JOIN LATERAL (
+            SELECT geom FROM (
+                SELECT t.geom FROM l_t_troncon t WHERE ST_DWithin(t.geom, x.point, %(distance)s)
+                UNION ALL
+                -- Previous paths of the file only, as if they were created one by one
+                SELECT o.geom FROM loadpaths_staging o WHERE o.id < x.id AND ST_DWithin(o.geom, x.point, %(distance)s)
+            ) AS candidates
+            WHERE ST_Distance(geom, x.point) < %(distance)s
+            ORDER BY ST_Distance(geom, x.point)
+            LIMIT 1
+        ) AS c ON TRUE
+    ), snapped AS (
+        SELECT id, n, COALESCE((SELECT v.geom FROM ST_DumpPoints(other) AS v
+                                WHERE ST_Distance(closest, v.geom) < %(distance)s
+                                ORDER BY ST_Distance(closest, v.geom)
+                                LIMIT 1), closest, point) AS point
+        FROM closest
+    )
+    UPDATE loadpaths_staging s
+    SET geom = ST_SetPoint(ST_SetPoint(s.geom, 0, a.point), ST_NPoints(s.geom) - 1, b.point)
+    FROM snapped a, snapped b
+    WHERE a.id = s.id AND a.n = 0 AND b.id = s.id AND b.n = 1
+"""
+
+# Split staged paths where they cross each other or existing paths, so
+# that split triggers only have to cut the existing ones.
+BULK_INSERT_SQL = """
+    WITH intersections AS (
+        SELECT s.id, ST_LineLocatePoint(s.geom, d.geom) AS fraction
+        FROM loadpaths_staging s
+        JOIN LATERAL (
+            SELECT o.geom FROM loadpaths_staging o WHERE o.id != s.id AND ST_Intersects(o.geom, s.geom)
+            UNION ALL
+            SELECT t.geom FROM l_t_troncon t WHERE NOT t.brouillon AND ST_Intersects(t.geom, s.geom)
+        ) AS other ON TRUE,
+        LATERAL ST_Dump(ST_Intersection(s.geom, other.geom)) AS d
+        WHERE GeometryType(d.geom) = 'POINT'
+    ), fractions AS (
+        SELECT id, fraction FROM intersections WHERE fraction > 0 AND fraction < 1
+        UNION SELECT id, 0 FROM loadpaths_staging
+        UNION SELECT id, 1 FROM loadpaths_staging
+    ), cuts AS (
+        -- Ignore segments shorter than one meter, as split trigger does
+        SELECT f.id, f.fraction FROM (
+            SELECT id, fraction, lag(fraction) OVER (PARTITION BY id ORDER BY fraction) AS previous
+            FROM fractions
+        ) AS f JOIN loadpaths_staging s USING (id)
+        WHERE f.previous IS NULL OR f.fraction = 1
+           OR ((f.fraction - f.previous) * ST_Length(s.geom) >= 1 AND (1 - f.fraction) * ST_Length(s.geom) >= 1)
+    ), segments AS (
+        SELECT id, fraction AS start, lead(fraction) OVER (PARTITION BY id ORDER BY fraction) AS "end"
+        FROM cuts
+    )
+    INSERT INTO l_t_troncon (structure, nom, remarques, geom, valide, visible, brouillon)
+    SELECT %(structure)s, s.nom, s.remarques, ST_LineSubstring(s.geom, g.start, g."end"), TRUE, TRUE, FALSE
+    FROM segments g JOIN loadpaths_staging s USING (id)
+    WHERE g."end" IS NOT NULL
+    ORDER BY s.id, g.start
+    RETURNING id
+"""
 
 
 class Command(BaseCommand):
@@ -29,6 +102,9 @@ class Command(BaseCommand):
         parser.add_argument('--dry', '-d', action='store_true', dest='dry', default=False,
                             help="Do not change the database, dry run. Show the number of fail"
                                  " and objects potentially created")
+        parser.add_argument('--bulk', '-b', action='store_true', dest='bulk', default=False,
+                            help="Load all paths at once: paths are split at their intersections and"
+                                 " elevation/zoning are computed for the whole batch")
 
     def handle(self, *args, **options):
         verbosity = options.get('verbosity')
@@ -41,6 +117,7 @@ class Command(BaseCommand):
         comments_columns = options.get('comment')
         fail = options.get('fail')
         dry = options.get('dry')
+        bulk = options.get('bulk')
 
         if dry:
             fail = True
@@ -69,25 +146,17 @@ class Command(BaseCommand):
 
         sid = transaction.savepoint()
 
-        for layer in ds:
-            for feat in layer:
-                name = feat.get(name_column) if name_column in layer.fields else ''
-                comment_final_tab = []
-                if comments_columns:
-                    for comment_column in comments_columns:
-                        if comment_column in layer.fields:
-                            comment_final_tab.append(feat.get(comment_column))
-                geom = feat.geom.geos
-                if not isinstance(geom, LineString):
-                    if verbosity > 0:
-                        self.stdout.write("%s's geometry is not a Linestring" % feat)
-                    break
-                self.check_srid(srid, geom)
-                geom.dim = 2
+        if bulk:
+            with transaction.atomic():
+                counter, counter_fail = self.load_bulk(ds, structure, name_column, comments_columns, srid,
+                                                       do_intersect, fail, verbosity)
+                if dry:
+                    transaction.set_rollback(True)
+        else:
+            for name, comment_final, geom in self.read_features(ds, name_column, comments_columns, srid, verbosity):
                 if do_intersect and bbox.intersects(geom) or not do_intersect and geom.within(bbox):
                     try:
                         with transaction.atomic():
-                            comment_final = '</br>'.join(comment_final_tab)
                             path = Path.objects.create(name=name,
                                                        structure=structure,
                                                        geom=geom,
@@ -113,6 +182,101 @@ class Command(BaseCommand):
             self.stdout.write(self.style.NOTICE(
                 "{0} objects will be create, {1} objects failed;".format(counter, counter_fail)))
 
+    def read_features(self, ds, name_column, comments_columns, srid, verbosity):
+        for layer in ds:
+            for feat in layer:
+                name = feat.get(name_column) if name_column in layer.fields else ''
+                comment_final_tab = []
+                if comments_columns:
+                    for comment_column in comments_columns:
+                        if comment_column in layer.fields:
+                            comment_final_tab.append(feat.get(comment_column))
+                geom = feat.geom.geos
+                if not isinstance(geom, LineString):
+                    if verbosity > 0:
+                        self.stdout.write("%s's geometry is not a Linestring" % feat)
+                    break
+                self.check_srid(srid, geom)
+                geom.dim = 2
+                yield name, '</br>'.join(comment_final_tab), geom
+
+    def load_bulk(self, ds, structure, name_column, comments_columns, srid, do_intersect, fail, verbosity):
+        """
+        Copy all features into a staging table, and create paths with set-based
+        queries instead of one insert (and its triggers cascade) per feature.
+        """
+        cursor = connection.cursor()
+        cursor.execute("CREATE TEMPORARY TABLE loadpaths_staging ("
+                       " id serial PRIMARY KEY, nom varchar(250), remarques text, geom geometry)")
+        data = StringIO()
+        writer = csv.writer(data)
+        for name, comment_final, geom in self.read_features(ds, name_column, comments_columns, srid, verbosity):
+            writer.writerow([name, comment_final, geom.hexewkb.decode()])
+        data.seek(0)
+        cursor.copy_expert("COPY loadpaths_staging (nom, remarques, geom) FROM STDIN WITH CSV", data)
+
+        # Spatial extent
+        predicate = 'ST_Intersects' if do_intersect else 'ST_Within'
+        cursor.execute("DELETE FROM loadpaths_staging"
+                       " WHERE NOT {}(geom, ST_MakeEnvelope(%s, %s, %s, %s, %s))".format(predicate),
+                       list(settings.SPATIAL_EXTENT) + [settings.SRID])
+        path_srid = Path._meta.get_field('geom').srid
+        if path_srid != settings.SRID:
+            cursor.execute("UPDATE loadpaths_staging SET geom = ST_Transform(geom, %s)", [path_srid])
+        cursor.execute("CREATE INDEX loadpaths_staging_geom_idx ON loadpaths_staging USING gist(geom)")
+        cursor.execute("ANALYZE loadpaths_staging")
+
+        counter_fail = self.reject_invalid(cursor, fail)
+        cursor.execute(BULK_SNAP_SQL, {'distance': settings.PATH_SNAPPING_DISTANCE})
+        # Snapping may have collapsed some geometries
+        counter_fail += self.reject_invalid(cursor, fail)
+
+        # Snapping, draping and zoning triggers are skipped during the insert
+        # (see troncons_bulk_load()) and replaced by set-based queries.
+        # Split trigger is kept: it cuts existing paths crossed by new ones.
+        cursor.execute("CREATE TEMPORARY TABLE loadpaths_crossed AS"
+                       " SELECT t.id, t.geom FROM l_t_troncon t WHERE NOT t.brouillon AND EXISTS ("
+                       " SELECT 1 FROM loadpaths_staging s WHERE ST_Intersects(t.geom, s.geom))")
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM l_t_troncon")
+        last_id = cursor.fetchone()[0]
+        cursor.execute("SELECT set_config('geotrek.bulk_load_paths', 'on', true)")
+        cursor.execute(BULK_INSERT_SQL, {'structure': structure.pk})
+        created = [row[0] for row in cursor.fetchall()]
+        cursor.execute("SELECT set_config('geotrek.bulk_load_paths', 'off', true)")
+
+        # New paths, pieces of existing paths cut by split trigger, and existing paths shortened
+        cursor.execute("SELECT id FROM l_t_troncon WHERE id > %s"
+                       " UNION SELECT c.id FROM loadpaths_crossed c JOIN l_t_troncon t USING (id)"
+                       " WHERE NOT ST_Equals(c.geom, t.geom)", [last_id])
+        changed = [row[0] for row in cursor.fetchall()]
+        cursor.execute("SELECT elevation_troncons(%s)", [changed])
+        # Split trigger rebuilt linear topologies of changed paths before their elevation was computed
+        cursor.execute("SELECT update_geometry_of_evenement(e.id) FROM ("
+                       " SELECT DISTINCT et.evenement AS id FROM e_r_evenement_troncon et"
+                       " WHERE et.troncon = ANY(%s) AND et.pk_debut != et.pk_fin) e", [changed])
+        cursor.execute("SELECT lien_auto_troncons_couches_sig(%s)", [changed])
+
+        cursor.execute("DROP TABLE loadpaths_staging, loadpaths_crossed")
+        if verbosity > 0:
+            for pk in created:
+                self.stdout.write('Create path with pk : {}'.format(pk))
+            # Whole batch checked at once, instead of one check per path
+            for pk, other, duplicate in PathHelper.overlaps(created):
+                message = 'Path {} is a duplicate of path {}' if duplicate else 'Path {} overlaps path {}'
+                self.stdout.write(self.style.WARNING(message.format(pk, other)))
+        return len(created), counter_fail
+
+    def reject_invalid(self, cursor, fail):
+        cursor.execute("DELETE FROM loadpaths_staging"
+                       " WHERE NOT ST_IsValid(geom) OR NOT ST_IsSimple(geom) OR ST_Length(geom) = 0"
+                       " RETURNING nom, ST_AsText(geom)")
+        invalid = cursor.fetchall()
+        if invalid and not fail:
+            raise CommandError('Invalid geometry on path : {}, {}'.format(*invalid[0]))
+        for name, wkt in invalid:
+            self.stdout.write('Integrity Error on path : {}, {}'.format(name, wkt))
+        return len(invalid)
+
     def check_srid(self, srid, geom):
         if not geom.srid:
             geom.srid = srid
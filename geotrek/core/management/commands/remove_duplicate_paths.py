@@ -1,7 +1,8 @@
 from django.core.management.base import BaseCommand
-from django.db import connection, transaction
+from django.db import transaction
 
-from geotrek.core.models import Path
+from geotrek.core.helpers import PathHelper
+from geotrek.core.models import Path, PathAggregation
 
 
 class Command(BaseCommand):
@@ -10,33 +11,26 @@ class Command(BaseCommand):
 
     def handle(self, *args, **options):
         verbosity = options['verbosity']
-        cursor = connection.cursor()
-        query = """with relations as (SELECT t1.id as t1_id,
-                                             t2.id as t2_id
-                                      FROM l_t_troncon t1
-                                      JOIN l_t_troncon t2 ON t1.id < t2.id AND ST_OrderingEquals(t1.geom, t2.geom)
-                                      ORDER BY t1.id, t2.id)
-                      SELECT * FROM relations WHERE t1_id NOT IN (SELECT t2_id FROM relations) """
-        cursor.execute(query)
-        list_topologies = cursor.fetchall()
+        groups = PathHelper.duplicates()
+        visible = dict(Path.include_invisible.filter(pk__in=[pk for group in groups for pk in group])
+                                             .values_list('pk', 'visible'))
 
         path_deleted = []
 
         with transaction.atomic():
             try:
-                for path1_pk, path2_pk in list_topologies:
-                    path1 = Path.include_invisible.get(pk=path1_pk)
-                    path2 = Path.include_invisible.get(pk=path2_pk)
-                    if not path1.visible and path2.visible:
-                        path1.aggregations.update(path_id=path2_pk)
-                        path1.delete()
-                        path_deleted.append(path1)
-                    else:
-                        path2.aggregations.update(path_id=path1_pk)
-                        path2.delete()
-                        path_deleted.append(path2)
-                    if verbosity > 1:
-                        self.stdout.write("Deleting path %s" % path_deleted[-1])
+                removed = []
+                for group in groups:
+                    # Keep the first visible path, topologies are moved on it
+                    kept = next((pk for pk in group if visible[pk]), group[0])
+                    duplicates = [pk for pk in group if pk != kept]
+                    PathAggregation.objects.filter(path__in=duplicates).update(path=kept)
+                    removed.extend(duplicates)
+                path_deleted = list(Path.include_invisible.filter(pk__in=removed).order_by('pk'))
+                if verbosity > 1:
+                    for path in path_deleted:
+                        self.stdout.write("Deleting path %s" % path)
+                Path.include_invisible.filter(pk__in=removed).delete()
 
             except Exception as exc:
                 self.stdout.write(self.style.ERROR("{}".format(exc)))
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_auto_20191210_0840'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='path',
+            name='geom_hash',
+            field=models.CharField(db_column='empreinte', editable=False, max_length=32, null=True),
+        ),
+    ]
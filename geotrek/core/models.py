@@ -91,6 +91,8 @@ class Path(AddPropertyMixin, MapEntityMixin, AltimetryMixin,
                                       verbose_name=_("Networks"), db_table="l_r_troncon_reseau")
     eid = models.CharField(verbose_name=_("External id"), max_length=1024, blank=True, null=True, db_column='id_externe')
     draft = models.BooleanField(db_column='brouillon', default=False, verbose_name=_("Draft"), db_index=True)
+    # Digest of the geometry, computed by triggers (see PathHelper.duplicates())
+    geom_hash = models.CharField(max_length=32, null=True, editable=False, db_column='empreinte')
 
     objects = PathManager()
     include_invisible = PathInvisibleManager()
@@ -181,6 +183,7 @@ class Path(AddPropertyMixin, MapEntityMixin, AltimetryMixin,
         if self.pk and self.visible:
             fromdb = self.__class__.objects.get(pk=self.pk)
             self.geom = fromdb.geom
+            self.geom_hash = fromdb.geom_hash
             AltimetryMixin.reload(self, fromdb)
             TimeStampedModelMixin.reload(self, fromdb)
         return self
@@ -189,10 +192,11 @@ class Path(AddPropertyMixin, MapEntityMixin, AltimetryMixin,
     def save(self, *args, **kwargs):
         # If the path was reversed, we have to invert related topologies
         if self.is_reversed:
-            for aggr in self.aggregations.all():
-                aggr.start_position = 1 - aggr.start_position
-                aggr.end_position = 1 - aggr.end_position
-                aggr.save()
+            with TopologyHelper.deferred_geometry():
+                for aggr in self.aggregations.all():
+                    aggr.start_position = 1 - aggr.start_position
+                    aggr.end_position = 1 - aggr.end_position
+                    aggr.save()
             self._is_reversed = False
         super(Path, self).save(*args, **kwargs)
         self.reload()
@@ -325,13 +329,20 @@ class Path(AddPropertyMixin, MapEntityMixin, AltimetryMixin,
         return self.geom.transform(settings.API_SRID, clone=True).extent if self.geom else None
 
 
+class TopologyManager(models.GeoManager):
+    def recompute(self, pks):
+        """Rebuild geometry of the specified topologies, once each.
+        """
+        TopologyHelper.recompute(pks)
+
+
 class Topology(AddPropertyMixin, AltimetryMixin, TimeStampedModelMixin, NoDeleteMixin):
     paths = models.ManyToManyField(Path, db_column='troncons', through='PathAggregation', verbose_name=_("Path"))
     offset = models.FloatField(default=0.0, db_column='decallage', verbose_name=_("Offset"))  # in SRID units
     kind = models.CharField(editable=False, verbose_name=_("Kind"), max_length=32)
 
     # Override default manager
-    objects = NoDeleteMixin.get_manager_cls(models.GeoManager)()
+    objects = NoDeleteMixin.get_manager_cls(TopologyManager)()
 
     geom = models.GeometryField(editable=(not settings.TREKKING_TOPOLOGY_ENABLED),
                                 srid=settings.SRID, null=True,
@@ -381,6 +392,10 @@ class Topology(AddPropertyMixin, AltimetryMixin, TimeStampedModelMixin, NoDelete
     def add_path(self, path, start=0.0, end=1.0, order=0, reload=True):
         """
         Shortcut function to add paths into this topology.
+
+        When adding several paths, call it with ``reload=False`` inside
+        ``TopologyHelper.deferred_geometry()``, so that geometry is computed
+        only once.
         """
         from .factories import PathAggregationFactory
         aggr = PathAggregationFactory.create(topo_object=self,
@@ -419,13 +434,14 @@ class Topology(AddPropertyMixin, AltimetryMixin, TimeStampedModelMixin, NoDelete
         self.save(update_fields=['deleted', 'geom'])
 
         # Now copy all agregations from other to self
-        aggrs = other.aggregations.all()
+        aggrs = other.aggregations.select_related('path')
         # A point has only one aggregation, except if it is on an intersection.
         # In this case, the trigger will create them, so ignore them here.
         if other.ispoint():
             aggrs = aggrs[:1]
-        for aggr in aggrs:
-            self.add_path(aggr.path, aggr.start_position, aggr.end_position, aggr.order, reload=False)
+        with TopologyHelper.deferred_geometry():
+            for aggr in aggrs:
+                self.add_path(aggr.path, aggr.start_position, aggr.end_position, aggr.order, reload=False)
         self.reload()
         if delete:
             other.delete(force=True)  # Really delete it from database
@@ -0,0 +1,200 @@
+import heapq
+import json
+import math
+from array import array
+
+from django.conf import settings
+from django.contrib.gis.geos import Point
+
+from . import graph as graph_lib
+
+
+class NoRoute(Exception):
+    pass
+
+
+class Router(object):
+    """
+    Shortest path computation over the paths network.
+
+    The graph of ``graph_lib.PathGraph`` is stored in arrays (compressed
+    adjacency: neighbours of node ``n`` are between ``offsets[n]`` and
+    ``offsets[n + 1]``), with the same node ids. Weights are paths lengths,
+    and A* uses euclidean distance between nodes as heuristic.
+    """
+    _instance = None
+
+    def __init__(self, graph):
+        self.version = graph.version
+        self.latest = graph.latest
+        size = max(graph.node_ids.values() or [0]) + 1
+
+        # Node coordinates (for heuristic)
+        self.xs = array('d', [0.0]) * size
+        self.ys = array('d', [0.0]) * size
+        for (x, y), node_id in graph.node_ids.items():
+            self.xs[node_id] = x
+            self.ys[node_id] = y
+
+        # Edges extremities and lengths, by path id
+        self.edges = {pk: (edge['nodes_id'][0], edge['nodes_id'][1], edge['length'])
+                      for pk, edge in graph.edges.items()}
+
+        # Compressed adjacency, both directions
+        degrees = [0] * (size + 1)
+        for start, end, length in self.edges.values():
+            degrees[start + 1] += 1
+            degrees[end + 1] += 1
+        for i in range(size):
+            degrees[i + 1] += degrees[i]
+        self.offsets = array('l', degrees)
+        self.targets = array('l', [0]) * degrees[-1]
+        self.paths = array('l', [0]) * degrees[-1]
+        self.weights = array('d', [0.0]) * degrees[-1]
+        fill = list(degrees)
+        for pk, (start, end, length) in self.edges.items():
+            for source, target in ((start, end), (end, start)):
+                i = fill[source]
+                self.targets[i] = target
+                self.paths[i] = pk
+                self.weights[i] = length
+                fill[source] += 1
+
+    @classmethod
+    def get(cls):
+        """
+        Return a router up to date with ``Path.latest_updated()``.
+        """
+        from .models import Path
+        latest = Path.latest_updated()
+        router = cls._instance
+        if router is None or latest is None or router.latest is None or router.latest < latest:
+            graph = graph_lib.PathGraph.load(latest)
+            if router is None or router.version != graph.version:
+                router = cls(graph)
+            router.latest = latest
+            cls._instance = router
+        return router
+
+    def _heuristic(self, node, goals):
+        x, y = self.xs[node], self.ys[node]
+        return min(math.hypot(x - self.xs[goal], y - self.ys[goal]) + cost
+                   for goal, cost in goals.items())
+
+    def shortest(self, sources, goals):
+        """
+        A* search from ``sources`` to ``goals`` (``{node: initial cost}`` and
+        ``{node: remaining cost}`` dicts). Returns the total cost, the source
+        and goal nodes, and the list of ``(path id, from node, to node)``
+        traversed.
+        """
+        distances = {}
+        previous = {}
+        queue = []
+        for node, cost in sources.items():
+            distances[node] = cost
+            heapq.heappush(queue, (cost + self._heuristic(node, goals), cost, node))
+        best, goal = float('inf'), None
+        while queue:
+            estimate, cost, node = heapq.heappop(queue)
+            if estimate >= best:
+                break
+            if cost > distances[node]:
+                continue
+            if node in goals and cost + goals[node] < best:
+                best, goal = cost + goals[node], node
+            for i in range(self.offsets[node], self.offsets[node + 1]):
+                target = self.targets[i]
+                new_cost = cost + self.weights[i]
+                if new_cost < distances.get(target, float('inf')):
+                    distances[target] = new_cost
+                    previous[target] = (self.paths[i], node)
+                    heapq.heappush(queue, (new_cost + self._heuristic(target, goals), new_cost, target))
+        if goal is None:
+            raise NoRoute()
+        steps = []
+        node = goal
+        # Walk back until a source is reached with its initial cost
+        while node not in sources or distances[node] < sources[node]:
+            pk, from_node = previous[node]
+            steps.append((pk, from_node, node))
+            node = from_node
+        steps.reverse()
+        return best, node, goal, steps
+
+    def route(self, start, end):
+        """
+        Compute the sub-topology between two positions on paths, given as
+        ``(path id, position)`` tuples. Returns a dict in the form expected
+        by ``TopologyHelper.deserialize()``.
+        """
+        start_pk, start_position = start
+        end_pk, end_position = end
+        try:
+            start_first, start_last, start_length = self.edges[start_pk]
+            end_first, end_last, end_length = self.edges[end_pk]
+        except KeyError:
+            raise NoRoute()
+
+        # Leave the first path by one of its extremities, and enter the
+        # last one by one of its extremities.
+        leave = {start_first: (start_position * start_length, 0.0)}
+        if start_last not in leave or (1 - start_position) * start_length < leave[start_last][0]:
+            leave[start_last] = ((1 - start_position) * start_length, 1.0)
+        enter = {end_first: (end_position * end_length, 0.0)}
+        if end_last not in enter or (1 - end_position) * end_length < enter[end_last][0]:
+            enter[end_last] = ((1 - end_position) * end_length, 1.0)
+
+        direct = abs(end_position - start_position) * start_length if start_pk == end_pk else None
+        try:
+            cost, source, goal, steps = self.shortest({node: cost for node, (cost, pos) in leave.items()},
+                                                      {node: cost for node, (cost, pos) in enter.items()})
+        except NoRoute:
+            if direct is None:
+                raise
+            cost = float('inf')
+        if direct is not None and direct <= cost:
+            return {'offset': 0, 'paths': [start_pk], 'positions': {'0': [start_position, end_position]}}
+
+        paths = [start_pk]
+        positions = [[start_position, leave[source][1]]]
+        for pk, from_node, to_node in steps:
+            paths.append(pk)
+            positions.append([0.0, 1.0] if self.edges[pk][0] == from_node else [1.0, 0.0])
+        paths.append(end_pk)
+        positions.append([enter[goal][1], end_position])
+
+        # Remove empty portions of first and last paths (step on a node)
+        if positions[0][0] == positions[0][1]:
+            paths, positions = paths[1:], positions[1:]
+        if len(paths) > 1 and positions[-1][0] == positions[-1][1]:
+            paths, positions = paths[:-1], positions[:-1]
+        return {
+            'offset': 0,
+            'paths': paths,
+            'positions': {str(i): position for i, position in enumerate(positions)},
+        }
+
+    def serialize(self, steps):
+        """
+        Compute the topology passing through all ``steps`` (list of
+        ``(path id, position)`` tuples).
+        """
+        if len(steps) < 2:
+            raise ValueError("At least two steps are required")
+        return json.dumps([self.route(start, end) for start, end in zip(steps[:-1], steps[1:])])
+
+
+def step_of_dict(step):
+    """
+    Return ``(path id, position)`` from ``{"path": pk, "position": float}``
+    or ``{"lat": float, "lng": float}`` (snapped to the closest path).
+    """
+    from .models import Path
+    if 'path' in step:
+        return int(step['path']), float(step.get('position', 0.0))
+    point = Point(float(step['lng']), float(step['lat']), srid=settings.API_SRID)
+    point.transform(settings.SRID)
+    closest = Path.closest(point)
+    position, offset = closest.interpolate(point)
+    return closest.pk, position
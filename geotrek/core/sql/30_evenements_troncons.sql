@@ -43,12 +43,49 @@ $$ LANGUAGE plpgsql;
 -- Compute geometry of Evenements
 -------------------------------------------------------------------------------
 
+-- Evenements whose aggregations were touched are queued per transaction, so
+-- that each topology is rebuilt only once, whatever the number of
+-- e_r_evenement_troncon rows written by the statement (or the transaction,
+-- in deferred mode).
+CREATE TABLE IF NOT EXISTS geotrek.e_t_evenement_recalcul (
+    evenement integer NOT NULL,
+    transaction bigint NOT NULL DEFAULT txid_current(),
+    differe boolean NOT NULL DEFAULT false,
+    PRIMARY KEY (transaction, evenement)
+);
+
 DROP TRIGGER IF EXISTS e_r_evenement_troncon_geometry_tgr ON e_r_evenement_troncon;
+DROP TRIGGER IF EXISTS e_r_evenement_troncon_geometry_s_tgr ON e_r_evenement_troncon;
+DROP TRIGGER IF EXISTS e_t_evenement_recalcul_commit_tgr ON e_t_evenement_recalcul;
 
-CREATE OR REPLACE FUNCTION geotrek.ft_evenements_troncons_geometry() RETURNS trigger SECURITY DEFINER AS $$
+CREATE OR REPLACE FUNCTION geotrek.ft_evenements_geometry_deferred() RETURNS boolean AS $$
+BEGIN
+    -- Set with SET LOCAL geotrek.defer_evenement_geometry = 'on'
+    -- (see TopologyHelper.deferred_geometry())
+    RETURN current_setting('geotrek.defer_evenement_geometry') = 'on';
+EXCEPTION
+    WHEN undefined_object THEN
+        RETURN false;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+CREATE OR REPLACE FUNCTION geotrek.ft_evenements_geometry_flush() RETURNS void AS $$
 DECLARE
     eid integer;
+BEGIN
+    FOR eid IN DELETE FROM e_t_evenement_recalcul
+               WHERE transaction = txid_current()
+               RETURNING evenement
+    LOOP
+        PERFORM update_geometry_of_evenement(eid);
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION geotrek.ft_evenements_troncons_geometry() RETURNS trigger SECURITY DEFINER AS $$
+DECLARE
     eids integer[];
+    deferred boolean;
 BEGIN
     IF TG_OP = 'INSERT' THEN
         eids := array_append(eids, NEW.evenement);
@@ -61,9 +98,29 @@ BEGIN
         END IF;
     END IF;
 
-    FOREACH eid IN ARRAY eids LOOP
-        PERFORM update_geometry_of_evenement(eid);
-    END LOOP;
+    deferred := ft_evenements_geometry_deferred();
+
+    -- Geometry is computed by ft_evenements_troncons_geometry_flush()
+    -- at the end of the statement, or at commit in deferred mode.
+    INSERT INTO e_t_evenement_recalcul (evenement, differe)
+    SELECT DISTINCT eid, deferred
+    FROM unnest(eids) AS eid
+    WHERE NOT EXISTS (
+        SELECT * FROM e_t_evenement_recalcul
+        WHERE transaction = txid_current() AND evenement = eid
+    );
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION geotrek.ft_evenements_troncons_geometry_flush() RETURNS trigger SECURITY DEFINER AS $$
+BEGIN
+    IF TG_LEVEL = 'STATEMENT' AND ft_evenements_geometry_deferred() THEN
+        RETURN NULL;
+    END IF;
+
+    PERFORM ft_evenements_geometry_flush();
 
     RETURN NULL;
 END;
@@ -73,6 +130,19 @@ CREATE TRIGGER e_r_evenement_troncon_geometry_tgr
 AFTER INSERT OR UPDATE OR DELETE ON e_r_evenement_troncon
 FOR EACH ROW EXECUTE PROCEDURE ft_evenements_troncons_geometry();
 
+CREATE TRIGGER e_r_evenement_troncon_geometry_s_tgr
+AFTER INSERT OR UPDATE OR DELETE ON e_r_evenement_troncon
+FOR EACH STATEMENT EXECUTE PROCEDURE ft_evenements_troncons_geometry_flush();
+
+-- Safety net for deferred mode: whatever was not flushed explicitly is
+-- computed at commit. The first call empties the queue of the transaction,
+-- the following ones are no-ops.
+CREATE CONSTRAINT TRIGGER e_t_evenement_recalcul_commit_tgr
+AFTER INSERT ON e_t_evenement_recalcul
+DEFERRABLE INITIALLY DEFERRED
+FOR EACH ROW WHEN (NEW.differe)
+EXECUTE PROCEDURE ft_evenements_troncons_geometry_flush();
+
 
 -------------------------------------------------------------------------------
 -- Emulate junction points
@@ -36,6 +36,9 @@ CREATE INDEX l_t_troncon_geom_cadastre_idx ON l_t_troncon USING gist(geom_cadast
 DROP INDEX IF EXISTS l_t_troncon_geom_3d_idx;
 CREATE INDEX l_t_troncon_geom_3d_idx ON l_t_troncon USING gist(geom_3d);
 
+DROP INDEX IF EXISTS l_t_troncon_empreinte_idx;
+CREATE INDEX l_t_troncon_empreinte_idx ON l_t_troncon(empreinte);
+
 -------------------------------------------------------------------------------
 -- Keep dates up-to-date
 -------------------------------------------------------------------------------
@@ -68,6 +71,7 @@ BEGIN
     SELECT COUNT(*) INTO t_count
     FROM l_t_troncon
     WHERE pid != id
+      AND ST_Intersects(geom, line)
       AND ST_GeometryType(ST_intersection(geom, line)) IN ('ST_LineString', 'ST_MultiLineString');
       -- not extremity touching
       -- AND ST_Touches(geom, line) = false
@@ -81,6 +85,68 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
+-- Same check for a set of paths (all paths if NULL): pairs of overlapping
+-- paths, flagged as duplicates if they have the same geometry.
+CREATE OR REPLACE FUNCTION geotrek.troncons_chevauchements(troncons integer[])
+RETURNS TABLE (troncon integer, autre integer, doublon boolean) AS $$
+    SELECT t.id, o.id, t.empreinte = o.empreinte
+    FROM l_t_troncon t
+    JOIN l_t_troncon o ON o.id != t.id AND ST_Intersects(o.geom, t.geom)
+    WHERE (troncons IS NULL OR t.id = ANY(troncons))
+      -- Each pair once
+      AND (t.id < o.id OR NOT (troncons IS NULL OR o.id = ANY(troncons)))
+      AND (t.empreinte = o.empreinte
+           OR ST_GeometryType(ST_Intersection(o.geom, t.geom)) IN ('ST_LineString', 'ST_MultiLineString'))
+    ORDER BY t.id, o.id;
+$$ LANGUAGE sql STABLE;
+
+
+-------------------------------------------------------------------------------
+-- Geometry hash, to find duplicate paths without comparing geometries
+-------------------------------------------------------------------------------
+
+DROP TRIGGER IF EXISTS l_t_troncon_20_empreinte_iu_tgr ON l_t_troncon;
+
+-- Digest of the 2D WKB in a fixed byte order: same vertices in the same
+-- order, as ST_OrderingEquals()
+CREATE OR REPLACE FUNCTION geotrek.troncon_empreinte(line geometry) RETURNS varchar AS $$
+    SELECT md5(ST_AsBinary(ST_Force2D(line), 'NDR'));
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION geotrek.empreinte_troncon_iu() RETURNS trigger SECURITY DEFINER AS $$
+BEGIN
+    -- After snapping (geometry is final)
+    NEW.empreinte := troncon_empreinte(NEW.geom);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER l_t_troncon_20_empreinte_iu_tgr
+BEFORE INSERT OR UPDATE OF geom ON l_t_troncon
+FOR EACH ROW EXECUTE PROCEDURE empreinte_troncon_iu();
+
+-- Groups of paths with the same geometry, one of them at least in troncons
+-- (all paths if NULL)
+CREATE OR REPLACE FUNCTION geotrek.troncons_doublons(troncons integer[]) RETURNS SETOF integer[] AS $$
+    SELECT array_agg(id ORDER BY id)
+    FROM l_t_troncon
+    WHERE empreinte IN (SELECT empreinte FROM l_t_troncon WHERE troncons IS NULL OR id = ANY(troncons))
+    GROUP BY empreinte
+    HAVING COUNT(*) > 1
+    ORDER BY MIN(id);
+$$ LANGUAGE sql STABLE;
+
+-- Paths created before the hash column (without touching their date_update)
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM l_t_troncon WHERE empreinte IS NULL) THEN
+        ALTER TABLE l_t_troncon DISABLE TRIGGER l_t_troncon_date_update_tgr;
+        UPDATE l_t_troncon SET empreinte = troncon_empreinte(geom) WHERE empreinte IS NULL;
+        ALTER TABLE l_t_troncon ENABLE TRIGGER l_t_troncon_date_update_tgr;
+    END IF;
+END;
+$$;
+
 
 -------------------------------------------------------------------------------
 -- Update geometry of related topologies
@@ -148,10 +214,26 @@ ALTER TABLE l_t_troncon ADD CONSTRAINT l_t_troncon_geom_issimple CHECK (ST_IsSim
 DROP TRIGGER IF EXISTS l_t_troncon_elevation_iu_tgr ON l_t_troncon;
 DROP TRIGGER IF EXISTS l_t_troncon_10_elevation_iu_tgr ON l_t_troncon;
 
+CREATE OR REPLACE FUNCTION geotrek.troncons_bulk_load() RETURNS boolean AS $$
+BEGIN
+    -- Set with SET LOCAL geotrek.bulk_load_paths = 'on'
+    -- (see loadpaths command): snapping, draping and zoning of paths are
+    -- done afterwards with set-based queries
+    RETURN current_setting('geotrek.bulk_load_paths') = 'on';
+EXCEPTION
+    WHEN undefined_object THEN
+        RETURN false;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
 CREATE OR REPLACE FUNCTION geotrek.elevation_troncon_iu() RETURNS trigger SECURITY DEFINER AS $$
 DECLARE
     elevation elevation_infos;
 BEGIN
+    -- Computed at once by elevation_troncons()
+    IF troncons_bulk_load() THEN
+        RETURN NEW;
+    END IF;
 
     SELECT * FROM ft_elevation_infos(NEW.geom, {{ALTIMETRIC_PROFILE_STEP}}) INTO elevation;
     -- Update path geometry
@@ -170,6 +252,23 @@ CREATE TRIGGER l_t_troncon_10_elevation_iu_tgr
 BEFORE INSERT OR UPDATE OF geom ON l_t_troncon
 FOR EACH ROW EXECUTE PROCEDURE elevation_troncon_iu();
 
+-- Same computation for a set of paths at once (used by bulk loading, with
+-- the row trigger skipped)
+CREATE OR REPLACE FUNCTION geotrek.elevation_troncons(troncons integer[]) RETURNS void SECURITY DEFINER AS $$
+BEGIN
+    UPDATE l_t_troncon t
+    SET geom_3d = e.draped,
+        longueur = ST_3DLength(e.draped),
+        pente = e.slope,
+        altitude_minimum = e.min_elevation,
+        altitude_maximum = e.max_elevation,
+        denivelee_positive = e.positive_gain,
+        denivelee_negative = e.negative_gain
+    FROM l_t_troncon src, LATERAL ft_elevation_infos(src.geom, {{ALTIMETRIC_PROFILE_STEP}}) AS e
+    WHERE src.id = ANY(troncons) AND t.id = src.id;
+END;
+$$ LANGUAGE plpgsql;
+
 
 -------------------------------------------------------------------------------
 -- Change status of related objects when paths are deleted
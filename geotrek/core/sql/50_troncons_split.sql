@@ -12,6 +12,11 @@ DECLARE
 
     DISTANCE float8;
 BEGIN
+    -- Snapped at once by loadpaths command
+    IF troncons_bulk_load() THEN
+        RETURN NEW;
+    END IF;
+
     DISTANCE := {{PATH_SNAPPING_DISTANCE}};
 
     linestart := ST_StartPoint(NEW.geom);
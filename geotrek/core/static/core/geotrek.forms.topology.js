@@ -125,9 +125,22 @@ MapEntity.GeometryField.TopologyField = MapEntity.GeometryField.extend({
         }
 
         // Path layer is ready, load graph !
+        // If a previous version is stored locally, only download changes.
         this._pathsLayer.fire('data:loading');
         var url = window.SETTINGS.urls.path_graph;
-        $.getJSON(url, this._onGraphLoaded.bind(this))
+        var stored = this._loadStoredGraph();
+        $.getJSON(url, stored ? {since: stored.version} : {}, function (data, textStatus, jqXHR) {
+            var version = jqXHR.getResponseHeader('X-Graph-Version');
+            var graph = data;
+            if (stored && data.removed !== undefined) {
+                graph = this._applyGraphDelta(stored.graph, data);
+            }
+            else if (stored && jqXHR.status == 304) {
+                graph = stored.graph;
+            }
+            this._storeGraph(graph, version);
+            this._onGraphLoaded(graph);
+        }.bind(this))
          .error(graphError.bind(this));
 
         function graphError(jqXHR, textStatus, errorThrown) {
@@ -138,6 +151,42 @@ MapEntity.GeometryField.TopologyField = MapEntity.GeometryField.extend({
         }
     },
 
+    _loadStoredGraph: function () {
+        try {
+            var stored = JSON.parse(window.localStorage.getItem('path_graph'));
+            return stored && stored.version ? stored : null;
+        }
+        catch (e) {
+            return null;
+        }
+    },
+
+    _storeGraph: function (graph, version) {
+        try {
+            window.localStorage.setItem('path_graph', JSON.stringify({version: version, graph: graph}));
+        }
+        catch (e) {
+            // Quota exceeded: graph will be fully downloaded next time
+            window.localStorage.removeItem('path_graph');
+        }
+    },
+
+    _applyGraphDelta: function (graph, delta) {
+        $.each(delta.removed, function (i, edge_id) {
+            delete graph.edges[edge_id];
+        });
+        $.each(delta.edges, function (edge_id, edge) {
+            graph.edges[edge_id] = edge;
+        });
+        $.each(delta.nodes, function (node_id, node) {
+            if ($.isEmptyObject(node))
+                delete graph.nodes[node_id];
+            else
+                graph.nodes[node_id] = node;
+        });
+        return graph;
+    },
+
     _onGraphLoaded: function (graph) {
         // Load graph
         this._lineControl.setGraph(graph);
@@ -2,15 +2,17 @@ from io import StringIO
 from unittest import skipIf
 
 from django.conf import settings
-from django.contrib.gis.geos import LineString
+from django.contrib.gis.geos import LineString, MultiPolygon, Polygon
 from django.core.management import call_command
 from django.core.management.base import CommandError
 from django.test import TestCase, override_settings
 from django.db import IntegrityError
 
 from geotrek.authent.models import Structure
+from geotrek.core.factories import TopologyFactory
 from geotrek.core.models import Path
 from geotrek.trekking.factories import POIFactory
+from geotrek.zoning.factories import CityFactory
 import os
 
 
@@ -210,3 +212,63 @@ class LoadPathsCommandTest(TestCase):
         output = StringIO()
         with self.assertRaises(IntegrityError):
             call_command('loadpaths', filename, '-i', verbosity=2, stdout=output)
+
+    @override_settings(SRID=4326, SPATIAL_EXTENT=(-1, 0, 4, 2))
+    def test_load_paths_bulk(self):
+        output = StringIO()
+        call_command('loadpaths', self.filename, '-i', bulk=True, verbosity=2, stdout=output)
+        self.assertIn('2 objects created, 0 objects failed', output.getvalue())
+        self.assertEqual(Path.objects.count(), 2)
+        path = Path.objects.get(name='lulu')
+        self.assertEqual(path.structure, self.structure)
+        self.assertIsNotNone(path.geom_3d)
+
+    @override_settings(SRID=4326, SPATIAL_EXTENT=(-1, 0, 4, 2))
+    def test_load_paths_bulk_fail_with_dry(self):
+        filename = os.path.join(os.path.dirname(__file__), 'data', 'bad_path.geojson')
+        output = StringIO()
+        call_command('loadpaths', filename, '-i', bulk=True, dry=True, verbosity=2, stdout=output)
+        self.assertIn('0 objects will be create, 1 objects failed;', output.getvalue())
+        self.assertEqual(Path.objects.count(), 0)
+
+    @override_settings(SPATIAL_EXTENT=(-100, -100, 100, 100))
+    def test_load_paths_bulk_split_and_snap(self):
+        filename = os.path.join(os.path.dirname(__file__), 'data', 'paths_crossing.geojson')
+        existing = Path.objects.create(name='existing', structure=self.structure,
+                                       geom=LineString((0, 15), (20, 15)))
+        city = CityFactory(geom=MultiPolygon(Polygon.from_bbox((-50, -50, 50, 50)), srid=settings.SRID))
+        output = StringIO()
+        call_command('loadpaths', filename, bulk=True, srid=settings.SRID, verbosity=2, stdout=output)
+        # Vertical is split by horizontal and existing, horizontal by vertical
+        self.assertIn('6 objects created, 0 objects failed', output.getvalue())
+        self.assertEqual(Path.objects.filter(name='vertical').count(), 3)
+        self.assertEqual(Path.objects.filter(name='horizontal').count(), 2)
+        # Existing path is split by split trigger
+        self.assertEqual(Path.objects.filter(name='existing').count(), 2)
+        existing.reload()
+        self.assertEqual(existing.geom.length, 10)
+        snapped = Path.objects.get(name='snapped')
+        self.assertEqual(snapped.geom.coords[0], (20, 10))
+        self.assertAlmostEqual(snapped.length, 10)
+        for path in Path.objects.all():
+            self.assertEqual(path.cities, [city])
+        # Triggers run again for paths created afterwards
+        path = Path.objects.create(name='after', structure=self.structure,
+                                   geom=LineString((40, 40), (40, 30)))
+        path.reload()
+        self.assertIsNotNone(path.geom_3d)
+        self.assertEqual(path.cities, [city])
+
+    @override_settings(SPATIAL_EXTENT=(-100, -100, 100, 100))
+    def test_load_paths_bulk_split_topology_elevation(self):
+        filename = os.path.join(os.path.dirname(__file__), 'data', 'paths_crossing.geojson')
+        existing = Path.objects.create(name='existing', structure=self.structure,
+                                       geom=LineString((0, 15), (20, 15)))
+        topology = TopologyFactory.create(no_path=True)
+        topology.add_path(existing, start=0, end=1)
+        call_command('loadpaths', filename, bulk=True, srid=settings.SRID, verbosity=0)
+        topology.reload()
+        # Topology now spans both pieces of split path, and is draped on both
+        self.assertEqual(topology.aggregations.count(), 2)
+        self.assertIsNotNone(topology.geom_3d)
+        self.assertAlmostEqual(topology.length, 20)
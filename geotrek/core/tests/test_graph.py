@@ -4,10 +4,11 @@ from django.test import TestCase
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.contrib.gis.geos import LineString
+from django.core.cache import caches
 from django.core.urlresolvers import reverse
 
 from geotrek.core.factories import PathFactory
-from geotrek.core.graph import graph_edges_nodes_of_qs
+from geotrek.core.graph import graph_edges_nodes_of_qs, PathGraph
 from geotrek.core.models import Path
 
 
@@ -19,6 +20,7 @@ class SimpleGraph(TestCase):
         success = self.client.login(username=user.username, password='dooh')
         self.assertTrue(success)
         self.url = reverse('core:path_json_graph')
+        caches['fat'].delete_many([PathGraph.cache_key, PathGraph.json_cache_key])
 
     def test_python_graph_from_path(self):
         p_1_1 = (1., 1.)
@@ -79,3 +81,76 @@ class SimpleGraph(TestCase):
         PathFactory(geom=LineString((0, 0), (1, 1)))
         response = self.client.get(self.url)
         self.assertNotEqual(response['Cache-Control'], None)
+
+    def test_json_graph_delta(self):
+        paths = [PathFactory(geom=LineString((i, 0), (i + 1, 0))) for i in range(8)]
+        response = self.client.get(self.url)
+        version = response['X-Graph-Version']
+        self.assertEqual(len(response.json()['edges']), 8)
+
+        paths[-1].delete()
+        new_path = PathFactory(geom=LineString((1, 0), (1, 1)))
+        response = self.client.get(self.url, {'since': version})
+        self.assertEqual(response.status_code, 200)
+        delta = response.json()
+        self.assertNotEqual(delta['version'], version)
+        self.assertEqual(delta['version'], response['X-Graph-Version'])
+        self.assertEqual(list(delta['edges'].keys()), [str(new_path.pk)])
+        self.assertEqual(delta['removed'], [paths[-1].pk])
+        # Extremities of removed and new paths, (8, 0) does not exist anymore
+        self.assertEqual(len(delta['nodes']), 4)
+        self.assertIn({}, delta['nodes'].values())
+
+    def test_json_graph_serialization_cached(self):
+        PathFactory(geom=LineString((0, 0), (1, 1)))
+        response = self.client.get(self.url)
+        # Served from serialized graph, not from graph
+        caches['fat'].delete(PathGraph.cache_key)
+        cached = self.client.get(self.url)
+        self.assertEqual(cached.content, response.content)
+        self.assertEqual(cached['X-Graph-Version'], response['X-Graph-Version'])
+        path = PathFactory(geom=LineString((1, 1), (2, 2)))
+        response = self.client.get(self.url)
+        self.assertIn(str(path.pk), response.json()['edges'])
+        self.assertNotEqual(response['X-Graph-Version'], cached['X-Graph-Version'])
+
+    def test_json_graph_unknown_version(self):
+        path = PathFactory(geom=LineString((0, 0), (1, 1)))
+        response = self.client.get(self.url, {'since': 'unknown-1'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(str(path.pk), response.json()['edges'])
+        self.assertNotIn('removed', response.json())
+
+
+@skipIf(not settings.TREKKING_TOPOLOGY_ENABLED, 'Test with dynamic segmentation only')
+class IncrementalGraph(TestCase):
+
+    def test_update_moved_path(self):
+        p1 = PathFactory(geom=LineString((0, 0), (1, 0)))
+        p2 = PathFactory(geom=LineString((1, 0), (2, 0)))
+        p3 = PathFactory(geom=LineString((2, 0), (3, 0)))
+        graph = PathGraph()
+        graph.update(Path.latest_updated())
+        self.assertEqual(graph.as_dict(), graph_edges_nodes_of_qs(Path.objects.order_by('pk')))
+        version = graph.version
+
+        p3.geom = LineString((2, 0), (3, 1))
+        p3.save()
+        graph.update(Path.latest_updated())
+        self.assertEqual(graph.edges[p1.pk]['nodes_id'], [1, 2])
+        self.assertEqual(graph.edges[p2.pk]['nodes_id'], [2, 3])
+        self.assertEqual(graph.edges[p3.pk]['nodes_id'], [3, 5])
+        self.assertEqual(graph.nodes[3], {2: p2.pk, 5: p3.pk})
+        self.assertNotIn(4, graph.nodes)
+
+        delta = graph.delta(version)
+        self.assertEqual(list(delta['edges'].keys()), [p3.pk])
+        self.assertEqual(delta['nodes'], {3: {2: p2.pk, 5: p3.pk}, 4: {}, 5: {3: p3.pk}})
+        self.assertEqual(delta['removed'], [])
+
+    def test_update_unchanged(self):
+        PathFactory(geom=LineString((0, 0), (1, 0)))
+        graph = PathGraph()
+        self.assertTrue(graph.update(Path.latest_updated()))
+        self.assertFalse(graph.update(Path.latest_updated()))
+        self.assertEqual(graph.delta(graph.version)['edges'], {})
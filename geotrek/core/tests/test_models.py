@@ -10,6 +10,7 @@ from geotrek.common.utils import dbnow
 from geotrek.authent.factories import StructureFactory, UserFactory
 from geotrek.authent.models import Structure
 from geotrek.core.factories import (ComfortFactory, PathFactory, StakeFactory, TrailFactory)
+from geotrek.core.helpers import PathHelper
 from geotrek.core.models import Path
 
 
@@ -167,6 +168,37 @@ class PathGeometryTest(TestCase):
         p = PathFactory.create(geom=LineString((2.5, 0), (3, 1), (3.5, 0)))
         self.assertFalse(p.is_overlap())
 
+    def test_overlaps_batch(self):
+        PathFactory.create(geom=LineString((0, 0), (60, 0)))
+        p1 = PathFactory.create(geom=LineString((40, 0), (50, 0)))
+        p2 = Path.objects.create(geom=LineString((0, 10), (60, 10)))
+        p3 = Path.objects.create(geom=LineString((0, 10), (60, 10)))
+        p4 = PathFactory.create(geom=LineString((0, 20), (60, 20)))
+        overlaps = PathHelper.overlaps([p1.pk, p3.pk, p4.pk])
+        self.assertTrue(overlaps)
+        self.assertIn((p3.pk, p2.pk, True), overlaps)
+        self.assertEqual({pk for pk, other, duplicate in overlaps}, {p1.pk, p3.pk})
+        # Each pair is reported once
+        self.assertIn((p2.pk, p3.pk, True), PathHelper.overlaps())
+        self.assertNotIn((p3.pk, p2.pk, True), PathHelper.overlaps())
+        self.assertEqual(PathHelper.overlaps([p4.pk]), [])
+
+    def test_geom_hash(self):
+        p1 = Path.objects.create(geom=LineString((0, 0), (1, 0), (2, 0)))
+        p2 = Path.objects.create(geom=LineString((0, 0), (1, 0), (2, 0)))
+        p3 = Path.objects.create(geom=LineString((2, 0), (1, 0), (0, 0)))
+        self.assertIsNotNone(p1.geom_hash)
+        self.assertEqual(p1.geom_hash, p2.geom_hash)
+        # Orientation matters, as with ST_OrderingEquals()
+        self.assertNotEqual(p1.geom_hash, p3.geom_hash)
+        self.assertEqual(PathHelper.duplicates(), [[p1.pk, p2.pk]])
+        self.assertEqual(PathHelper.duplicates([p2.pk]), [[p1.pk, p2.pk]])
+        self.assertEqual(PathHelper.duplicates([p3.pk]), [])
+        p2.geom = LineString((0, 5), (2, 5))
+        p2.save()
+        self.assertNotEqual(p1.geom_hash, p2.geom_hash)
+        self.assertEqual(PathHelper.duplicates(), [])
+
     def test_snapping(self):
         # Sinosoid line
         coords = [(x, math.sin(x)) for x in range(10)]
@@ -0,0 +1,83 @@
+import json
+from unittest import skipIf
+
+from django.test import TestCase
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.gis.geos import LineString
+from django.core.urlresolvers import reverse
+
+from geotrek.core.factories import PathFactory
+from geotrek.core.graph import PathGraph
+from geotrek.core.helpers import TopologyHelper
+from geotrek.core.models import Path
+from geotrek.core.routing import Router, NoRoute
+
+
+@skipIf(not settings.TREKKING_TOPOLOGY_ENABLED, 'Test with dynamic segmentation only')
+class RouterTest(TestCase):
+
+    def setUp(self):
+        #        +---p3---+
+        #        |        |
+        #   +-p1-+---p2---+-p4-+
+        self.p1 = PathFactory(geom=LineString((0, 0), (10, 0)))
+        self.p2 = PathFactory(geom=LineString((10, 0), (30, 0)))
+        self.p3 = PathFactory(geom=LineString((10, 0), (10, 50), (30, 50), (30, 0)))
+        self.p4 = PathFactory(geom=LineString((40, 0), (30, 0)))
+        graph = PathGraph()
+        graph.update(Path.latest_updated())
+        self.router = Router(graph)
+
+    def test_route_shortest(self):
+        route = self.router.route((self.p1.pk, 0.5), (self.p4.pk, 0.5))
+        self.assertEqual(route['paths'], [self.p1.pk, self.p2.pk, self.p4.pk])
+        self.assertEqual(route['positions'], {'0': [0.5, 1.0], '1': [0.0, 1.0], '2': [1.0, 0.5]})
+
+    def test_route_same_path(self):
+        route = self.router.route((self.p2.pk, 0.75), (self.p2.pk, 0.25))
+        self.assertEqual(route['paths'], [self.p2.pk])
+        self.assertEqual(route['positions'], {'0': [0.75, 0.25]})
+
+    def test_route_from_node(self):
+        route = self.router.route((self.p1.pk, 1.0), (self.p4.pk, 1.0))
+        self.assertEqual(route['paths'], [self.p2.pk])
+        self.assertEqual(route['positions'], {'0': [0.0, 1.0]})
+
+    def test_route_unknown_path(self):
+        self.assertRaises(NoRoute, self.router.route, (self.p1.pk, 0.5), (-1, 0.5))
+
+    def test_serialized_route_deserialize(self):
+        serialized = self.router.serialize([(self.p1.pk, 0.5), (self.p3.pk, 0.5), (self.p4.pk, 0.5)])
+        topology = TopologyHelper.deserialize(serialized)
+        self.assertEqual(topology.geom, LineString((5, 0), (10, 0), (10, 50), (20, 50), (30, 50), (30, 0), (35, 0),
+                                                   srid=settings.SRID))
+
+
+@skipIf(not settings.TREKKING_TOPOLOGY_ENABLED, 'Test with dynamic segmentation only')
+class RouteViewTest(TestCase):
+
+    def setUp(self):
+        user = User.objects.create_user('homer', 'h@s.com', 'dooh')
+        self.client.login(username=user.username, password='dooh')
+        self.url = reverse('core:path_json_route')
+
+    def test_route(self):
+        p1 = PathFactory(geom=LineString((0, 0), (10, 0)))
+        p2 = PathFactory(geom=LineString((10, 0), (20, 0)))
+        steps = [{'path': p1.pk, 'position': 0.5}, {'path': p2.pk, 'position': 0.5}]
+        response = self.client.get(self.url, {'steps': json.dumps(steps)})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [{'offset': 0, 'paths': [p1.pk, p2.pk],
+                                            'positions': {'0': [0.5, 1.0], '1': [0.0, 0.5]}}])
+
+    def test_route_invalid_steps(self):
+        response = self.client.get(self.url, {'steps': 'abc'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_no_route(self):
+        p1 = PathFactory(geom=LineString((0, 0), (10, 0)))
+        p2 = PathFactory(geom=LineString((20, 0), (30, 0)))
+        steps = [{'path': p1.pk, 'position': 0.5}, {'path': p2.pk, 'position': 0.5}]
+        response = self.client.get(self.url, {'steps': json.dumps(steps)})
+        self.assertEqual(response.status_code, 404)
@@ -490,6 +490,38 @@ class TopologyLineTest(TestCase):
         t2.save()
         self.assertEqual(t2.geom, t.geom)
 
+    def test_topology_geom_deferred(self):
+        p1 = PathFactory.create(geom=LineString((0, 0), (2, 0)))
+        p2 = PathFactory.create(geom=LineString((2, 0), (4, 0)))
+        t = TopologyFactory.create(no_path=True)
+        with TopologyHelper.deferred_geometry():
+            t.add_path(p1, reload=False)
+            t.add_path(p2, order=1, reload=False)
+            # Not computed yet
+            self.assertEqual(Topology.objects.get(pk=t.pk).geom, Point(0, 0, srid=settings.SRID))
+        t.reload()
+        self.assertEqual(t.geom, LineString((0, 0), (2, 0), (4, 0), srid=settings.SRID))
+
+    def test_topology_geom_bulk_aggregations(self):
+        p1 = PathFactory.create(geom=LineString((0, 0), (2, 0)))
+        p2 = PathFactory.create(geom=LineString((2, 0), (4, 0)))
+        t = TopologyFactory.create(no_path=True)
+        PathAggregation.objects.bulk_create([
+            PathAggregation(topo_object=t, path=p1, start_position=0.5, end_position=1.0, order=0),
+            PathAggregation(topo_object=t, path=p2, start_position=0.0, end_position=1.0, order=1),
+        ])
+        t.reload()
+        self.assertEqual(t.geom, LineString((1, 0), (2, 0), (4, 0), srid=settings.SRID))
+
+    def test_recompute(self):
+        p = PathFactory.create(geom=LineString((0, 0), (4, 0)))
+        t = TopologyFactory.create(no_path=True)
+        t.add_path(p)
+        Topology.objects.filter(pk=t.pk).update(geom=Point(0, 0, srid=settings.SRID))
+        Topology.objects.recompute([t.pk, t.pk])
+        t.reload()
+        self.assertEqual(t.geom, LineString((0, 0), (4, 0), srid=settings.SRID))
+
     def test_troncon_geom_update(self):
         # Create a path
         p = PathFactory.create(geom=LineString((0, 0), (4, 0)))
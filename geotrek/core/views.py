@@ -11,7 +11,6 @@ from django.views.decorators.http import last_modified as cache_last_modified
 from django.views.decorators.cache import cache_control
 from django.views.generic import View, TemplateView
 from django.utils.translation import ugettext as _
-from django.core.cache import caches
 from django.views.generic.detail import BaseDetailView
 from django.http import HttpResponseRedirect
 
@@ -30,6 +29,7 @@ from .models import Path, Trail, Topology
 from .forms import PathForm, TrailForm
 from .filters import PathFilterSet, TrailFilterSet
 from . import graph as graph_lib
+from . import routing
 from django.http.response import HttpResponse, JsonResponse
 from django.contrib import messages
 from django.db.models import Sum
@@ -259,25 +259,42 @@ class PathDelete(MapEntityDelete):
 @cache_control(max_age=0, must_revalidate=True)
 @cache_last_modified(lambda x: Path.latest_updated())
 def get_graph_json(request):
-    cache = caches['fat']
-    key = 'path_graph_json'
-
-    result = cache.get(key)
+    """
+    Return the paths graph. If ``since`` parameter is given with a previous
+    graph version (see ``X-Graph-Version`` header), return only changes
+    since this version when possible.
+    """
     latest = Path.latest_updated()
+    since = request.GET.get('since')
+    delta = None
+    if since:
+        graph = graph_lib.PathGraph.load(latest)
+        delta = graph.delta(since)
+    if delta is None:
+        version, serialized = graph_lib.PathGraph.load_json(latest)
+    else:
+        version, serialized = graph.version, json.dumps(delta)
 
-    if result and latest:
-        cache_latest, json_graph = result
-        # Not empty and still valid
-        if cache_latest and cache_latest >= latest:
-            return HttpJSONResponse(json_graph)
+    response = HttpJSONResponse(serialized)
+    response['X-Graph-Version'] = version
+    return response
 
-    # cache does not exist or is not up to date
-    # rebuild the graph and cache the json
-    graph = graph_lib.graph_edges_nodes_of_qs(Path.objects.exclude(draft=True))
-    json_graph = json.dumps(graph)
 
-    cache.set(key, (latest, json_graph))
-    return HttpJSONResponse(json_graph)
+@login_required
+def get_route_json(request):
+    """
+    Compute the shortest route through the steps given as a JSON list in
+    ``steps`` parameter (see ``routing.step_of_dict()``), and return it as
+    a serialized topology.
+    """
+    try:
+        steps = [routing.step_of_dict(step) for step in json.loads(request.GET.get('steps', ''))]
+        serialized = routing.Router.get().serialize(steps)
+    except (ValueError, KeyError, TypeError, IndexError) as exc:
+        return JsonResponse({'error': '%s' % exc}, status=400)
+    except routing.NoRoute:
+        return JsonResponse({'error': _("No route found")}, status=404)
+    return HttpJSONResponse(serialized)
 
 
 class TrailLayer(MapEntityLayer):
@@ -296,6 +313,7 @@ class TrailJsonList(MapEntityJsonList, TrailList):
 
 
 class TrailFormatList(MapEntityFormat, TrailList):
+    queryset = Trail.objects.existing().prefetch_related('zones')
     columns = [
         'id', 'structure', 'name', 'comments', 'departure', 'arrival',
         'date_insert', 'date_update',
@@ -41,6 +41,7 @@ class DiveJsonList(MapEntityJsonList, DiveList):
 
 
 class DiveFormatList(MapEntityFormat, DiveList):
+    queryset = Dive.objects.existing().prefetch_related('zones')
     columns = [
         'id', 'eid', 'structure', 'name', 'departure',
         'description', 'description_teaser',
@@ -158,7 +159,7 @@ class DiveViewSet(MapEntityViewSet):
     def get_queryset(self):
         qs = self.model.objects.existing()
         qs = qs.select_related('structure', 'difficulty', 'practice')
-        qs = qs.prefetch_related('levels', 'source', 'portal', 'themes', 'attachments')
+        qs = qs.prefetch_related('levels', 'source', 'portal', 'themes', Dive.pictures_prefetch())
         qs = qs.filter(published=True).order_by('pk').distinct('pk')
         if 'source' in self.request.GET:
             qs = qs.filter(source__name__in=self.request.GET['source'].split(','))
@@ -32,6 +32,7 @@ class InfrastructureJsonList(MapEntityJsonList, InfrastructureList):
 
 
 class InfrastructureFormatList(MapEntityFormat, InfrastructureList):
+    queryset = Infrastructure.objects.existing().prefetch_related('zones')
     columns = [
         'id', 'name', 'type', 'condition', 'description',
         'implantation_year', 'published', 'publication_date', 'structure', 'date_insert',
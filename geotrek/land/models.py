@@ -74,7 +74,7 @@ class PhysicalEdge(MapEntityMixin, Topology):
 Path.add_property('physical_edges', PhysicalEdge.path_physicals, _("Physical edges"))
 Topology.add_property('physical_edges', PhysicalEdge.topology_physicals, _("Physical edges"))
 Intervention.add_property('physical_edges', lambda self: self.topology.physical_edges if self.topology else [], _("Physical edges"))
-Project.add_property('physical_edges', lambda self: self.edges_by_attr('physical_edges'), _("Physical edges"))
+Project.add_property('physical_edges', lambda self: self.overlapping_edges(PhysicalEdge.topology_physicals), _("Physical edges"))
 
 
 class LandType(StructureOrNoneRelated):
@@ -145,7 +145,7 @@ class LandEdge(MapEntityMixin, Topology):
 Path.add_property('land_edges', LandEdge.path_lands, _("Land edges"))
 Topology.add_property('land_edges', LandEdge.topology_lands, _("Land edges"))
 Intervention.add_property('land_edges', lambda self: self.topology.land_edges if self.topology else [], _("Land edges"))
-Project.add_property('land_edges', lambda self: self.edges_by_attr('land_edges'), _("Land edges"))
+Project.add_property('land_edges', lambda self: self.overlapping_edges(LandEdge.topology_lands), _("Land edges"))
 
 
 class CompetenceEdge(MapEntityMixin, Topology):
@@ -192,13 +192,13 @@ class CompetenceEdge(MapEntityMixin, Topology):
 
     @classmethod
     def topology_competences(cls, topology):
-        return cls.overlapping(Topology.objects.get(pk=topology.pk)).select_related('organization')
+        return cls.overlapping(topology).select_related('organization')
 
 
 Path.add_property('competence_edges', CompetenceEdge.path_competences, _("Competence edges"))
 Topology.add_property('competence_edges', CompetenceEdge.topology_competences, _("Competence edges"))
 Intervention.add_property('competence_edges', lambda self: self.topology.competence_edges if self.topology else [], _("Competence edges"))
-Project.add_property('competence_edges', lambda self: self.edges_by_attr('competence_edges'), _("Competence edges"))
+Project.add_property('competence_edges', lambda self: self.overlapping_edges(CompetenceEdge.topology_competences), _("Competence edges"))
 
 
 class WorkManagementEdge(MapEntityMixin, Topology):
@@ -251,7 +251,7 @@ class WorkManagementEdge(MapEntityMixin, Topology):
 Path.add_property('work_edges', WorkManagementEdge.path_works, _("Work management edges"))
 Topology.add_property('work_edges', WorkManagementEdge.topology_works, _("Work management edges"))
 Intervention.add_property('work_edges', lambda self: self.topology.work_edges if self.topology else [], _("Work management edges"))
-Project.add_property('work_edges', lambda self: self.edges_by_attr('work_edges'), _("Work management edges"))
+Project.add_property('work_edges', lambda self: self.overlapping_edges(WorkManagementEdge.topology_works), _("Work management edges"))
 
 
 class SignageManagementEdge(MapEntityMixin, Topology):
@@ -304,4 +304,4 @@ class SignageManagementEdge(MapEntityMixin, Topology):
 Path.add_property('signage_edges', SignageManagementEdge.path_signages, _("Signage management edges"))
 Topology.add_property('signage_edges', SignageManagementEdge.topology_signages, _("Signage management edges"))
 Intervention.add_property('signage_edges', lambda self: self.topology.signage_edges if self.topology else [], _("Signage management edges"))
-Project.add_property('signage_edges', lambda self: self.edges_by_attr('signage_edges'), _("Signage management edges"))
+Project.add_property('signage_edges', lambda self: self.overlapping_edges(SignageManagementEdge.topology_signages), _("Signage management edges"))
@@ -25,6 +25,7 @@ class PhysicalEdgeJsonList(MapEntityJsonList, PhysicalEdgeList):
 
 
 class PhysicalEdgeFormatList(MapEntityFormat, PhysicalEdgeList):
+    queryset = PhysicalEdge.objects.existing().prefetch_related('zones')
     columns = [
         'id', 'physical_type',
         'date_insert', 'date_update',
@@ -70,6 +71,7 @@ class LandEdgeJsonList(MapEntityJsonList, LandEdgeList):
 
 
 class LandEdgeFormatList(MapEntityFormat, LandEdgeList):
+    queryset = LandEdge.objects.existing().prefetch_related('zones')
     columns = [
         'id', 'land_type', 'owner', 'agreement',
         'date_insert', 'date_update',
@@ -115,6 +117,7 @@ class CompetenceEdgeJsonList(MapEntityJsonList, CompetenceEdgeList):
 
 
 class CompetenceEdgeFormatList(MapEntityFormat, CompetenceEdgeList):
+    queryset = CompetenceEdge.objects.existing().prefetch_related('zones')
     columns = [
         'id', 'organization',
         'date_insert', 'date_update',
@@ -160,6 +163,7 @@ class WorkManagementEdgeJsonList(MapEntityJsonList, WorkManagementEdgeList):
 
 
 class WorkManagementEdgeFormatList(MapEntityFormat, WorkManagementEdgeList):
+    queryset = WorkManagementEdge.objects.existing().prefetch_related('zones')
     columns = [
         'id', 'organization',
         'date_insert', 'date_update',
@@ -205,6 +209,7 @@ class SignageManagementEdgeJsonList(MapEntityJsonList, SignageManagementEdgeList
 
 
 class SignageManagementEdgeFormatList(MapEntityFormat, SignageManagementEdgeList):
+    queryset = SignageManagementEdge.objects.existing().prefetch_related('zones')
     columns = [
         'id', 'organization',
         'date_insert', 'date_update',
@@ -1,17 +1,19 @@
 import os
 from datetime import datetime
 
+from django.db.models import OuterRef, Subquery
 from django.db.models.functions import ExtractYear
 from django.conf import settings
 from django.utils.translation import ugettext_lazy as _
 from django.contrib.gis.db import models
+from django.contrib.gis.db.models import Collect
 from django.contrib.gis.geos import GeometryCollection
 
 from mapentity.models import MapEntityMixin
 
 from geotrek.authent.models import StructureRelated, StructureOrNoneRelated
 from geotrek.altimetry.models import AltimetryMixin
-from geotrek.core.models import Topology, Path, Trail
+from geotrek.core.models import Topology, Path, PathAggregation, Trail
 from geotrek.common.models import Organism
 from geotrek.common.mixins import TimeStampedModelMixin, NoDeleteMixin, AddPropertyMixin
 from geotrek.common.utils import classproperty
@@ -438,36 +440,29 @@ class Project(AddPropertyMixin, MapEntityMixin, TimeStampedModelMixin,
         super(Project, self).__init__(*args, **kwargs)
         self._geom = None
 
+    def topologies(self, existing=True):
+        """ Topologies of (existing) interventions of project, as a subquery
+        """
+        interventions = Intervention.objects.existing() if existing else Intervention.objects.all()
+        return interventions.filter(project=self, topology__isnull=False).values('topology')
+
     @property
     def paths(self):
-        s = []
-        for i in self.interventions.existing():
-            s += i.paths
-        return Path.objects.filter(pk__in=[p.pk for p in set(s)])
+        aggregations = PathAggregation.objects.filter(topo_object__in=self.topologies())
+        return Path.objects.filter(pk__in=aggregations.values('path'))
 
     @property
     def trails(self):
-        s = []
-        for i in self.interventions.existing():
-            for p in i.paths.all():
-                for t in p.trails.all():
-                    s.append(t.pk)
-
-        return Trail.objects.filter(pk__in=s)
+        trails = Trail.objects.existing().filter(aggregations__path__in=self.paths)
+        return Trail.objects.filter(pk__in=trails.values('pk'))
 
     @property
     def signages(self):
-        s = []
-        for i in self.interventions.existing():
-            s += i.signages
-        return list(set(s))
+        return list(Signage.objects.existing().filter(pk__in=self.topologies()))
 
     @property
     def infrastructures(self):
-        s = []
-        for i in self.interventions.existing():
-            s += i.infrastructures
-        return list(set(s))
+        return list(Infrastructure.objects.existing().filter(pk__in=self.topologies()))
 
     @classproperty
     def geomfield(cls):
@@ -480,10 +475,14 @@ class Project(AddPropertyMixin, MapEntityMixin, TimeStampedModelMixin,
     @property
     def geom(self):
         """ Merge all interventions geometry into a collection
+        (collected by the query if annotated with ``geom_annotation()``)
         """
         if self._geom is None:
-            interventions = Intervention.objects.existing().filter(project=self)
-            geoms = [i.geom for i in interventions if i.geom is not None]
+            if hasattr(self, 'interventions_geom'):
+                geoms = list(self.interventions_geom or [])
+            else:
+                interventions = Intervention.objects.existing().filter(project=self)
+                geoms = [i.geom for i in interventions if i.geom is not None]
             if geoms:
                 self._geom = GeometryCollection(*geoms, srid=settings.SRID)
         return self._geom
@@ -492,6 +491,16 @@ class Project(AddPropertyMixin, MapEntityMixin, TimeStampedModelMixin,
     def geom(self, value):
         self._geom = value
 
+    @classmethod
+    def geom_annotation(cls):
+        """
+        Collection of existing interventions geometries, to be used in querysets
+        ``annotate(interventions_geom=...)`` (one query for all projects).
+        """
+        interventions = Intervention.objects.existing().filter(project=OuterRef('pk'), topology__isnull=False)
+        interventions = interventions.order_by().values('project').annotate(geom=Collect('topology__geom'))
+        return Subquery(interventions.values('geom'), output_field=models.GeometryCollectionField(srid=settings.SRID))
+
     @property
     def name_display(self):
         return '<a data-pk="%s" href="%s" title="%s">%s</a>' % (self.pk,
@@ -553,7 +562,7 @@ class Project(AddPropertyMixin, MapEntityMixin, TimeStampedModelMixin,
     def edges_by_attr(self, interventionattr):
         """ Return related topology objects of project, by aggregating the same attribute
         on its interventions.
-        (See geotrek.land.models)
+        (See geotrek.trekking.models)
         """
         pks = []
         modelclass = Topology
@@ -568,6 +577,14 @@ class Project(AddPropertyMixin, MapEntityMixin, TimeStampedModelMixin,
                     pks.append(topology['id'])
         return modelclass.objects.filter(pk__in=pks)
 
+    def overlapping_edges(self, topology_edges):
+        """ Return edges overlapping topologies of all interventions of project at once.
+        ``topology_edges`` has to accept a queryset of topologies, as
+        ``Topology.overlapping()`` does.
+        (See geotrek.land.models)
+        """
+        return topology_edges(Topology.objects.filter(pk__in=self.topologies(existing=False)))
+
     @classmethod
     def get_create_label(cls):
         return _("Add a new project")
@@ -6,7 +6,9 @@ from unittest import skipIf
 from geotrek.infrastructure.factories import InfrastructureFactory
 from geotrek.signage.factories import SignageFactory
 from geotrek.maintenance.factories import InterventionFactory, ProjectFactory
-from geotrek.core.factories import TopologyFactory, PathAggregationFactory
+from geotrek.maintenance.models import Project
+from geotrek.trekking.factories import POIFactory, ServiceFactory, TrekFactory
+from geotrek.core.factories import PathFactory, TopologyFactory, PathAggregationFactory
 from geotrek.land.factories import (SignageManagementEdgeFactory, WorkManagementEdgeFactory,
                                     CompetenceEdgeFactory)
 from geotrek.zoning.factories import (CityEdgeFactory, DistrictEdgeFactory,
@@ -120,6 +122,75 @@ class ProjectTest(TestCase):
 
         self.assertEqual(proj.infrastructures, [])
 
+    @skipIf(not settings.TREKKING_TOPOLOGY_ENABLED, 'Test with dynamic segmentation only')
+    def test_geom_annotation(self):
+        i1 = InterventionFactory.create()
+        sign = SignageFactory.create()
+        i1.set_topology(sign)
+        i1.save()
+        i2 = InterventionFactory.create()
+        infra = InfrastructureFactory.create()
+        i2.set_topology(infra)
+        i2.save()
+
+        proj = ProjectFactory.create()
+        proj.interventions.add(i1, i2)
+        ProjectFactory.create()
+        projects = Project.objects.annotate(interventions_geom=Project.geom_annotation()).order_by('pk')
+        with self.assertNumQueries(1):
+            geoms = [p.geom for p in projects]
+        self.assertEqual(len(geoms[0]), 2)
+        self.assertCountEqual([g.wkt for g in geoms[0]], [g.wkt for g in Project.objects.get(pk=proj.pk).geom])
+        self.assertIsNone(geoms[1])
+
+    @skipIf(not settings.TREKKING_TOPOLOGY_ENABLED, 'Test with dynamic segmentation only')
+    def test_helpers_queries(self):
+        proj = ProjectFactory.create()
+        for i in range(3):
+            intervention = InterventionFactory.create()
+            intervention.set_topology(SignageFactory.create())
+            intervention.save()
+            proj.interventions.add(intervention)
+        with self.assertNumQueries(1):
+            signages = proj.signages
+        self.assertEqual(len(signages), 3)
+        paths = set(path for signage in signages for path in signage.paths.all())
+        with self.assertNumQueries(1):
+            self.assertCountEqual(proj.paths, paths)
+
+    @skipIf(not settings.TREKKING_TOPOLOGY_ENABLED, 'Test with dynamic segmentation only')
+    def test_trekking_objects(self):
+        path = PathFactory.create()
+        topology = TopologyFactory.create(no_path=True)
+        topology.add_path(path, start=0, end=1)
+        intervention = InterventionFactory.create(topology=topology)
+        trek = TrekFactory.create(no_path=True)
+        trek.add_path(path, start=0, end=1)
+        poi = POIFactory.create(no_path=True)
+        poi.add_path(path, start=0.5, end=0.5)
+        service = ServiceFactory.create(no_path=True)
+        service.add_path(path, start=0.5, end=0.5)
+
+        proj = ProjectFactory.create()
+        proj.interventions.add(intervention)
+        self.assertCountEqual(proj.treks, [trek])
+        self.assertCountEqual(proj.pois, [poi])
+        self.assertCountEqual(proj.services, [service])
+
+    @skipIf(settings.TREKKING_TOPOLOGY_ENABLED, 'Test without dynamic segmentation only')
+    def test_trekking_objects_nds(self):
+        topology = TopologyFactory.create(geom='SRID=2154;LINESTRING(700000 6600000, 700100 6600000)')
+        intervention = InterventionFactory.create(topology=topology)
+        trek = TrekFactory.create(geom='SRID=2154;LINESTRING(700000 6600000, 700100 6600000)')
+        poi = POIFactory.create(geom='SRID=2154;POINT(700050 6600000)')
+        service = ServiceFactory.create(geom='SRID=2154;POINT(700050 6600000)')
+
+        proj = ProjectFactory.create()
+        proj.interventions.add(intervention)
+        self.assertCountEqual(proj.treks, [trek])
+        self.assertCountEqual(proj.pois, [poi])
+        self.assertCountEqual(proj.services, [service])
+
 
 @skipIf(not settings.TREKKING_TOPOLOGY_ENABLED, 'Test with dynamic segmentation only')
 class ProjectLandTest(TestCase):
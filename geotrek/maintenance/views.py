@@ -37,6 +37,7 @@ class InterventionJsonList(MapEntityJsonList, InterventionList):
 
 
 class InterventionFormatList(MapEntityFormat, InterventionList):
+    queryset = Intervention.objects.existing().prefetch_related('zones')
     columns = [
         'id', 'name', 'date', 'type', 'infrastructure', 'status', 'stake',
         'disorders', 'total_manday', 'project', 'subcontracting',
@@ -128,7 +129,7 @@ class InterventionViewSet(MapEntityViewSet):
 
 
 class ProjectLayer(MapEntityLayer):
-    queryset = Project.objects.existing()
+    queryset = Project.objects.existing().annotate(interventions_geom=Project.geom_annotation())
     properties = ['name']
 
     def get_queryset(self):
@@ -147,6 +148,8 @@ class ProjectJsonList(MapEntityJsonList, ProjectList):
 
 
 class ProjectFormatList(MapEntityFormat, ProjectList):
+    queryset = Project.objects.existing().annotate(interventions_geom=Project.geom_annotation()) \
+        .prefetch_related('zones')
     columns = [
         'id', 'structure', 'name', 'period', 'type', 'domain', 'constraint', 'global_cost',
         'interventions', 'interventions_total_cost', 'comments', 'contractors',
@@ -199,6 +202,6 @@ class ProjectDelete(MapEntityDelete):
 
 class ProjectViewSet(MapEntityViewSet):
     model = Project
-    queryset = Project.objects.existing()
+    queryset = Project.objects.existing().annotate(interventions_geom=Project.geom_annotation())
     serializer_class = ProjectSerializer
     permission_classes = [rest_permissions.DjangoModelPermissionsOrAnonReadOnly]
@@ -204,10 +204,17 @@ class SensitiveArea(MapEntityMixin, StructureRelated, TimeStampedModelMixin, NoD
     pretty_practices_verbose_name = _("Practices")
 
 
+def topology_sensitive_areas(topology):
+    if hasattr(topology, 'proximities'):
+        # Treks (see TrekProximity)
+        return topology.proximities.near(SensitiveArea, settings.SENSITIVE_AREA_INTERSECTION_MARGIN)
+    return intersecting(SensitiveArea, topology, settings.SENSITIVE_AREA_INTERSECTION_MARGIN, False)
+
+
 if 'geotrek.core' in settings.INSTALLED_APPS:
     from geotrek.core.models import Topology
-    Topology.add_property('sensitive_areas', lambda self: intersecting(SensitiveArea, self, settings.SENSITIVE_AREA_INTERSECTION_MARGIN, False), _("Sensitive areas"))
-    Topology.add_property('published_sensitive_areas', lambda self: intersecting(SensitiveArea, self, settings.SENSITIVE_AREA_INTERSECTION_MARGIN, False).filter(published=True), _("Published sensitive areas"))
+    Topology.add_property('sensitive_areas', topology_sensitive_areas, _("Sensitive areas"))
+    Topology.add_property('published_sensitive_areas', lambda self: topology_sensitive_areas(self).filter(published=True), _("Published sensitive areas"))
 
 if 'geotrek.trekking' in settings.INSTALLED_APPS:
     from geotrek.trekking import models as trekking_models
@@ -634,6 +634,10 @@ MOBILE_TILES_RADIUS_SMALL = 0.005  # ~500 m
 MOBILE_TILES_GLOBAL_ZOOMS = range(13)
 MOBILE_TILES_LOW_ZOOMS = range(13, 15)
 MOBILE_TILES_HIGH_ZOOMS = range(15, 17)
+MOBILE_TILES_CACHE_TTL = 30 * 24 * 3600  # Time after which downloaded tiles are refreshed (in seconds)
+MOBILE_TILES_CONCURRENCY = 4  # Number of tiles downloaded at the same time
+MOBILE_TILES_RETRIES = 2  # Number of retries of failed tiles downloads
+MOBILE_TILES_RETRY_DELAY = 1  # Delay before first retry (in seconds), doubled at each retry
 MOBILE_CATEGORY_PICTO_SIZE = 32
 MOBILE_POI_PICTO_SIZE = 32
 MOBILE_INFORMATIONDESKTYPE_PICTO_SIZE = 32
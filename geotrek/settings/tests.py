@@ -29,6 +29,8 @@ ALLOWED_HOSTS = [
     'localhost',
 ]
 
+MOBILE_TILES_RETRY_DELAY = 0
+
 
 class DisableMigrations(object):
     def __contains__(self, item):
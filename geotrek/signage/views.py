@@ -41,6 +41,7 @@ class SignageJsonList(MapEntityJsonList, SignageList):
 
 
 class SignageFormatList(MapEntityFormat, SignageList):
+    queryset = Signage.objects.existing().prefetch_related('zones')
     columns = [
         'id', 'structure', 'name', 'code', 'type', 'condition', 'description',
         'implantation_year', 'published', 'date_insert',
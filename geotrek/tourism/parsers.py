@@ -7,7 +7,7 @@ from django.contrib.gis.geos import Point
 from django.db import models
 from django.utils.translation import ugettext as _
 
-from geotrek.common.parsers import (AttachmentParserMixin, Parser,
+from geotrek.common.parsers import (AttachmentParserMixin, Parser, ReadAheadPager,
                                     GlobalImportError, TourInSoftParser)
 from geotrek.tourism.models import TouristicContent, TouristicEvent, TouristicContentType1, TouristicContentType2
 
@@ -93,27 +93,29 @@ class ApidaeParser(AttachmentParserMixin, Parser):
     def items(self):
         return self.root['objetsTouristiques']
 
+    def get_page(self, skip):
+        params = {
+            'apiKey': self.api_key,
+            'projetId': self.project_id,
+            'selectionIds': [self.selection_id],
+            'count': self.size,
+            'first': skip,
+            'responseFields': self.responseFields
+        }
+        response = requests.get(self.url, params={'query': json.dumps(params)})
+        if response.status_code != 200:
+            msg = _("Failed to download {url}. HTTP status code {status_code}")
+            raise GlobalImportError(msg.format(url=response.url, status_code=response.status_code))
+        root = response.json()
+        return root, int(root['numFound'])
+
     def next_row(self):
-        while True:
-            params = {
-                'apiKey': self.api_key,
-                'projetId': self.project_id,
-                'selectionIds': [self.selection_id],
-                'count': self.size,
-                'first': self.skip,
-                'responseFields': self.responseFields
-            }
-            response = requests.get(self.url, params={'query': json.dumps(params)})
-            if response.status_code != 200:
-                msg = _("Failed to download {url}. HTTP status code {status_code}")
-                raise GlobalImportError(msg.format(url=response.url, status_code=response.status_code))
-            self.root = response.json()
-            self.nb = int(self.root['numFound'])
+        # Next pages are downloaded and decoded in background
+        for root, nb in ReadAheadPager(self.get_page, self.size, skip=self.skip):
+            self.root, self.nb = root, nb
             for row in self.items:
                 yield row
             self.skip += self.size
-            if self.skip >= self.nb:
-                return
 
     def normalize_field_name(self, name):
         return name
@@ -55,8 +55,9 @@ class FMA28(TouristicEventTourInSoftParser):
 
 
 class ParserTests(TranslationResetMixin, TestCase):
+    @mock.patch('requests.Session.get')
     @mock.patch('requests.get')
-    def test_create_content_apidae(self, mocked):
+    def test_create_content_apidae(self, mocked, mocked_session):
         def mocked_json():
             filename = os.path.join(os.path.dirname(__file__), 'data', 'apidaeContent.json')
             with open(filename, 'r') as f:
@@ -64,6 +65,7 @@ class ParserTests(TranslationResetMixin, TestCase):
         mocked.return_value.status_code = 200
         mocked.return_value.json = mocked_json
         mocked.return_value.content = b'Fake image'
+        mocked_session.return_value = mocked.return_value
         FileType.objects.create(type="Photographie")
         category = TouristicContentCategoryFactory(label="Eau vive")
         TouristicContentType1Factory(label="Type A")
@@ -93,8 +95,9 @@ class ParserTests(TranslationResetMixin, TestCase):
         self.assertEqual(Attachment.objects.count(), 3)
         self.assertEqual(Attachment.objects.first().content_object, content)
 
+    @mock.patch('requests.Session.get')
     @mock.patch('requests.get')
-    def test_filetype_structure_none(self, mocked):
+    def test_filetype_structure_none(self, mocked, mocked_session):
         def mocked_json():
             filename = os.path.join(os.path.dirname(__file__), 'data', 'apidaeContent.json')
             with open(filename, 'r') as f:
@@ -103,6 +106,7 @@ class ParserTests(TranslationResetMixin, TestCase):
         mocked.return_value.status_code = 200
         mocked.return_value.json = mocked_json
         mocked.return_value.content = b'Fake image'
+        mocked_session.return_value = mocked.return_value
         FileType.objects.create(type="Photographie", structure=None)
         TouristicContentCategoryFactory(label="Eau vive")
         TouristicContentType1Factory(label="Type A")
@@ -110,8 +114,40 @@ class ParserTests(TranslationResetMixin, TestCase):
         call_command('import', 'geotrek.tourism.tests.test_parsers.EauViveParser', verbosity=0)
         self.assertEqual(TouristicContent.objects.count(), 1)
 
+    @mock.patch('requests.Session.get')
     @mock.patch('requests.get')
-    def test_create_event_apidae(self, mocked):
+    def test_create_content_apidae_batch(self, mocked, mocked_session):
+        def mocked_json():
+            filename = os.path.join(os.path.dirname(__file__), 'data', 'apidaeContent.json')
+            with open(filename, 'r') as f:
+                return json.load(f)
+        mocked.return_value.status_code = 200
+        mocked.return_value.json = mocked_json
+        mocked.return_value.content = b'Fake image'
+        mocked.return_value.headers = {'ETag': '"1"'}
+        mocked_session.return_value = mocked.return_value
+        FileType.objects.create(type="Photographie")
+        category = TouristicContentCategoryFactory(label="Eau vive")
+        TouristicContentType1Factory(label="Type A")
+        TouristicContentType1Factory(label="Type B")
+        call_command('import', 'geotrek.tourism.tests.test_parsers.EauViveParser', batch_size=100, verbosity=0)
+        content = TouristicContent.objects.get()
+        self.assertEqual(content.eid, "479743")
+        self.assertEqual(content.category, category)
+        self.assertEqual(content.publication_date, date.today())
+        self.assertQuerysetEqual(
+            content.type1.all(),
+            ['<TouristicContentType1: Type A>', '<TouristicContentType1: Type B>']
+        )
+        self.assertEqual(Attachment.objects.count(), 3)
+        call_command('import', 'geotrek.tourism.tests.test_parsers.EauViveParser', batch_size=100, verbosity=0)
+        self.assertEqual(TouristicContent.objects.count(), 1)
+        self.assertEqual(Attachment.objects.count(), 3)
+        self.assertEqual(mocked_session.call_args[1]['headers'], {'If-None-Match': '"1"'})
+
+    @mock.patch('requests.Session.get')
+    @mock.patch('requests.get')
+    def test_create_event_apidae(self, mocked, mocked_session):
         def mocked_json():
             filename = os.path.join(os.path.dirname(__file__), 'data', 'apidaeEvent.json')
             with open(filename, 'r') as f:
@@ -119,6 +155,7 @@ class ParserTests(TranslationResetMixin, TestCase):
         mocked.return_value.status_code = 200
         mocked.return_value.json = mocked_json
         mocked.return_value.content = b'Fake image'
+        mocked_session.return_value = mocked.return_value
         FileType.objects.create(type="Photographie")
         self.assertEqual(TouristicEvent.objects.count(), 0)
         output = io.StringIO()
@@ -147,8 +184,9 @@ class ParserTests(TranslationResetMixin, TestCase):
         )
         self.assertEqual(Attachment.objects.count(), 3)
 
+    @mock.patch('requests.Session.get')
     @mock.patch('requests.get')
-    def test_create_esprit(self, mocked):
+    def test_create_esprit(self, mocked, mocked_session):
         def mocked_json():
             filename = os.path.join(os.path.dirname(__file__), 'data', 'espritparc.json')
             with open(filename, 'r') as f:
@@ -158,6 +196,7 @@ class ParserTests(TranslationResetMixin, TestCase):
         mocked.return_value.status_code = 200
         mocked.return_value.json = mocked_json
         mocked.return_value.content = b'Fake image'
+        mocked_session.return_value = mocked.return_value
         FileType.objects.create(type="Photographie")
         category = TouristicContentCategoryFactory(label="Miels et produits de la ruche")
         TouristicContentType1Factory(label="Miel", category=category)
@@ -188,8 +227,9 @@ class ParserTests(TranslationResetMixin, TestCase):
             self.assertIn(one.name.lower(), name)
             self.assertEqual(one.category, category)
 
+    @mock.patch('requests.Session.get')
     @mock.patch('requests.get')
-    def test_create_content_tourinsoft_v2(self, mocked):
+    def test_create_content_tourinsoft_v2(self, mocked, mocked_session):
         def mocked_json():
             filename = os.path.join(os.path.dirname(__file__), 'data', 'tourinsoftContent.json')
             with open(filename, 'r') as f:
@@ -197,6 +237,7 @@ class ParserTests(TranslationResetMixin, TestCase):
         mocked.return_value.status_code = 200
         mocked.return_value.json = mocked_json
         mocked.return_value.content = b'Fake image'
+        mocked_session.return_value = mocked.return_value
         FileType.objects.create(type="Photographie")
         category = TouristicContentCategoryFactory(label="Où dormir")
         source = RecordSourceFactory(name="CDT 28")
@@ -225,8 +266,9 @@ class ParserTests(TranslationResetMixin, TestCase):
         self.assertEqual(Attachment.objects.count(), 3)
         self.assertEqual(Attachment.objects.first().content_object, content)
 
+    @mock.patch('requests.Session.get')
     @mock.patch('requests.get')
-    def test_create_content_tourinsoft_v3(self, mocked):
+    def test_create_content_tourinsoft_v3(self, mocked, mocked_session):
         def mocked_json():
             filename = os.path.join(os.path.dirname(__file__), 'data', 'tourinsoftContentV3.json')
             with open(filename, 'r') as f:
@@ -234,6 +276,7 @@ class ParserTests(TranslationResetMixin, TestCase):
         mocked.return_value.status_code = 200
         mocked.return_value.json = mocked_json
         mocked.return_value.content = b'Fake image'
+        mocked_session.return_value = mocked.return_value
         FileType.objects.create(type="Photographie")
         category = TouristicContentCategoryFactory(label="Où dormir")
         source = RecordSourceFactory(name="CDT 28")
@@ -262,8 +305,9 @@ class ParserTests(TranslationResetMixin, TestCase):
         self.assertEqual(Attachment.objects.count(), 3)
         self.assertEqual(Attachment.objects.first().content_object, content)
 
+    @mock.patch('requests.Session.get')
     @mock.patch('requests.get')
-    def test_create_event_tourinsoft(self, mocked):
+    def test_create_event_tourinsoft(self, mocked, mocked_session):
         def mocked_json():
             filename = os.path.join(os.path.dirname(__file__), 'data', 'tourinsoftEvent.json')
             with open(filename, 'r') as f:
@@ -271,6 +315,7 @@ class ParserTests(TranslationResetMixin, TestCase):
         mocked.return_value.status_code = 200
         mocked.return_value.json = mocked_json
         mocked.return_value.content = b'Fake image'
+        mocked_session.return_value = mocked.return_value
         FileType.objects.create(type="Photographie")
         type = TouristicEventTypeFactory(type="Agenda rando")
         source = RecordSourceFactory(name="CDT 28")
@@ -55,6 +55,7 @@ class TouristicContentList(MapEntityList):
 
 
 class TouristicContentFormatList(MapEntityFormat, TouristicContentList):
+    queryset = TouristicContent.objects.existing().prefetch_related('zones')
     columns = [
         'id', 'structure', 'eid', 'name', 'category', 'type1', 'type2', 'description_teaser',
         'description', 'themes', 'contact', 'email', 'website', 'practical_info',
@@ -170,6 +171,7 @@ class TouristicEventList(MapEntityList):
 
 
 class TouristicEventFormatList(MapEntityFormat, TouristicEventList):
+    queryset = TouristicEvent.objects.existing().prefetch_related('zones')
     columns = [
         'id', 'structure', 'eid', 'name', 'type', 'description_teaser', 'description', 'themes',
         'begin_date', 'end_date', 'duration', 'meeting_point', 'meeting_time',
@@ -1,14 +1,22 @@
 import logging
 import filecmp
+import hashlib
+import json
+import math
+import multiprocessing
 import os
 import re
 import shutil
-from time import sleep
+from concurrent.futures import ThreadPoolExecutor
+from time import sleep, time
 from zipfile import ZipFile
 
 from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.gis.geos import Polygon
 from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
 from django.db.models import Q
 from django.http import StreamingHttpResponse
 from django.test.client import RequestFactory
@@ -17,8 +25,10 @@ from django.utils.translation import ugettext as _
 from landez import TilesManager
 from landez.sources import DownloadError
 from geotrek.common.models import FileType  # NOQA
+from geotrek.altimetry.helpers import AltimetryHelper
 from geotrek.altimetry.views import ElevationProfile, ElevationArea, serve_elevation_chart
 from geotrek.common import models as common_models
+from geotrek.common.utils import iterate_in_chunks
 from geotrek.common.views import ThemeViewSet
 from geotrek.core.views import ParametersView
 from geotrek.feedback.views import CategoryList as FeedbackCategoryList
@@ -48,11 +58,73 @@ from geotrek.tourism import urls  # NOQA
 
 logger = logging.getLogger(__name__)
 
+# Command instance inherited by forked workers (see ``Command.sync_treks()``)
+_worker_command = None
+
+
+def tile_x(lng, zoom):
+    return int(math.floor((lng + 180.0) / 360.0 * 2 ** zoom))
+
+
+def tile_y(lat, zoom):
+    lat = math.radians(max(min(lat, 85.0511), -85.0511))
+    return int(math.floor((1.0 - math.log(math.tan(lat) + 1.0 / math.cos(lat)) / math.pi) / 2.0 * 2 ** zoom))
+
+
+def tile_lat(y, zoom):
+    """Latitude of the top edge of tiles row ``y``."""
+    return math.degrees(math.atan(math.sinh(math.pi * (1.0 - 2.0 * y / 2 ** zoom))))
+
+
+def polygon_tiles(polygon, zoom):
+    """Iterate on tiles intersecting ``polygon`` (in WGS84) at ``zoom``,
+    row by row, using the extent of the polygon parts in each row.
+    """
+    last = 2 ** zoom - 1
+    xmin, ymin, xmax, ymax = polygon.extent
+    for y in range(max(tile_y(ymax, zoom), 0), min(tile_y(ymin, zoom), last) + 1):
+        row = Polygon.from_bbox((xmin, tile_lat(y + 1, zoom), xmax, tile_lat(y, zoom)))
+        strip = polygon.intersection(row)
+        if strip.empty:
+            continue
+        parts = strip if strip.geom_type in ('MultiPolygon', 'GeometryCollection') else [strip]
+        for part in parts:
+            part_xmin, part_ymin, part_xmax, part_ymax = part.extent
+            for x in range(max(tile_x(part_xmin, zoom), 0), min(tile_x(part_xmax, zoom), last) + 1):
+                yield (zoom, x, y)
+
+
+def _sync_trek_worker(unit):
+    lang, pk = unit
+    command = _worker_command
+    command.successfull = True
+    translation.activate(lang)
+    trek = trekking_models.Trek.objects.get(pk=pk)
+    record = command.sync_trek_unit(lang, trek)
+    return lang, pk, command.successfull, record
+
 
 class ZipTilesBuilder(object):
+    """Download tiles covering some areas and add them to a zip file.
+
+    Tiles are kept in a local cache (in ``tiles_dir``), shared by all zip
+    files and sync commands, and refreshed after ``MOBILE_TILES_CACHE_TTL``.
+    """
     def __init__(self, zipfile, prefix="", **builder_args):
         self.zipfile = zipfile
         self.prefix = prefix
+        tiles_dir = builder_args.get('tiles_dir')
+        if tiles_dir:
+            if isinstance(settings.MOBILE_TILES_URL, str):
+                urls = [builder_args['tiles_url']]
+            else:
+                urls = [builder_args['tiles_url']] + list(settings.MOBILE_TILES_URL[1:])
+            layers = hashlib.sha1('|'.join(urls).encode()).hexdigest()[:16]
+            self.cache_dir = os.path.join(tiles_dir, 'cache', layers)
+            # Replaces landez cache
+            builder_args['cache'] = False
+        else:
+            self.cache_dir = None
         builder_args['tile_format'] = self.format_from_url(builder_args['tiles_url'])
         self.tm = TilesManager(**builder_args)
 
@@ -79,22 +151,77 @@ class ZipTilesBuilder(object):
     def add_coverage(self, bbox, zoomlevels):
         self.tiles |= set(self.tm.tileslist(bbox, zoomlevels))
 
-    def run(self):
-        for tile in self.tiles:
-            name = '{prefix}{0}/{1}/{2}{ext}'.format(
-                *tile,
-                prefix=self.prefix,
-                ext=settings.MOBILE_TILES_EXTENSION or self.tm._tile_extension
-            )
+    def add_geom_coverage(self, geom, radius, zoomlevels):
+        """Add tiles around ``geom`` (in WGS84, may be multi-part) up to ``radius`` degrees.
+        """
+        # Simplify to speed up buffer, and compensate simplification with a larger buffer
+        tolerance = radius / 4.0
+        area = geom.simplify(tolerance).buffer(radius + tolerance)
+        for zoom in zoomlevels:
+            self.tiles.update(polygon_tiles(area, zoom))
+
+    def cache_path(self, tile):
+        return os.path.join(self.cache_dir, '{0}/{1}/{2}'.format(*tile))
+
+    def read_cache(self, tile):
+        if not self.cache_dir:
+            return None
+        path = self.cache_path(tile)
+        try:
+            if time() - os.path.getmtime(path) > settings.MOBILE_TILES_CACHE_TTL:
+                return None
+            with open(path, 'rb') as f:
+                return f.read()
+        except (IOError, OSError):
+            return None
+
+    def write_cache(self, tile, data):
+        if not self.cache_dir or not isinstance(data, bytes):
+            return
+        path = self.cache_path(tile)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def fetch(self, tile):
+        """Return tile from cache, or download it. Returns None if download failed.
+        """
+        data = self.read_cache(tile)
+        if data is not None:
+            return data
+        for retry in range(settings.MOBILE_TILES_RETRIES + 1):
             try:
                 data = self.tm.tile(tile)
             except DownloadError:
-                logger.warning("Failed to download tile %s" % name)
+                if retry == settings.MOBILE_TILES_RETRIES:
+                    return None
+                sleep(settings.MOBILE_TILES_RETRY_DELAY * 2 ** retry)
             else:
-                self.zipfile.writestr(name, data)
+                self.write_cache(tile, data)
+                return data
+
+    def run(self):
+        tiles = sorted(self.tiles)
+        with ThreadPoolExecutor(max_workers=settings.MOBILE_TILES_CONCURRENCY) as executor:
+            for tile, data in zip(tiles, executor.map(self.fetch, tiles)):
+                name = '{prefix}{0}/{1}/{2}{ext}'.format(
+                    *tile,
+                    prefix=self.prefix,
+                    ext=settings.MOBILE_TILES_EXTENSION or self.tm._tile_extension
+                )
+                if data is None:
+                    logger.warning("Failed to download tile %s" % name)
+                else:
+                    self.zipfile.writestr(name, data)
 
 
 class Command(BaseCommand):
+    manifest_name = 'sync_rando.json'
+    # Objects are loaded by chunks of this size (see iter_objects())
+    chunk_size = 100
+
     def add_arguments(self, parser):
         parser.add_argument('path')
         parser.add_argument('--url', '-u', dest='url', default='http://localhost', help='Base url')
@@ -122,11 +249,164 @@ class Command(BaseCommand):
                             default=False, help='include infrastructures')
         parser.add_argument('--with-dives', action='store_true', dest='with_dives',
                             default=False, help='include dives')
+        parser.add_argument('--jobs', '-j', type=int, dest='jobs', default=1,
+                            help='Number of processes used to sync treks')
+        parser.add_argument('--resume', action='store_true', dest='resume', default=False,
+                            help='Resume an interrupted sync (keep temporary directory on failure)')
+        parser.add_argument('--incremental', action='store_true', dest='incremental', default=False,
+                            help='Only regenerate treks and touristic contents/events modified since previous sync')
 
     def mkdirs(self, name):
         dirname = os.path.dirname(name)
         if not os.path.exists(dirname):
-            os.makedirs(dirname)
+            os.makedirs(dirname, exist_ok=True)
+
+    def load_checkpoint(self):
+        """Units (trek of a language, tiles of a trek...) already synced in tmp_root,
+        with their manifest record if any.
+        """
+        self.done = set()
+        if os.path.isfile(self.checkpoint_path):
+            with open(self.checkpoint_path) as f:
+                for line in f:
+                    unit, _tab, record = line.strip().partition('\t')
+                    if not unit:
+                        continue
+                    self.done.add(unit)
+                    if record:
+                        self.manifest[unit] = json.loads(record)
+
+    def checkpoint(self, unit, record=None):
+        with open(self.checkpoint_path, 'a') as f:
+            if record is None:
+                f.write(unit + '\n')
+            else:
+                f.write(unit + '\t' + json.dumps(record) + '\n')
+        self.done.add(unit)
+        if record is not None:
+            self.manifest[unit] = record
+
+    def load_manifest(self):
+        """Manifest of previous sync, i.e. version and files of each unit
+        (trek, touristic content or event of a language).
+        """
+        self.previous_manifest = {}
+        try:
+            with open(os.path.join(self.dst_root, self.manifest_name)) as f:
+                previous = json.load(f)
+        except (IOError, ValueError):
+            return
+        # Output of units depends on options
+        if previous.get('options') == self.manifest_options:
+            self.previous_manifest = previous.get('units', {})
+
+    def write_manifest(self):
+        with open(os.path.join(self.tmp_root, self.manifest_name), 'w') as f:
+            json.dump({'options': self.manifest_options, 'units': self.manifest}, f)
+
+    def iter_objects(self, queryset, *lookups):
+        """Iterate on objects of queryset with a server-side cursor, loading
+        their attachments and ``lookups`` once per chunk of ``chunk_size``
+        objects.
+        """
+        queryset = queryset.prefetch_related(queryset.model.pictures_prefetch(), *lookups)
+        return iterate_in_chunks(queryset, self.chunk_size)
+
+    def object_version(self, obj, related=None):
+        """Hash of last updates of object, related objects and their attachments.
+        Objects without update date (e.g. information desks) are versioned by
+        their values.
+        """
+        objects = [obj] + list(related or [])
+        versions = set()
+        for o in objects:
+            if hasattr(o, 'date_update'):
+                versions.add((o._meta.label, o.pk, str(o.date_update)))
+            else:
+                values = [(f.attname, str(getattr(o, f.attname))) for f in o._meta.concrete_fields]
+                versions.add((o._meta.label, o.pk, repr(values)))
+        pks_by_type = {}
+        for o in objects:
+            if hasattr(o, 'prefetched_attachments'):
+                for attachment in o.prefetched_attachments:
+                    versions.add(('attachment', attachment.pk, str(attachment.date_update)))
+                continue
+            pks_by_type.setdefault(ContentType.objects.get_for_model(o), []).append(o.pk)
+        for content_type, pks in pks_by_type.items():
+            attachments = common_models.Attachment.objects.filter(content_type=content_type, object_id__in=pks)
+            for pk, date_update in attachments.values_list('pk', 'date_update'):
+                versions.add(('attachment', pk, str(date_update)))
+        return hashlib.sha1(repr(sorted(versions)).encode()).hexdigest()
+
+    def trek_version(self, trek):
+        """Version of all objects whose data is written by ``sync_trek()``.
+        """
+        related = list(trek.published_pois) + list(trek.parents) + list(trek.children)
+        related += list(trek.information_desks.all())
+        related += list(trek.services.filter(type__published=True))
+        if self.with_infrastructures:
+            related += list(trek.infrastructures.filter(published=True))
+        if self.with_signages:
+            related += list(trek.signages.filter(published=True))
+        if self.with_events:
+            related += list(trek.touristic_events.all())
+        if self.categories:
+            related += list(trek.touristic_contents.all())
+        if 'geotrek.sensitivity' in settings.INSTALLED_APPS:
+            related += list(trek.published_sensitive_areas)
+        return self.object_version(trek, related)
+
+    def record_file(self, name, zipfile=None):
+        """Remember files generated by current unit for the manifest.
+        """
+        if self.unit_files is None:
+            return
+        if name not in self.unit_files:
+            self.unit_files.append(name)
+        if zipfile is not None and zipfile is self.zipfile and name not in self.unit_zip_names:
+            self.unit_zip_names.append(name)
+
+    def reuse_files(self, record):
+        """Link files of a unit from previous sync. Returns False if some are missing.
+        """
+        for name in record['files']:
+            if not os.path.isfile(os.path.join(self.dst_root, name)):
+                return False
+        for name in record['files']:
+            dst = os.path.join(self.tmp_root, name)
+            self.mkdirs(dst)
+            if not os.path.isfile(dst):
+                try:
+                    os.link(os.path.join(self.dst_root, name), dst)
+                except FileExistsError:  # Linked meanwhile by another worker
+                    pass
+        for name in record['zip']:
+            if name not in self.zipfile.namelist():
+                self.zipfile.write(os.path.join(self.tmp_root, name), name)
+        return True
+
+    def sync_unit(self, unit, version, sync, *args):
+        """Call ``sync(*args)`` and return the record of generated files
+        for the manifest, or None if some errors raised.
+
+        In incremental mode, files of previous sync are reused instead
+        if ``version`` did not change.
+        """
+        previous = self.previous_manifest.get(unit)
+        if self.incremental and previous and previous['version'] == version and self.reuse_files(previous):
+            if self.verbosity == 2:
+                self.stdout.write("\x1b[36m{unit}\x1b[0m \x1b[32munchanged\x1b[0m".format(unit=unit))
+            return previous
+        successfull, self.successfull = self.successfull, True
+        self.unit_files, self.unit_zip_names = [], []
+        try:
+            sync(*args)
+            record = {'version': version, 'files': self.unit_files, 'zip': self.unit_zip_names}
+        finally:
+            unit_successfull = self.successfull
+            self.successfull = successfull and unit_successfull
+            self.unit_files = self.unit_zip_names = None
+        return record if unit_successfull else None
 
     def sync_global_tiles(self):
         """ Creates a tiles file on the global extent.
@@ -151,40 +431,30 @@ class Command(BaseCommand):
                            zoomlevels=settings.MOBILE_TILES_GLOBAL_ZOOMS)
         tiles.run()
         self.close_zip(zipfile, zipname)
+        self.checkpoint('tiles global')
 
     def sync_trek_tiles(self, trek):
         """ Creates a tiles file for the specified Trek object.
         """
         zipname = os.path.join('zip', 'tiles', '{pk}.zip'.format(pk=trek.pk))
-
-        if self.verbosity == 2:
-            self.stdout.write("\x1b[36m**\x1b[0m \x1b[1m{name}\x1b[0m ...".format(name=zipname), ending="")
-            self.stdout.flush()
-
         trek_file = os.path.join(self.tmp_root, zipname)
-
-        def _radius2bbox(lng, lat, radius):
-            return (lng - radius, lat - radius,
-                    lng + radius, lat + radius)
-
         self.mkdirs(trek_file)
 
         zipfile = ZipFile(trek_file, 'w')
         tiles = ZipTilesBuilder(zipfile, **self.builder_args)
 
-        geom = trek.geom
-        if geom.geom_type == 'MultiLineString':
-            geom = geom[0]  # FIXME
-        geom.transform(4326)
+        geom = trek.geom.transform(4326, clone=True)
+        tiles.add_geom_coverage(geom, settings.MOBILE_TILES_RADIUS_LARGE, settings.MOBILE_TILES_LOW_ZOOMS)
+        tiles.add_geom_coverage(geom, settings.MOBILE_TILES_RADIUS_SMALL, settings.MOBILE_TILES_HIGH_ZOOMS)
 
-        for (lng, lat) in geom.coords:
-            large = _radius2bbox(lng, lat, settings.MOBILE_TILES_RADIUS_LARGE)
-            small = _radius2bbox(lng, lat, settings.MOBILE_TILES_RADIUS_SMALL)
-            tiles.add_coverage(bbox=large, zoomlevels=settings.MOBILE_TILES_LOW_ZOOMS)
-            tiles.add_coverage(bbox=small, zoomlevels=settings.MOBILE_TILES_HIGH_ZOOMS)
+        if self.verbosity == 2:
+            self.stdout.write("\x1b[36m**\x1b[0m \x1b[1m{name}\x1b[0m ({count} tiles) ...".format(
+                name=zipname, count=len(tiles.tiles)), ending="")
+            self.stdout.flush()
 
         tiles.run()
         self.close_zip(zipfile, zipname)
+        self.checkpoint('tiles {pk}'.format(pk=trek.pk))
 
     def sync_view(self, lang, view, name, url='/', params={}, zipfile=None, fix2028=False, **kwargs):
         if self.verbosity == 2:
@@ -211,7 +481,9 @@ class Command(BaseCommand):
             if self.verbosity == 2:
                 self.stdout.write("\x1b[3D\x1b[31;1mfailed (HTTP {code})\x1b[0m".format(code=response.status_code))
             return
-        f = open(fullname, 'wb')
+        # Write to a temporary file first since workers may sync the same file
+        tmpname = '{}.{}.tmp'.format(fullname, os.getpid())
+        f = open(tmpname, 'wb')
         if isinstance(response, StreamingHttpResponse):
             content = b''.join(response.streaming_content)
         else:
@@ -224,18 +496,21 @@ class Command(BaseCommand):
         f.close()
         oldfilename = os.path.join(self.dst_root, name)
         # If new file is identical to old one, don't recreate it. This will help backup
-        if os.path.isfile(oldfilename) and filecmp.cmp(fullname, oldfilename):
-            os.unlink(fullname)
-            os.link(oldfilename, fullname)
+        if os.path.isfile(oldfilename) and filecmp.cmp(tmpname, oldfilename):
+            os.unlink(tmpname)
+            os.link(oldfilename, tmpname)
+            os.replace(tmpname, fullname)
             if self.verbosity == 2:
                 self.stdout.write("\x1b[3D\x1b[32munchanged\x1b[0m")
         else:
+            os.replace(tmpname, fullname)
             if self.verbosity == 2:
                 self.stdout.write("\x1b[3D\x1b[32mgenerated\x1b[0m")
         # FixMe: Find why there are duplicate files.
         if zipfile:
             if name not in zipfile.namelist():
                 zipfile.write(fullname, name)
+        self.record_file(name, zipfile)
 
     def sync_json(self, lang, viewset, name, zipfile=None, params={}, as_view_args=[], **kwargs):
         view = viewset.as_view(*as_view_args)
@@ -299,8 +574,8 @@ class Command(BaseCommand):
         name = os.path.join('api', lang, '{modelname}s'.format(modelname=modelname), str(obj.pk), basename_fmt.format(obj=obj))
         self.sync_view(lang, view, name, params=params, zipfile=zipfile, pk=obj.pk, **kwargs)
 
-    def sync_profile_json(self, lang, obj, zipfile=None):
-        view = ElevationProfile.as_view(model=type(obj))
+    def sync_profile_json(self, lang, obj, zipfile=None, profiles=None):
+        view = ElevationProfile.as_view(model=type(obj), profiles=profiles)
         self.sync_object_view(lang, obj, view, 'profile.json', zipfile=zipfile)
 
     def sync_profile_png(self, lang, obj, zipfile=None):
@@ -354,9 +629,13 @@ class Command(BaseCommand):
                 self.stdout.write("\x1b[36m{lang}\x1b[0m \x1b[1m{url}/{name}\x1b[0m \x1b[31mfile does not exist\x1b[0m".format(lang=lang, url=url, name=name))
             return
         if not os.path.isfile(dst):
-            os.link(src, dst)
+            try:
+                os.link(src, dst)
+            except FileExistsError:  # Linked meanwhile by another worker
+                pass
         if zipfile:
             zipfile.write(dst, os.path.join(url, name))
+        self.record_file(os.path.join(url, name), zipfile)
         if self.verbosity == 2:
             self.stdout.write("\x1b[36m{lang}\x1b[0m \x1b[1m{url}/{name}\x1b[0m \x1b[32mcopied\x1b[0m".format(lang=lang, url=url, name=name))
 
@@ -385,8 +664,6 @@ class Command(BaseCommand):
         self.mkdirs(zipfullname)
         self.trek_zipfile = ZipFile(zipfullname, 'w')
 
-        self.sync_json(lang, ParametersView, 'parameters', zipfile=self.zipfile)
-        self.sync_json(lang, ThemeViewSet, 'themes', as_view_args=[{'get': 'list'}], zipfile=self.zipfile)
         self.sync_trek_pois(lang, trek, zipfile=self.zipfile)
         if self.with_infrastructures:
             self.sync_trek_infrastructures(lang, trek)
@@ -397,13 +674,13 @@ class Command(BaseCommand):
         self.sync_kml(lang, trek)
         self.sync_trek_meta(lang, trek)
         self.sync_pdf(lang, trek, TrekDocumentPublic.as_view(model=type(trek)))
-        self.sync_profile_json(lang, trek)
+        self.sync_profile_json(lang, trek, profiles=self.trek_profiles)
         if not self.skip_profile_png:
             self.sync_profile_png(lang, trek, zipfile=self.zipfile)
         self.sync_dem(lang, trek)
         for desk in trek.information_desks.all():
             self.sync_media_file(lang, desk.thumbnail, zipfile=self.trek_zipfile)
-        for poi in trek.published_pois:
+        for poi in self.iter_objects(trek.published_pois):
             self.sync_poi_media(lang, poi)
         self.sync_media_file(lang, trek.thumbnail, zipfile=self.zipfile)
         for picture, resized in trek.resized_pictures:
@@ -423,8 +700,64 @@ class Command(BaseCommand):
                               ending="")
 
         self.close_zip(self.trek_zipfile, zipname)
+        self.record_file(zipname)
+
+    def part_zipname(self, lang, pk):
+        return os.path.join(self.state_root, 'parts', lang, '{pk}.zip'.format(pk=pk))
+
+    def sync_trek_unit(self, lang, trek):
+        """Sync a trek, writing its part of the global zip file in a separate
+        zip file, merged into global zip by ``close_zip()``.
+        """
+        global_zipfile = self.zipfile
+        part_zipname = self.part_zipname(lang, trek.pk)
+        self.mkdirs(part_zipname)
+        self.zipfile = ZipFile(part_zipname, 'w')
+        try:
+            return self.sync_unit('trek {} {}'.format(lang, trek.pk), self.trek_version(trek),
+                                  self.sync_trek, lang, trek)
+        finally:
+            self.zipfile.close()
+            self.zipfile = global_zipfile
+
+    def sync_treks(self, lang, treks):
+        pks = []
+        for pk in treks.values_list('pk', flat=True):
+            if pk not in pks:
+                pks.append(pk)
+        units = [(lang, pk) for pk in pks if 'trek {} {}'.format(lang, pk) not in self.done]
+
+        if self.jobs > 1 and len(units) > 1:
+            global _worker_command
+            _worker_command = self
+            # Forked workers must not share database connections
+            connections.close_all()
+            pool = multiprocessing.get_context('fork').Pool(self.jobs)
+            try:
+                for lang, pk, successfull, record in pool.imap_unordered(_sync_trek_worker, units):
+                    self.successfull &= successfull
+                    self.checkpoint('trek {} {}'.format(lang, pk), record)
+            finally:
+                pool.terminate()
+                pool.join()
+        else:
+            treks = trekking_models.Trek.objects.filter(pk__in=[pk for lang, pk in units]).order_by('pk')
+            for trek in self.iter_objects(treks.select_related('practice'), 'information_desks'):
+                record = self.sync_trek_unit(lang, trek)
+                self.checkpoint('trek {} {}'.format(lang, trek.pk), record)
+
+        return [self.part_zipname(lang, pk) for pk in pks]
+
+    def close_zip(self, zipfile, name, parts=None):
+        for part_zipname in parts or []:
+            if not os.path.isfile(part_zipname):
+                continue
+            with ZipFile(part_zipname, 'r') as part_zipfile:
+                names = set(zipfile.namelist())
+                for zi in part_zipfile.infolist():
+                    if zi.filename not in names:
+                        zipfile.writestr(zi, part_zipfile.read(zi))
 
-    def close_zip(self, zipfile, name):
         oldzipfilename = os.path.join(self.dst_root, name)
         zipfilename = os.path.join(self.tmp_root, name)
         try:
@@ -466,6 +799,8 @@ class Command(BaseCommand):
         self.zipfile = ZipFile(zipfullname, 'w')
 
         self.sync_geojson(lang, TrekViewSet, 'treks.geojson', zipfile=self.zipfile)
+        self.sync_json(lang, ParametersView, 'parameters', zipfile=self.zipfile)
+        self.sync_json(lang, ThemeViewSet, 'themes', as_view_args=[{'get': 'list'}], zipfile=self.zipfile)
         self.sync_geojson(lang, POIViewSet, 'pois.geojson')
         if self.with_infrastructures:
             self.sync_geojson(lang, InfrastructureViewSet, 'infrastructures.geojson')
@@ -511,8 +846,10 @@ class Command(BaseCommand):
         if self.portal:
             treks = treks.filter(Q(portal__name__in=self.portal) | Q(portal=None))
 
-        for trek in treks:
-            self.sync_trek(lang, trek)
+        # Compute elevation profiles of all treks in one query
+        self.trek_profiles = AltimetryHelper.elevation_profiles_of_queryset(treks)
+
+        parts = self.sync_treks(lang, treks)
 
         if self.with_dives:
             self.sync_dives(lang)
@@ -526,7 +863,7 @@ class Command(BaseCommand):
         if self.verbosity == 2:
             self.stdout.write("\x1b[36m{lang}\x1b[0m \x1b[1m{name}\x1b[0m ...".format(lang=lang, name=zipname), ending="")
 
-        self.close_zip(self.zipfile, zipname)
+        self.close_zip(self.zipfile, zipname, parts=parts)
 
     def sync_tiles(self):
         if not self.skip_tiles:
@@ -542,7 +879,8 @@ class Command(BaseCommand):
                     }
                 )
 
-            self.sync_global_tiles()
+            if 'tiles global' not in self.done:
+                self.sync_global_tiles()
 
             if self.celery_task:
                 self.celery_task.update_state(
@@ -563,6 +901,8 @@ class Command(BaseCommand):
                 treks = treks.filter(Q(portal__name__in=self.portal) | Q(portal=None))
 
             for trek in treks:
+                if 'tiles {pk}'.format(pk=trek.pk) in self.done:
+                    continue
                 if trek.any_published or any([parent.any_published for parent in trek.parents]):
                     self.sync_trek_tiles(trek)
 
@@ -591,7 +931,10 @@ class Command(BaseCommand):
             src = os.path.join(settings.MEDIA_ROOT, path)
             dst = os.path.join(self.tmp_root, 'api', lang, '{modelname}s'.format(modelname=modelname), str(obj.pk), obj.slug + '.pdf')
             self.mkdirs(dst)
+            if os.path.isfile(dst):  # Resumed sync
+                os.unlink(dst)
             os.link(src, dst)
+            self.record_file(os.path.relpath(dst, self.tmp_root))
             if self.verbosity == 2:
                 self.stdout.write("\x1b[36m{lang}\x1b[0m \x1b[1m{dst}\x1b[0m \x1b[32mcopied\x1b[0m".format(lang=lang, dst=dst))
         elif settings.ONLY_EXTERNAL_PUBLIC_PDF:
@@ -623,7 +966,7 @@ class Command(BaseCommand):
         self.sync_dive_services(lang, dive)
         for picture, resized in dive.resized_pictures:
             self.sync_media_file(lang, resized)
-        for poi in dive.published_pois:
+        for poi in self.iter_objects(dive.published_pois):
             if poi.resized_pictures:
                 self.sync_media_file(lang, poi.resized_pictures[0][1])
             for picture, resized in poi.resized_pictures[1:]:
@@ -671,7 +1014,7 @@ class Command(BaseCommand):
         if self.portal:
             dives = dives.filter(Q(portal__name__in=self.portal) | Q(portal=None))
 
-        for dive in dives:
+        for dive in self.iter_objects(dives):
             self.sync_dive(lang, dive)
 
     def sync_tourism(self, lang):
@@ -712,8 +1055,11 @@ class Command(BaseCommand):
         if self.portal:
             contents = contents.filter(Q(portal__name__in=self.portal) | Q(portal=None))
 
-        for content in contents:
-            self.sync_content(lang, content)
+        for content in self.iter_objects(contents):
+            unit = 'touristiccontent {} {}'.format(lang, content.pk)
+            if unit not in self.done:
+                record = self.sync_unit(unit, self.object_version(content), self.sync_content, lang, content)
+                self.checkpoint(unit, record)
 
         events = tourism_models.TouristicEvent.objects.existing().order_by('pk')
         events = events.filter(**{'published_{lang}'.format(lang=lang): True})
@@ -724,8 +1070,11 @@ class Command(BaseCommand):
         if self.portal:
             events = events.filter(Q(portal__name__in=self.portal) | Q(portal=None))
 
-        for event in events:
-            self.sync_event(lang, event)
+        for event in self.iter_objects(events):
+            unit = 'touristicevent {} {}'.format(lang, event.pk)
+            if unit not in self.done:
+                record = self.sync_unit(unit, self.object_version(event), self.sync_event, lang, event)
+                self.checkpoint(unit, record)
 
         # Information desks
         self.sync_geojson(lang, tourism_views.InformationDeskViewSet, 'information_desks.geojson')
@@ -745,7 +1094,7 @@ class Command(BaseCommand):
         name = os.path.join('api', lang, 'treks', str(trek.pk), 'touristiccontents.geojson')
         self.sync_view(lang, view, name, params=params, zipfile=zipfile, pk=trek.pk)
 
-        for content in trek.touristic_contents.all():
+        for content in self.iter_objects(trek.touristic_contents):
             self.sync_touristiccontent_media(lang, content, zipfile=self.trek_zipfile)
 
     def sync_trek_touristicevents(self, lang, trek, zipfile=None):
@@ -756,7 +1105,7 @@ class Command(BaseCommand):
         name = os.path.join('api', lang, 'treks', str(trek.pk), 'touristicevents.geojson')
         self.sync_view(lang, view, name, params=params, zipfile=zipfile, pk=trek.pk)
 
-        for event in trek.touristic_events.all():
+        for event in self.iter_objects(trek.touristic_events):
             self.sync_touristicevent_media(lang, event, zipfile=self.trek_zipfile)
 
     def sync_dive_touristiccontents(self, lang, dive):
@@ -769,7 +1118,7 @@ class Command(BaseCommand):
         name = os.path.join('api', lang, 'dives', str(dive.pk), 'touristiccontents.geojson')
         self.sync_view(lang, view, name, params=params, pk=dive.pk)
 
-        for content in dive.touristic_contents.all():
+        for content in self.iter_objects(dive.touristic_contents):
             self.sync_touristiccontent_media(lang, content)
 
     def sync_dive_touristicevents(self, lang, dive):
@@ -780,7 +1129,7 @@ class Command(BaseCommand):
         name = os.path.join('api', lang, 'dives', str(dive.pk), 'touristicevents.geojson')
         self.sync_view(lang, view, name, params=params, pk=dive.pk)
 
-        for event in dive.touristic_events.all():
+        for event in self.iter_objects(dive.touristic_events):
             self.sync_touristicevent_media(lang, event)
 
     def sync_touristicevent_media(self, lang, event, zipfile=None):
@@ -828,7 +1177,7 @@ class Command(BaseCommand):
         if not os.path.exists(self.dst_root):
             return
         existing = set([os.path.basename(p) for p in os.listdir(self.dst_root)])
-        remaining = existing - set(('api', 'media', 'meta', 'static', 'zip'))
+        remaining = existing - set(('api', 'media', 'meta', 'static', 'zip', self.manifest_name))
         if remaining:
             raise CommandError("Destination directory contains extra data")
 
@@ -879,6 +1228,9 @@ class Command(BaseCommand):
         self.with_signages = options.get('with_signages', False)
         self.with_infrastructures = options.get('with_infrastructures', False)
         self.with_dives = options.get('with_dives', False)
+        self.jobs = options.get('jobs') or 1
+        self.resume = options.get('resume', False)
+        self.incremental = options.get('incremental', False)
         self.celery_task = options.get('task', None)
 
         if self.source is not None:
@@ -901,15 +1253,30 @@ class Command(BaseCommand):
             'tiles_dir': os.path.join(settings.DEPLOY_ROOT, 'var', 'tiles'),
         }
         self.tmp_root = os.path.join(os.path.dirname(self.dst_root), 'tmp_sync_rando')
+        # Sync state (checkpoint, parts of global zip files), removed at the end
+        self.state_root = os.path.join(self.tmp_root, '.sync_rando')
+        self.checkpoint_path = os.path.join(self.state_root, 'checkpoint')
         try:
             os.mkdir(self.tmp_root)
         except OSError as e:
             if e.errno != 17:
                 raise
-            raise CommandError(
-                "The {}/ directory already exists. Please check no other sync_rando command is already running."
-                " If not, please delete this directory.".format(self.tmp_root)
-            )
+            if not (self.resume and os.path.isfile(self.checkpoint_path)):
+                raise CommandError(
+                    "The {}/ directory already exists. Please check no other sync_rando command is already running."
+                    " If not, please delete this directory.".format(self.tmp_root)
+                )
+        self.manifest_options = {
+            'url': self.referer, 'rando_url': self.rando_url, 'source': self.source, 'portal': self.portal,
+            'skip_pdf': self.skip_pdf, 'skip_dem': self.skip_dem, 'skip_profile_png': self.skip_profile_png,
+            'with_events': self.with_events, 'categories': self.categories, 'with_signages': self.with_signages,
+            'with_infrastructures': self.with_infrastructures, 'with_dives': self.with_dives,
+        }
+        self.manifest = {}
+        self.unit_files = self.unit_zip_names = None
+        self.load_manifest()
+        self.mkdirs(self.checkpoint_path)
+        self.load_checkpoint()
         try:
             self.sync()
             if self.celery_task:
@@ -923,9 +1290,12 @@ class Command(BaseCommand):
                     }
                 )
         except Exception:
-            shutil.rmtree(self.tmp_root)
+            if not self.resume:
+                shutil.rmtree(self.tmp_root)
             raise
 
+        self.write_manifest()
+        shutil.rmtree(self.state_root)
         self.rename_root()
 
         done_message = 'Done'
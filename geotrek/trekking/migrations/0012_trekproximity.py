@@ -0,0 +1,31 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trekking', '0011_auto_20191210_0921'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrekProximity',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('table', models.CharField(db_column='table_objet', max_length=64)),
+                ('object_id', models.IntegerField(db_column='objet')),
+                ('distance', models.FloatField()),
+                ('position', models.FloatField(null=True)),
+                ('date_update', models.DateTimeField(db_column='date_calcul')),
+                ('trek', models.ForeignKey(db_column='itineraire', on_delete=django.db.models.deletion.CASCADE, related_name='proximities', to='trekking.Trek')),
+            ],
+            options={
+                'db_table': 'o_r_itineraire_proximite',
+            },
+        ),
+        migrations.AlterIndexTogether(
+            name='trekproximity',
+            index_together=set([('trek', 'table'), ('table', 'object_id')]),
+        ),
+    ]
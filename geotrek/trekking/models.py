@@ -366,6 +366,26 @@ class Trek(StructureRelated, PicturesMixin, PublishableMixin, MapEntityMixin, To
         else:
             return settings.TOURISM_INTERSECTION_MARGIN
 
+    # Nearby objects are read from TrekProximity instead of intersecting()
+
+    @property
+    def touristic_contents(self):
+        model = tourism_models.TouristicContent
+        return self.proximities.near(model, self.distance(model))
+
+    @property
+    def published_touristic_contents(self):
+        return self.touristic_contents.filter(published=True)
+
+    @property
+    def touristic_events(self):
+        model = tourism_models.TouristicEvent
+        return self.proximities.near(model, self.distance(model))
+
+    @property
+    def published_touristic_events(self):
+        return self.touristic_events.filter(published=True)
+
     def is_public(self):
         for parent in self.parents:
             if parent.any_published:
@@ -451,6 +471,39 @@ tourism_models.TouristicEvent.add_property('treks', lambda self: intersecting(Tr
 tourism_models.TouristicEvent.add_property('published_treks', lambda self: intersecting(Trek, self).filter(published=True), _("Published treks"))
 
 
+class TrekProximityManager(models.Manager):
+    def near(self, model, distance=None):
+        """
+        Instances of ``model`` close to treks of this queryset (use with
+        ``trek.proximities``), within ``distance`` if specified.
+        """
+        qs = self.filter(table=model._meta.db_table)
+        if distance is not None:
+            qs = qs.filter(distance__lte=distance)
+        return model.objects.existing().filter(pk__in=qs.values('object_id'))
+
+
+class TrekProximity(models.Model):
+    """
+    Touristic contents, touristic events and sensitive areas close to treks
+    (within practice distance, ``TOURISM_INTERSECTION_MARGIN`` or
+    ``SENSITIVE_AREA_INTERSECTION_MARGIN``), maintained by triggers (see
+    ``sql/40_proximite.sql``).
+    """
+    trek = models.ForeignKey(Trek, related_name='proximities', db_column='itineraire')
+    table = models.CharField(max_length=64, db_column='table_objet')
+    object_id = models.IntegerField(db_column='objet')
+    distance = models.FloatField()
+    position = models.FloatField(null=True)  # Along trek (first closest point)
+    date_update = models.DateTimeField(db_column='date_calcul')
+
+    objects = TrekProximityManager()
+
+    class Meta:
+        db_table = 'o_r_itineraire_proximite'
+        index_together = [['trek', 'table'], ['table', 'object_id']]
+
+
 class TrekRelationshipManager(models.Manager):
     use_for_related_fields = True
 
@@ -0,0 +1,165 @@
+-------------------------------------------------------------------------------
+-- Objects close to treks (see TrekProximity model)
+-------------------------------------------------------------------------------
+
+-- Refresh proximities of treks whose id is in itineraires (all if NULL) with
+-- objects of table_objet (all objects tables if NULL) whose id is in objets
+-- (all if NULL).
+CREATE OR REPLACE FUNCTION rando.proximite(itineraires integer[], table_objet varchar DEFAULT NULL, objets integer[] DEFAULT NULL) RETURNS void SECURITY DEFINER AS $$
+DECLARE
+    o record;
+BEGIN
+    -- Margin is the trek practice distance if NULL
+    FOR o IN SELECT * FROM (VALUES ('t_t_contenu_touristique', NULL::float),
+                                   ('t_t_evenement_touristique', NULL::float),
+                                   ('s_t_zone_sensible', {{SENSITIVE_AREA_INTERSECTION_MARGIN}}::float))
+                           AS v(table_name, margin)
+             WHERE (table_objet IS NULL OR table_name = table_objet) AND to_regclass(table_name) IS NOT NULL
+    LOOP
+        DELETE FROM o_r_itineraire_proximite p
+        WHERE p.table_objet = o.table_name
+          AND (itineraires IS NULL OR p.itineraire = ANY(itineraires)) AND (objets IS NULL OR p.objet = ANY(objets));
+
+        EXECUTE '
+            INSERT INTO o_r_itineraire_proximite (itineraire, table_objet, objet, distance, position, date_calcul)
+            SELECT i.evenement, $1, o.id, ST_Distance(e.geom, o.geom),
+                   CASE WHEN GeometryType(e.geom) = ''LINESTRING'' THEN
+                       ST_LineLocatePoint(e.geom, ST_ClosestPoint(e.geom, o.geom))
+                   END,
+                   now()
+            FROM o_t_itineraire i
+            JOIN e_t_evenement e ON e.id = i.evenement
+            LEFT JOIN o_b_pratique pr ON pr.id = i.pratique
+            JOIN ' || quote_ident(o.table_name) || ' o ON ST_DWithin(e.geom, o.geom, COALESCE($2, pr.distance, {{TOURISM_INTERSECTION_MARGIN}}))
+            WHERE NOT e.supprime AND NOT o.supprime
+              AND ($3 IS NULL OR i.evenement = ANY($3)) AND ($4 IS NULL OR o.id = ANY($4))'
+            USING o.table_name, o.margin, itineraires, objets;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-------------------------------------------------------------------------------
+-- Sync when treks are modified
+-------------------------------------------------------------------------------
+
+CREATE OR REPLACE FUNCTION rando.proximite_itineraire_iu() RETURNS trigger SECURITY DEFINER AS $$
+BEGIN
+    -- Geometry and deletion are stored in e_t_evenement, practice in o_t_itineraire
+    IF TG_TABLE_NAME = 'e_t_evenement' THEN
+        PERFORM rando.proximite(ARRAY[NEW.id]);
+    ELSE
+        PERFORM rando.proximite(ARRAY[NEW.evenement]);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION rando.proximite_itineraire_d() RETURNS trigger SECURITY DEFINER AS $$
+BEGIN
+    DELETE FROM o_r_itineraire_proximite WHERE itineraire = OLD.evenement;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION rando.proximite_pratique_u() RETURNS trigger SECURITY DEFINER AS $$
+BEGIN
+    PERFORM rando.proximite(ARRAY(SELECT evenement FROM o_t_itineraire WHERE pratique = NEW.id));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS e_t_evenement_proximite_iu_tgr ON e_t_evenement;
+CREATE TRIGGER e_t_evenement_proximite_iu_tgr
+AFTER UPDATE OF geom, supprime ON e_t_evenement
+FOR EACH ROW WHEN (NEW.kind = 'TREK') EXECUTE PROCEDURE rando.proximite_itineraire_iu();
+
+DROP TRIGGER IF EXISTS o_t_itineraire_proximite_iu_tgr ON o_t_itineraire;
+CREATE TRIGGER o_t_itineraire_proximite_iu_tgr
+AFTER INSERT OR UPDATE OF pratique ON o_t_itineraire
+FOR EACH ROW EXECUTE PROCEDURE rando.proximite_itineraire_iu();
+
+DROP TRIGGER IF EXISTS o_t_itineraire_proximite_d_tgr ON o_t_itineraire;
+CREATE TRIGGER o_t_itineraire_proximite_d_tgr
+AFTER DELETE ON o_t_itineraire
+FOR EACH ROW EXECUTE PROCEDURE rando.proximite_itineraire_d();
+
+DROP TRIGGER IF EXISTS o_b_pratique_proximite_u_tgr ON o_b_pratique;
+CREATE TRIGGER o_b_pratique_proximite_u_tgr
+AFTER UPDATE OF distance ON o_b_pratique
+FOR EACH ROW EXECUTE PROCEDURE rando.proximite_pratique_u();
+
+
+-------------------------------------------------------------------------------
+-- Sync when nearby objects are modified
+-------------------------------------------------------------------------------
+
+CREATE OR REPLACE FUNCTION rando.proximite_objet_iu() RETURNS trigger SECURITY DEFINER AS $$
+BEGIN
+    PERFORM rando.proximite(NULL, TG_TABLE_NAME, ARRAY[NEW.id]);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION rando.proximite_objet_d() RETURNS trigger SECURITY DEFINER AS $$
+BEGIN
+    DELETE FROM o_r_itineraire_proximite WHERE table_objet = TG_TABLE_NAME AND objet = OLD.id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS t_t_contenu_touristique_proximite_iu_tgr ON t_t_contenu_touristique;
+CREATE TRIGGER t_t_contenu_touristique_proximite_iu_tgr
+AFTER INSERT OR UPDATE OF geom, supprime ON t_t_contenu_touristique
+FOR EACH ROW EXECUTE PROCEDURE rando.proximite_objet_iu();
+
+DROP TRIGGER IF EXISTS t_t_contenu_touristique_proximite_d_tgr ON t_t_contenu_touristique;
+CREATE TRIGGER t_t_contenu_touristique_proximite_d_tgr
+AFTER DELETE ON t_t_contenu_touristique
+FOR EACH ROW EXECUTE PROCEDURE rando.proximite_objet_d();
+
+DROP TRIGGER IF EXISTS t_t_evenement_touristique_proximite_iu_tgr ON t_t_evenement_touristique;
+CREATE TRIGGER t_t_evenement_touristique_proximite_iu_tgr
+AFTER INSERT OR UPDATE OF geom, supprime ON t_t_evenement_touristique
+FOR EACH ROW EXECUTE PROCEDURE rando.proximite_objet_iu();
+
+DROP TRIGGER IF EXISTS t_t_evenement_touristique_proximite_d_tgr ON t_t_evenement_touristique;
+CREATE TRIGGER t_t_evenement_touristique_proximite_d_tgr
+AFTER DELETE ON t_t_evenement_touristique
+FOR EACH ROW EXECUTE PROCEDURE rando.proximite_objet_d();
+
+-- Sensitivity is an optional application
+DO $$
+BEGIN
+    IF to_regclass('s_t_zone_sensible') IS NOT NULL THEN
+        DROP TRIGGER IF EXISTS s_t_zone_sensible_proximite_iu_tgr ON s_t_zone_sensible;
+        CREATE TRIGGER s_t_zone_sensible_proximite_iu_tgr
+        AFTER INSERT OR UPDATE OF geom, supprime ON s_t_zone_sensible
+        FOR EACH ROW EXECUTE PROCEDURE rando.proximite_objet_iu();
+
+        DROP TRIGGER IF EXISTS s_t_zone_sensible_proximite_d_tgr ON s_t_zone_sensible;
+        CREATE TRIGGER s_t_zone_sensible_proximite_d_tgr
+        AFTER DELETE ON s_t_zone_sensible
+        FOR EACH ROW EXECUTE PROCEDURE rando.proximite_objet_d();
+    END IF;
+END;
+$$;
+
+
+-------------------------------------------------------------------------------
+-- Initial computation, and whenever margins settings change
+-------------------------------------------------------------------------------
+
+-- Margins used are stored as comment of the table
+DO $$
+DECLARE
+    margins varchar := 'tourism=' || {{TOURISM_INTERSECTION_MARGIN}}::float
+                    || ' sensitive_area=' || {{SENSITIVE_AREA_INTERSECTION_MARGIN}}::float;
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM o_r_itineraire_proximite)
+       OR obj_description('o_r_itineraire_proximite'::regclass, 'pg_class') IS DISTINCT FROM margins THEN
+        PERFORM rando.proximite(NULL);
+        EXECUTE 'COMMENT ON TABLE o_r_itineraire_proximite IS ' || quote_literal(margins);
+    END IF;
+END;
+$$;
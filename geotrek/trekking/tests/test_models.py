@@ -1,3 +1,4 @@
+from django.apps import apps
 from django.test import TestCase
 from django.contrib.gis.geos import (LineString, Polygon, MultiPolygon,
                                      MultiLineString, MultiPoint, Point)
@@ -9,11 +10,13 @@ from unittest import skipIf
 from bs4 import BeautifulSoup
 
 from geotrek.common.tests import TranslationResetMixin
+from geotrek.common.utils.postgresql import load_sql_files
 from geotrek.core.factories import PathFactory
+from geotrek.tourism.factories import TouristicContentFactory
 from geotrek.zoning.factories import DistrictFactory, CityFactory
 from geotrek.trekking.factories import (POIFactory, TrekFactory,
                                         TrekWithPOIsFactory, ServiceFactory)
-from geotrek.trekking.models import Trek, OrderedTrekChild
+from geotrek.trekking.models import Trek, OrderedTrekChild, TrekProximity
 
 
 class TrekTest(TranslationResetMixin, TestCase):
@@ -466,6 +469,55 @@ class TrekItinerancyTest(TestCase):
         self.assertEqual(list(trekC.children_id), [trekA.id])
 
 
+class TrekProximityTest(TestCase):
+    def setUp(self):
+        if settings.TREKKING_TOPOLOGY_ENABLED:
+            path = PathFactory.create(geom=LineString((0, 0), (1000, 0)))
+            self.trek = TrekFactory.create(no_path=True)
+            self.trek.add_path(path)
+        else:
+            self.trek = TrekFactory.create(geom=LineString((0, 0), (1000, 0)))
+        self.trek.practice.distance = 100
+        self.trek.practice.save()
+
+    def test_proximity_follows_geometries(self):
+        content = TouristicContentFactory.create(geom=Point(250, 50, srid=settings.SRID))
+        proximity = self.trek.proximities.get()
+        self.assertEqual((proximity.table, proximity.object_id), ('t_t_contenu_touristique', content.pk))
+        self.assertAlmostEqual(proximity.distance, 50)
+        self.assertAlmostEqual(proximity.position, 0.25)
+        content.geom = Point(250, 150, srid=settings.SRID)
+        content.save()
+        self.assertFalse(self.trek.proximities.exists())
+        self.trek.practice.distance = 200
+        self.trek.practice.save()
+        self.assertEqual(list(self.trek.touristic_contents), [content])
+        content.delete()
+        self.assertEqual(list(self.trek.touristic_contents), [])
+
+    def test_deleted_trek(self):
+        TouristicContentFactory.create(geom=Point(250, 50, srid=settings.SRID))
+        self.trek.delete()
+        self.assertFalse(TrekProximity.objects.filter(trek=self.trek).exists())
+
+    def test_margin_setting_changed(self):
+        self.trek.practice.distance = None
+        self.trek.practice.save()
+        content = TouristicContentFactory.create(geom=Point(250, 150, srid=settings.SRID))
+        self.assertEqual(list(self.trek.touristic_contents), [content])
+        with override_settings(TOURISM_INTERSECTION_MARGIN=100):
+            load_sql_files(apps.get_app_config('trekking'))
+            self.assertFalse(self.trek.proximities.exists())
+        load_sql_files(apps.get_app_config('trekking'))
+        self.assertEqual(list(self.trek.touristic_contents), [content])
+
+    def test_touristic_contents_with_one_query(self):
+        content = TouristicContentFactory.create(geom=Point(250, 50, srid=settings.SRID))
+        TouristicContentFactory.create(geom=Point(250, 50, srid=settings.SRID), published=False)
+        with self.assertNumQueries(1):
+            self.assertEqual(list(self.trek.published_touristic_contents), [content])
+
+
 class MapImageExtentTest(TestCase):
     def setUp(self):
         self.trek = TrekFactory.create(
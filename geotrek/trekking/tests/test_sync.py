@@ -4,11 +4,14 @@ import json
 from landez.sources import DownloadError
 from unittest import mock
 import shutil
-from io import StringIO
+from io import BytesIO, StringIO
+import tempfile
 import zipfile
 
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase
 from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.gis.geos import LineString, MultiLineString
 from django.core import management
 from django.core.management.base import CommandError
 from django.http import HttpResponse, StreamingHttpResponse
@@ -21,9 +24,11 @@ from geotrek.diving.models import Dive
 from geotrek.infrastructure.factories import InfrastructureFactory
 from geotrek.sensitivity.factories import SensitiveAreaFactory, SportPracticeFactory
 from geotrek.signage.factories import SignageFactory
+from geotrek.trekking.management.commands.sync_rando import Command, ZipTilesBuilder, tile_x, tile_y, tile_lat
 from geotrek.trekking.factories import POIFactory, PracticeFactory as PracticeTrekFactory, TrekFactory, TrekWithPublishedPOIsFactory
 from geotrek.trekking import models as trek_models
 from geotrek.tourism.factories import InformationDeskFactory, TouristicContentFactory, TouristicEventFactory
+from geotrek.tourism.models import TouristicContent
 
 
 class SyncRandoTilesTest(TestCase):
@@ -103,6 +108,71 @@ class SyncRandoTilesTest(TestCase):
         shutil.rmtree('tmp')
 
 
+class ZipTilesBuilderTest(TestCase):
+    def setUp(self):
+        self.tiles_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tiles_dir)
+
+    def build(self):
+        output = BytesIO()
+        zfile = zipfile.ZipFile(output, 'w')
+        builder = ZipTilesBuilder(zfile, tiles_url='http://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png',
+                                  tiles_dir=self.tiles_dir, ignore_errors=True)
+        builder.tiles = set([(9, 258, 199), (9, 258, 200)])
+        builder.run()
+        zfile.close()
+        return zipfile.ZipFile(output)
+
+    @mock.patch('landez.TilesManager.tile', return_value=b'I am a png')
+    def test_tiles_cached(self, mock_tiles):
+        self.build()
+        zfile = self.build()
+        self.assertEqual(mock_tiles.call_count, 2)
+        self.assertEqual(zfile.read('9/258/199.png'), b'I am a png')
+
+    @override_settings(MOBILE_TILES_CACHE_TTL=-1)
+    @mock.patch('landez.TilesManager.tile', return_value=b'I am a png')
+    def test_tiles_cache_expired(self, mock_tiles):
+        self.build()
+        self.build()
+        self.assertEqual(mock_tiles.call_count, 4)
+
+    @mock.patch('landez.TilesManager.tile')
+    def test_tiles_retry(self, mock_tiles):
+        mock_tiles.side_effect = [DownloadError, DownloadError, b'I am a png', b'I am a png']
+        with override_settings(MOBILE_TILES_CONCURRENCY=1):
+            zfile = self.build()
+        self.assertEqual(zfile.read('9/258/199.png'), b'I am a png')
+        self.assertEqual(zfile.read('9/258/200.png'), b'I am a png')
+
+    def test_tile_coordinates(self):
+        self.assertEqual((tile_x(0.5, 1), tile_y(0.5, 1)), (1, 0))
+        self.assertEqual((tile_x(-0.5, 1), tile_y(-0.5, 1)), (0, 1))
+        self.assertEqual((tile_x(2.35, 9), tile_y(48.85, 9)), (259, 176))
+        self.assertAlmostEqual(tile_lat(1, 1), 0.0)
+
+    def test_geom_coverage_multilinestring(self):
+        builder = ZipTilesBuilder(zipfile.ZipFile(BytesIO(), 'w'),
+                                  tiles_url='http://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png')
+        geom = MultiLineString(LineString((3.0, 45.0), (3.01, 45.0)),
+                               LineString((4.0, 44.0), (4.01, 44.0)), srid=4326)
+        builder.add_geom_coverage(geom, 0.005, [14, 15])
+        self.assertIn((15, tile_x(3.005, 15), tile_y(45.0, 15)), builder.tiles)
+        self.assertIn((15, tile_x(4.005, 15), tile_y(44.0, 15)), builder.tiles)
+        self.assertIn((14, tile_x(4.005, 14), tile_y(44.0, 14)), builder.tiles)
+        self.assertNotIn((15, tile_x(3.5, 15), tile_y(44.5, 15)), builder.tiles)
+        # About 1.5 km x 1 km around each part
+        self.assertLess(len([tile for tile in builder.tiles if tile[0] == 15]), 100)
+
+    @mock.patch('landez.TilesManager.tile', side_effect=DownloadError)
+    def test_tiles_fail(self, mock_tiles):
+        zfile = self.build()
+        self.assertEqual(zfile.namelist(), [])
+        self.assertEqual(mock_tiles.call_count, 2 * (settings.MOBILE_TILES_RETRIES + 1))
+
+
 class SyncRandoFailTest(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -145,6 +215,13 @@ class SyncRandoFailTest(TestCase):
                                     skip_tiles=True, verbosity=2)
         shutil.rmtree(os.path.join('tmp_sync_rando'))
 
+    def test_fail_resume_without_checkpoint(self):
+        os.makedirs(os.path.join('tmp_sync_rando'))
+        with self.assertRaisesRegexp(CommandError, "The tmp_sync_rando/ directory already exists."):
+            management.call_command('sync_rando', 'tmp', url='http://localhost:8000',
+                                    skip_tiles=True, resume=True, verbosity=2)
+        shutil.rmtree(os.path.join('tmp_sync_rando'))
+
     @mock.patch('os.mkdir')
     def test_fail_sync_tmp_sync_rando_permission_denied(self, mkdir):
         mkdir.side_effect = OSError(errno.EACCES, 'Permission Denied')
@@ -209,6 +286,21 @@ class SyncRandoFailTest(TestCase):
         shutil.rmtree('tmp')
 
 
+class SyncRandoChunksTest(TestCase):
+    def test_iter_objects_loads_attachments_by_chunk(self):
+        contents = [TouristicContentFactory.create() for i in range(3)]
+        picture = AttachmentFactory.create(content_object=contents[0], attachment_file=get_dummy_uploaded_image())
+        AttachmentFactory.create(content_object=contents[2], attachment_file=get_dummy_uploaded_file())
+        ContentType.objects.get_for_model(TouristicContent)
+        command = Command()
+        command.chunk_size = 2
+        # One query for contents, one query for attachments of each chunk
+        with self.assertNumQueries(3):
+            objects = list(command.iter_objects(TouristicContent.objects.order_by('pk')))
+            self.assertEqual(objects, contents)
+            self.assertEqual([obj.pictures for obj in objects], [[picture], [], []])
+
+
 class SyncSetup(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -503,6 +595,92 @@ class SyncTest(SyncSetup):
             self.assertEqual(len(area['features']), 2)
 
 
+class SyncResumeTest(SyncSetup):
+    @mock.patch('geotrek.trekking.models.Trek.prepare_map_image')
+    def test_sync_global_zip_contains_treks_parts(self, prepare_map_image):
+        management.call_command('sync_rando', 'tmp', url='http://localhost:8000', skip_tiles=True, skip_pdf=True,
+                                languages='en', verbosity=0)
+        zfile = zipfile.ZipFile(os.path.join('tmp', 'zip', 'treks', 'en', 'global.zip'))
+        self.assertIn(os.path.join('api', 'en', 'parameters.json'), zfile.namelist())
+        self.assertIn(os.path.join('api', 'en', 'treks', str(self.trek_1.pk), 'pois.geojson'), zfile.namelist())
+        self.assertFalse(os.path.exists(os.path.join('tmp', '.sync_rando')))
+
+    @mock.patch('geotrek.trekking.models.Trek.prepare_map_image')
+    def test_sync_resume(self, prepare_map_image):
+        os.makedirs(os.path.join('tmp_sync_rando', '.sync_rando'))
+        with open(os.path.join('tmp_sync_rando', '.sync_rando', 'checkpoint'), 'w') as f:
+            f.write('trek en {}\n'.format(self.trek_1.pk))
+        management.call_command('sync_rando', 'tmp', url='http://localhost:8000', skip_tiles=True, skip_pdf=True,
+                                languages='en', resume=True, verbosity=0)
+        self.assertFalse(os.path.exists(os.path.join('tmp', 'zip', 'treks', 'en', '{}.zip'.format(self.trek_1.pk))))
+        self.assertTrue(os.path.exists(os.path.join('tmp', 'zip', 'treks', 'en', '{}.zip'.format(self.trek_2.pk))))
+        self.assertFalse(os.path.exists('tmp_sync_rando'))
+
+
+class SyncIncrementalTest(SyncSetup):
+    @mock.patch('geotrek.trekking.models.Trek.prepare_map_image')
+    def test_sync_incremental(self, prepare_map_image):
+        management.call_command('sync_rando', 'tmp', url='http://localhost:8000', skip_tiles=True, skip_pdf=True,
+                                skip_profile_png=True, languages='en', verbosity=0)
+        with open(os.path.join('tmp', 'sync_rando.json')) as f:
+            manifest = json.load(f)
+        self.assertIn('trek en {}'.format(self.trek_1.pk), manifest['units'])
+        self.trek_2.save()
+        with mock.patch('geotrek.trekking.management.commands.sync_rando.Command.sync_trek') as sync_trek:
+            management.call_command('sync_rando', 'tmp', url='http://localhost:8000', skip_tiles=True, skip_pdf=True,
+                                    skip_profile_png=True, languages='en', incremental=True, verbosity=0)
+        self.assertEqual([args[1].pk for args, kwargs in sync_trek.call_args_list], [self.trek_2.pk])
+        self.assertTrue(os.path.exists(os.path.join('tmp', 'zip', 'treks', 'en', '{}.zip'.format(self.trek_1.pk))))
+        zfile = zipfile.ZipFile(os.path.join('tmp', 'zip', 'treks', 'en', 'global.zip'))
+        self.assertIn(os.path.join('api', 'en', 'treks', str(self.trek_1.pk), 'pois.geojson'), zfile.namelist())
+
+    @mock.patch('geotrek.trekking.models.Trek.prepare_map_image')
+    def test_sync_incremental_related_changed(self, prepare_map_image):
+        management.call_command('sync_rando', 'tmp', url='http://localhost:8000', skip_tiles=True, skip_pdf=True,
+                                skip_profile_png=True, languages='en', verbosity=0)
+        desk = self.trek_1.information_desks.get()
+        desk.name = 'Other desk'
+        desk.save()
+        with mock.patch('geotrek.trekking.management.commands.sync_rando.Command.sync_trek') as sync_trek:
+            management.call_command('sync_rando', 'tmp', url='http://localhost:8000', skip_tiles=True, skip_pdf=True,
+                                    skip_profile_png=True, languages='en', incremental=True, verbosity=0)
+        self.assertEqual([args[1].pk for args, kwargs in sync_trek.call_args_list], [self.trek_1.pk])
+
+    @mock.patch('geotrek.trekking.models.Trek.prepare_map_image')
+    def test_sync_incremental_options_changed(self, prepare_map_image):
+        management.call_command('sync_rando', 'tmp', url='http://localhost:8000', skip_tiles=True, skip_pdf=True,
+                                skip_profile_png=True, languages='en', verbosity=0)
+        with mock.patch('geotrek.trekking.management.commands.sync_rando.Command.sync_trek') as sync_trek:
+            management.call_command('sync_rando', 'tmp', url='http://localhost:8000', skip_tiles=True, skip_pdf=True,
+                                    skip_profile_png=True, languages='en', with_signages=True, incremental=True,
+                                    verbosity=0)
+        self.assertEqual(sync_trek.call_count, trek_models.Trek.objects.filter(published=True).count())
+
+
+class SyncJobsTest(TransactionTestCase):
+    def setUp(self):
+        if os.path.exists(os.path.join('tmp')):
+            shutil.rmtree(os.path.join('tmp'))
+        self.trek_1 = TrekWithPublishedPOIsFactory.create(published=True)
+        self.trek_2 = TrekFactory.create(published=True)
+
+    def tearDown(self):
+        if os.path.exists(os.path.join('tmp')):
+            shutil.rmtree(os.path.join('tmp'))
+
+    @mock.patch('geotrek.trekking.models.Trek.prepare_map_image')
+    def test_sync_jobs(self, prepare_map_image):
+        management.call_command('sync_rando', 'tmp', url='http://localhost:8000', skip_tiles=True, skip_pdf=True,
+                                skip_profile_png=True, languages='en', jobs=2, verbosity=0)
+        for trek in (self.trek_1, self.trek_2):
+            self.assertTrue(os.path.exists(os.path.join('tmp', 'zip', 'treks', 'en', '{}.zip'.format(trek.pk))))
+            self.assertTrue(os.path.exists(os.path.join('tmp', 'api', 'en', 'treks', str(trek.pk), 'pois.geojson')))
+        zfile = zipfile.ZipFile(os.path.join('tmp', 'zip', 'treks', 'en', 'global.zip'))
+        self.assertIn(os.path.join('api', 'en', 'treks', str(self.trek_1.pk), 'pois.geojson'), zfile.namelist())
+        self.assertIn(os.path.join('api', 'en', 'treks', str(self.trek_2.pk), 'pois.geojson'), zfile.namelist())
+        self.assertFalse(os.path.exists(os.path.join('tmp', '.sync_rando')))
+
+
 @mock.patch('geotrek.trekking.models.Trek.prepare_map_image')
 @mock.patch('geotrek.diving.models.Dive.prepare_map_image')
 @mock.patch('geotrek.tourism.models.TouristicContent.prepare_map_image')
@@ -108,6 +108,7 @@ class TrekJsonList(MapEntityJsonList, TrekList):
 
 
 class TrekFormatList(MapEntityFormat, TrekList):
+    queryset = Trek.objects.existing().prefetch_related('zones')
     columns = [
         'id', 'eid', 'eid2', 'structure', 'name', 'departure', 'arrival', 'duration',
         'duration_pretty', 'description', 'description_teaser',
@@ -395,7 +396,7 @@ class TrekViewSet(MapEntityViewSet):
         qs = qs.select_related('structure', 'difficulty', 'practice', 'route')
         qs = qs.prefetch_related(
             'networks', 'source', 'portal', 'web_links', 'accessibilities', 'themes', 'aggregations',
-            'information_desks', 'attachments',
+            'information_desks', Trek.pictures_prefetch(),
             Prefetch('trek_relationship_a', queryset=TrekRelationship.objects.select_related('trek_a', 'trek_b')),
             Prefetch('trek_relationship_b', queryset=TrekRelationship.objects.select_related('trek_a', 'trek_b')),
             Prefetch('trek_children', queryset=OrderedTrekChild.objects.select_related('parent', 'child')),
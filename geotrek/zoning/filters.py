@@ -6,7 +6,7 @@ from geotrek.signage.filters import SignageFilterSet
 from geotrek.maintenance.filters import InterventionFilterSet, ProjectFilterSet
 from geotrek.trekking.filters import TrekFilterSet, POIFilterSet
 from geotrek.tourism.filters import TouristicContentFilterSet, TouristicEventFilterSet
-from geotrek.zoning.models import City, District
+from geotrek.zoning.models import City, District, ZoneMembership
 
 
 class TopologyFilterCity(TopologyFilter):
@@ -43,19 +43,27 @@ add_edge_filters(TrailFilterSet)
 class IntersectionFilter(TopologyFilter):
     """Inherit from ``TopologyFilter``, just to make sure the widgets
     will be initialized the same way.
+
+    Intersections are read from zone memberships of objects, instead of
+    being computed against the zone geometry.
     """
+    membership_field = None
+
     def filter(self, qs, value):
         if not value:
             return qs
-        return qs.filter(geom__intersects=value.geom)
+        memberships = ZoneMembership.objects.filter(table=qs.model._meta.db_table, **{self.membership_field: value})
+        return qs.filter(pk__in=memberships.values('object_id'))
 
 
 class IntersectionFilterCity(IntersectionFilter):
     model = City
+    membership_field = 'city'
 
 
 class IntersectionFilterDistrict(IntersectionFilter):
     model = District
+    membership_field = 'district'
 
 
 TouristicContentFilterSet.add_filters({
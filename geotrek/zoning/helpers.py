@@ -0,0 +1,103 @@
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+
+
+def refresh_edges(paths=None, model=None, zones=None):
+    """
+    Recompute city, district and restricted area edges of ``paths`` (all paths
+    if None), with zones of ``model`` (all land layers if None) whose pk is in
+    ``zones`` (all zones if None).
+
+    Edges of all paths and zones are inserted at once (see
+    ``lien_auto_couches_sig`` in ``sql/10_couches_sig.sql``). When refreshing
+    zones, memberships of other objects are refreshed too (see
+    ``sql/30_appartenance.sql``).
+    """
+    if paths is not None:
+        paths = list(paths)
+        if not paths:
+            return
+    if zones is not None:
+        zones = [str(pk) for pk in zones]
+        if not zones:
+            return
+    layer = model._meta.db_table if model else None
+    cursor = connection.cursor()
+    cursor.execute("SELECT lien_auto_couches_sig(%s::integer[], %s, %s::varchar[])", [paths, layer, zones])
+    if paths is None:
+        cursor.execute("SELECT appartenance(NULL, NULL, %s, %s::varchar[])", [layer, zones])
+
+
+@contextmanager
+def deferred_edges(model):
+    """
+    Postpone the computation of edges while zones of ``model`` are written
+    inside this block.
+
+    Yields a set, in which pks of zones whose geometry changed are added:
+    their edges are refreshed all at once when leaving the block.
+    """
+    changed = set()
+    with transaction.atomic():
+        cursor = connection.cursor()
+        cursor.execute("SELECT set_config('geotrek.defer_zone_edges', 'on', true)")
+        yield changed
+        cursor.execute("SELECT set_config('geotrek.defer_zone_edges', 'off', true)")
+        refresh_edges(model=model, zones=changed)
+
+
+def linear_zoning(objects):
+    """
+    Return ``{object pk: {'cities': [codes], 'districts': [pks], 'departure_city':
+    code, 'arrival_city': code}}`` for linear ``objects`` (cities and districts
+    sorted by name, cities of extremities None if outside any city), with a
+    single query for all of them, made against zone pieces.
+    """
+    from geotrek.zoning.models import City, District, ZonePiece
+
+    objects = list(objects)
+    if not objects:
+        return {}
+    source = objects[0]._meta.get_field('geom')
+    context = {
+        'source_table': source.model._meta.db_table,
+        'source_pk': source.model._meta.pk.column,
+        'source_geom': source.column,
+        'city_table': City._meta.db_table,
+        'city_pk': City._meta.pk.column,
+        'city_name': City._meta.get_field('name').column,
+        'district_table': District._meta.db_table,
+        'district_pk': District._meta.pk.column,
+        'district_name': District._meta.get_field('name').column,
+        'piece_table': ZonePiece._meta.db_table,
+        'piece_city': ZonePiece._meta.get_field('city').column,
+        'piece_district': ZonePiece._meta.get_field('district').column,
+    }
+    sql = """
+        SELECT s.{source_pk},
+               ARRAY(SELECT c.{city_pk} FROM {city_table} AS c
+                     WHERE c.{city_pk} IN (SELECT p.{piece_city} FROM {piece_table} AS p
+                                           WHERE ST_Intersects(p.geom, s.{source_geom}))
+                     ORDER BY c.{city_name}, c.{city_pk}),
+               ARRAY(SELECT d.{district_pk} FROM {district_table} AS d
+                     WHERE d.{district_pk} IN (SELECT p.{piece_district} FROM {piece_table} AS p
+                                               WHERE ST_Intersects(p.geom, s.{source_geom}))
+                     ORDER BY d.{district_name}, d.{district_pk}),
+               (SELECT c.{city_pk} FROM {city_table} AS c
+                WHERE c.{city_pk} IN (SELECT p.{piece_city} FROM {piece_table} AS p
+                                      WHERE ST_Covers(p.geom, ST_StartPoint(s.{source_geom})))
+                ORDER BY c.{city_name} LIMIT 1),
+               (SELECT c.{city_pk} FROM {city_table} AS c
+                WHERE c.{city_pk} IN (SELECT p.{piece_city} FROM {piece_table} AS p
+                                      WHERE ST_Covers(p.geom, ST_EndPoint(s.{source_geom})))
+                ORDER BY c.{city_name} LIMIT 1)
+        FROM {source_table} AS s
+        WHERE s.{source_pk} = ANY(%s)
+    """
+    cursor = connection.cursor()
+    cursor.execute(sql.format(**context), [[obj.pk for obj in objects]])
+    return {
+        pk: {'cities': cities, 'districts': districts, 'departure_city': departure, 'arrival_city': arrival}
+        for pk, cities, districts, departure, arrival in cursor.fetchall()
+    }
@@ -5,6 +5,8 @@ from django.contrib.gis.geos.polygon import Polygon
 from django.contrib.gis.geos.collections import MultiPolygon
 from django.conf import settings
 
+from geotrek.zoning.helpers import deferred_edges
+
 
 class Command(BaseCommand):
     help = 'Load Cities from a file within the spatial extent\n'
@@ -35,36 +37,40 @@ class Command(BaseCommand):
         ds = DataSource(file_path, encoding=encoding)
         count_error = 0
 
-        for layer in ds:
-            for feat in layer:
-                try:
-                    geom = feat.geom.geos
-                    if not isinstance(geom, Polygon) and not isinstance(geom, MultiPolygon):
-                        if verbosity > 0:
-                            self.stdout.write("%s's geometry is not a polygon" % feat.get(name_column))
-                        break
-                    elif isinstance(geom, Polygon):
-                        geom = MultiPolygon(geom)
-                    self.check_srid(srid, geom)
-                    geom.dim = 2
-                    if geom.valid:
-                        if do_intersect and bbox.intersects(geom) or not do_intersect and geom.within(bbox):
-                            instance, created = City.objects.update_or_create(code=feat.get(code_column),
-                                                                              defaults={
-                                                                                  'name': feat.get(name_column),
-                                                                                  'geom': geom})
+        with deferred_edges(City) as changed:
+            for layer in ds:
+                for feat in layer:
+                    try:
+                        geom = feat.geom.geos
+                        if not isinstance(geom, Polygon) and not isinstance(geom, MultiPolygon):
+                            if verbosity > 0:
+                                self.stdout.write("%s's geometry is not a polygon" % feat.get(name_column))
+                            break
+                        elif isinstance(geom, Polygon):
+                            geom = MultiPolygon(geom)
+                        self.check_srid(srid, geom)
+                        geom.dim = 2
+                        if geom.valid:
+                            if do_intersect and bbox.intersects(geom) or not do_intersect and geom.within(bbox):
+                                previous = City.objects.filter(code=feat.get(code_column)).values_list('geom', flat=True).first()
+                                instance, created = City.objects.update_or_create(code=feat.get(code_column),
+                                                                                  defaults={
+                                                                                      'name': feat.get(name_column),
+                                                                                      'geom': geom})
+                                if created or not previous.equals_exact(geom):
+                                    changed.add(instance.pk)
+                                if verbosity > 0:
+                                    self.stdout.write("%s %s" % ('Created' if created else 'Updated', feat.get(name_column)))
+                        else:
                             if verbosity > 0:
-                                self.stdout.write("%s %s" % ('Created' if created else 'Updated', feat.get(name_column)))
-                    else:
-                        if verbosity > 0:
-                            self.stdout.write("%s's geometry is not valid" % feat.get(name_column))
-                except OGRIndexError:
-                    if count_error == 0:
-                        self.stdout.write(
-                            "Code's attribute or Name's attribute do not correspond with options\n"
-                            "Please, use --code and --name to fix it.\n"
-                            "Fields in your file are : %s" % ', '.join(layer.fields))
-                    count_error += 1
+                                self.stdout.write("%s's geometry is not valid" % feat.get(name_column))
+                    except OGRIndexError:
+                        if count_error == 0:
+                            self.stdout.write(
+                                "Code's attribute or Name's attribute do not correspond with options\n"
+                                "Please, use --code and --name to fix it.\n"
+                                "Fields in your file are : %s" % ', '.join(layer.fields))
+                        count_error += 1
 
     def check_srid(self, srid, geom):
         if not geom.srid:
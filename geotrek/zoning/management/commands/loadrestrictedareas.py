@@ -5,6 +5,8 @@ from django.contrib.gis.geos.polygon import Polygon
 from django.contrib.gis.geos.collections import MultiPolygon
 from django.conf import settings
 
+from geotrek.zoning.helpers import deferred_edges
+
 
 class Command(BaseCommand):
     help = 'Load Restricted Area from a file within the spatial extent\n'
@@ -38,36 +40,41 @@ class Command(BaseCommand):
         if verbosity > 0:
             self.stdout.write("RestrictedArea Type's %s created" % area_type_name if created else "Get %s" % area_type_name)
 
-        for layer in ds:
-            for feat in layer:
-                try:
-                    geom = feat.geom.geos
-                    if not isinstance(geom, Polygon) and not isinstance(geom, MultiPolygon):
-                        if verbosity > 0:
-                            self.stdout.write("%s's geometry is not a polygon" % feat.get(name_column))
-                        break
-                    elif isinstance(geom, Polygon):
-                        geom = MultiPolygon(geom)
-                    self.check_srid(srid, geom)
-                    geom.dim = 2
-                    if geom.valid:
-                        if do_intersect and bbox.intersects(geom) or not do_intersect and geom.within(bbox):
-                            instance, created = RestrictedArea.objects.update_or_create(name=feat.get(name_column),
-                                                                                        area_type=area_type,
-                                                                                        defaults={
-                                                                                            'geom': geom})
+        with deferred_edges(RestrictedArea) as changed:
+            for layer in ds:
+                for feat in layer:
+                    try:
+                        geom = feat.geom.geos
+                        if not isinstance(geom, Polygon) and not isinstance(geom, MultiPolygon):
+                            if verbosity > 0:
+                                self.stdout.write("%s's geometry is not a polygon" % feat.get(name_column))
+                            break
+                        elif isinstance(geom, Polygon):
+                            geom = MultiPolygon(geom)
+                        self.check_srid(srid, geom)
+                        geom.dim = 2
+                        if geom.valid:
+                            if do_intersect and bbox.intersects(geom) or not do_intersect and geom.within(bbox):
+                                previous = RestrictedArea.objects.filter(name=feat.get(name_column), area_type=area_type)
+                                previous = previous.values_list('geom', flat=True).first()
+                                instance, created = RestrictedArea.objects.update_or_create(name=feat.get(name_column),
+                                                                                            area_type=area_type,
+                                                                                            defaults={
+                                                                                                'geom': geom})
+                                if created or not previous.equals_exact(geom):
+                                    changed.add(instance.pk)
+                                if verbosity > 0:
+                                    self.stdout.write("%s %s" % ('Created' if created else 'Updated', feat.get(name_column)))
+                        else:
                             if verbosity > 0:
-                                self.stdout.write("%s %s" % ('Created' if created else 'Updated', feat.get(name_column)))
-                    else:
-                        if verbosity > 0:
-                            self.stdout.write("%s's geometry is not valid" % feat.get(name_column))
-                except OGRIndexError:
-                    if count_error == 0:
-                        self.stdout.write(
-                            "Name's attribute do not correspond with options\n"
-                            "Please, use --name to fix it.\n"
-                            "Fields in your file are : %s" % ', '.join(layer.fields))
-                    count_error += 1
+                                self.stdout.write("%s's geometry is not valid" % feat.get(name_column))
+                    except OGRIndexError:
+                        if count_error == 0:
+                            self.stdout.write(
+                                "Name's attribute do not correspond with options\n"
+                                "Please, use --name to fix it.\n"
+                                "Fields in your file are : %s" % ', '.join(layer.fields))
+                        count_error += 1
 
     def check_srid(self, srid, geom):
         if not geom.srid:
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from geotrek.zoning.helpers import refresh_edges
+from geotrek.zoning.models import City, District, RestrictedArea
+
+
+class Command(BaseCommand):
+    help = 'Recompute cities, districts and restricted areas of paths\n'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--paths', nargs='*', type=int, action='store', dest='paths',
+                            help="Ids of paths to refresh")
+        parser.add_argument('--cities', nargs='*', action='store', dest='cities',
+                            help="Codes of cities to refresh")
+        parser.add_argument('--districts', nargs='*', type=int, action='store', dest='districts',
+                            help="Ids of districts to refresh")
+        parser.add_argument('--restrictedareas', nargs='*', type=int, action='store', dest='restrictedareas',
+                            help="Ids of restricted areas to refresh")
+
+    def handle(self, *args, **options):
+        verbosity = options.get('verbosity')
+        zones = [(City, options.get('cities')),
+                 (District, options.get('districts')),
+                 (RestrictedArea, options.get('restrictedareas'))]
+        paths = options.get('paths')
+
+        with transaction.atomic():
+            if paths is None and all(pks is None for model, pks in zones):
+                refresh_edges()
+                if verbosity > 0:
+                    self.stdout.write("Refreshed all paths")
+                return
+            if paths is not None:
+                refresh_edges(paths=paths)
+                if verbosity > 0:
+                    self.stdout.write("Refreshed %s paths" % len(paths))
+            for model, pks in zones:
+                if pks is not None:
+                    refresh_edges(model=model, zones=pks)
+                    if verbosity > 0:
+                        self.stdout.write("Refreshed %s %s" % (len(pks), model._meta.verbose_name_plural))
@@ -0,0 +1,31 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('zoning', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ZoneMembership',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('table', models.CharField(db_column='table_objet', max_length=64)),
+                ('object_id', models.IntegerField(db_column='objet')),
+                ('position', models.FloatField(default=0.0)),
+                ('city', models.ForeignKey(db_column='commune', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='zoning.City')),
+                ('district', models.ForeignKey(db_column='secteur', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='zoning.District')),
+                ('restricted_area', models.ForeignKey(db_column='zone', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='zoning.RestrictedArea')),
+            ],
+            options={
+                'db_table': 'f_t_appartenance',
+            },
+        ),
+        migrations.AlterIndexTogether(
+            name='zonemembership',
+            index_together=set([('table', 'object_id')]),
+        ),
+    ]
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.contrib.gis.db.models.fields
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('zoning', '0002_zonemembership'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ZonePiece',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('geom', django.contrib.gis.db.models.fields.PolygonField(spatial_index=False, srid=settings.SRID)),
+                ('city', models.ForeignKey(db_column='commune', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='pieces', to='zoning.City')),
+                ('district', models.ForeignKey(db_column='secteur', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='pieces', to='zoning.District')),
+                ('restricted_area', models.ForeignKey(db_column='zone', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='pieces', to='zoning.RestrictedArea')),
+            ],
+            options={
+                'db_table': 'l_zonage_decoupe',
+            },
+        ),
+    ]
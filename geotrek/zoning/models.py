@@ -10,6 +10,7 @@ from django.utils.translation import ugettext_lazy as _
 from geotrek.common.utils import uniquify, intersecting
 from geotrek.maintenance.models import Intervention, Project
 from geotrek.tourism.models import TouristicContent, TouristicEvent
+from collections import defaultdict
 from operator import attrgetter
 
 from geotrek.core.models import Topology, Path
@@ -88,29 +89,20 @@ if settings.TREKKING_TOPOLOGY_ENABLED:
                       _("Restricted areas"))
     Topology.add_property('area_edges', RestrictedAreaEdge.topology_area_edges, _("Restricted area edges"))
     Topology.add_property('areas', lambda self: uniquify(
-        intersecting(RestrictedArea, self)) if self.ispoint() else uniquify(
-        map(attrgetter('restricted_area'), self.area_edges)), _("Restricted areas"))
+        intersecting(RestrictedArea, self)) if self.distance(RestrictedArea) and self.ispoint() else self.zones.areas,
+        _("Restricted areas"))
     Intervention.add_property('area_edges', lambda self: self.topology.area_edges if self.topology else [],
                               _("Restricted area edges"))
-    Intervention.add_property('areas', lambda self: self.topology.areas if self.topology else [],
-                              _("Restricted areas"))
-    Project.add_property('area_edges', lambda self: self.edges_by_attr('area_edges'), _("Restricted area edges"))
-    Project.add_property('areas', lambda self: uniquify(map(attrgetter('restricted_area'), self.area_edges)),
-                         _("Restricted areas"))
+    Project.add_property('area_edges', lambda self: self.overlapping_edges(RestrictedAreaEdge.topology_area_edges), _("Restricted area edges"))
 else:
-    Topology.add_property('areas', lambda self: uniquify(intersecting(RestrictedArea, self, distance=0)),
-                          _("Restricted areas"))
-    Project.add_property('areas', lambda self: uniquify(intersecting(RestrictedArea, self, distance=0)),
-                         _("Restricted areas"))
-    Intervention.add_property('areas', lambda self: uniquify(intersecting(RestrictedArea, self, distance=0)),
-                              _("Restricted areas"))
-
-TouristicContent.add_property('areas', lambda self: intersecting(RestrictedArea, self, distance=0),
-                              _("Restricted areas"))
-TouristicEvent.add_property('areas', lambda self: intersecting(RestrictedArea, self, distance=0),
-                            _("Restricted areas"))
+    Topology.add_property('areas', lambda self: self.zones.areas, _("Restricted areas"))
+
+Project.add_property('areas', lambda self: self.zones.areas, _("Restricted areas"))
+Intervention.add_property('areas', lambda self: self.zones.areas, _("Restricted areas"))
+TouristicContent.add_property('areas', lambda self: self.zones.areas, _("Restricted areas"))
+TouristicEvent.add_property('areas', lambda self: self.zones.areas, _("Restricted areas"))
 if 'geotrek.diving' in settings.INSTALLED_APPS:
-    Dive.add_property('areas', lambda self: uniquify(intersecting(RestrictedArea, self, distance=0)), _("Restricted areas"))
+    Dive.add_property('areas', lambda self: self.zones.areas, _("Restricted areas"))
 
 
 class City(models.Model):
@@ -161,22 +153,17 @@ if settings.TREKKING_TOPOLOGY_ENABLED:
     Path.add_property('city_edges', CityEdge.path_city_edges, _("City edges"))
     Path.add_property('cities', lambda self: uniquify(map(attrgetter('city'), self.city_edges)), _("Cities"))
     Topology.add_property('city_edges', CityEdge.topology_city_edges, _("City edges"))
-    Topology.add_property('cities',
-                          lambda self: uniquify(intersecting(City, self, distance=0)), _("Cities"))
     Intervention.add_property('city_edges', lambda self: self.topology.city_edges if self.topology else [],
                               _("City edges"))
-    Intervention.add_property('cities', lambda self: self.topology.cities if self.topology else [], _("Cities"))
-    Project.add_property('city_edges', lambda self: self.edges_by_attr('city_edges'), _("City edges"))
-    Project.add_property('cities', lambda self: uniquify(map(attrgetter('city'), self.city_edges)), _("Cities"))
-else:
-    Topology.add_property('cities', lambda self: uniquify(intersecting(City, self, distance=0)), _("Cities"))
-    Project.add_property('cities', lambda self: uniquify(intersecting(City, self, distance=0)), _("Cities"))
-    Intervention.add_property('cities', lambda self: uniquify(intersecting(City, self, distance=0)), _("Cities"))
+    Project.add_property('city_edges', lambda self: self.overlapping_edges(CityEdge.topology_city_edges), _("City edges"))
 
-TouristicContent.add_property('cities', lambda self: intersecting(City, self, distance=0), _("Cities"))
-TouristicEvent.add_property('cities', lambda self: intersecting(City, self, distance=0), _("Cities"))
+Topology.add_property('cities', lambda self: self.zones.cities, _("Cities"))
+Project.add_property('cities', lambda self: self.zones.cities, _("Cities"))
+Intervention.add_property('cities', lambda self: self.zones.cities, _("Cities"))
+TouristicContent.add_property('cities', lambda self: self.zones.cities, _("Cities"))
+TouristicEvent.add_property('cities', lambda self: self.zones.cities, _("Cities"))
 if 'geotrek.diving' in settings.INSTALLED_APPS:
-    Dive.add_property('cities', lambda self: uniquify(intersecting(City, self, distance=0)), _("Cities"))
+    Dive.add_property('cities', lambda self: self.zones.cities, _("Cities"))
 
 
 class District(models.Model):
@@ -227,24 +214,143 @@ if settings.TREKKING_TOPOLOGY_ENABLED:
                       _("Districts"))
     Topology.add_property('district_edges', DistrictEdge.topology_district_edges, _("District edges"))
     Topology.add_property('districts', lambda self: uniquify(
-        intersecting(District, self)) if self.ispoint() else uniquify(
-        map(attrgetter('district'), self.district_edges)), _("Districts"))
+        intersecting(District, self)) if self.distance(District) and self.ispoint() else self.zones.districts,
+        _("Districts"))
     Intervention.add_property('district_edges', lambda self: self.topology.district_edges if self.topology else [],
                               _("District edges"))
-    Intervention.add_property('districts', lambda self: self.topology.districts if self.topology else [],
-                              _("Districts"))
-    Project.add_property('district_edges', lambda self: self.edges_by_attr('district_edges'), _("District edges"))
-    Project.add_property('districts', lambda self: uniquify(map(attrgetter('district'), self.district_edges)),
-                         _("Districts"))
+    Project.add_property('district_edges', lambda self: self.overlapping_edges(DistrictEdge.topology_district_edges), _("District edges"))
 else:
-    Topology.add_property('districts', lambda self: uniquify(intersecting(District, self, distance=0)),
-                          _("Districts"))
-    Project.add_property('districts', lambda self: uniquify(intersecting(District, self, distance=0)),
-                         _("Districts"))
-    Intervention.add_property('districts', lambda self: uniquify(intersecting(District, self, distance=0)),
-                              _("Districts"))
-
-TouristicContent.add_property('districts', lambda self: intersecting(District, self, distance=0), _("Districts"))
-TouristicEvent.add_property('districts', lambda self: intersecting(District, self, distance=0), _("Districts"))
+    Topology.add_property('districts', lambda self: self.zones.districts, _("Districts"))
+
+Project.add_property('districts', lambda self: self.zones.districts, _("Districts"))
+Intervention.add_property('districts', lambda self: self.zones.districts, _("Districts"))
+TouristicContent.add_property('districts', lambda self: self.zones.districts, _("Districts"))
+TouristicEvent.add_property('districts', lambda self: self.zones.districts, _("Districts"))
+if 'geotrek.diving' in settings.INSTALLED_APPS:
+    Dive.add_property('districts', lambda self: self.zones.districts, _("Districts"))
+
+
+class ZoneMembership(models.Model):
+    """
+    Zones intersecting objects geometries, maintained by triggers (see
+    ``sql/30_appartenance.sql``). Objects are identified by the table holding
+    their geometry, which is ``e_t_evenement`` for all topologies.
+    """
+    table = models.CharField(max_length=64, db_column='table_objet')
+    object_id = models.IntegerField(db_column='objet')
+    city = models.ForeignKey(City, null=True, related_name='+', db_column='commune')
+    district = models.ForeignKey(District, null=True, related_name='+', db_column='secteur')
+    restricted_area = models.ForeignKey(RestrictedArea, null=True, related_name='+', db_column='zone')
+    position = models.FloatField(default=0.0)
+
+    class Meta:
+        db_table = 'f_t_appartenance'
+        index_together = [['table', 'object_id']]
+
+
+class ZonePiece(models.Model):
+    """
+    Geometries of cities, districts and restricted areas subdivided in pieces
+    of a bounded number of vertices, maintained by triggers (see
+    ``sql/05_decoupage.sql``). Spatial lookups on zones are made against
+    pieces, which are much faster to test than full geometries.
+    """
+    city = models.ForeignKey(City, null=True, related_name='pieces', db_column='commune')
+    district = models.ForeignKey(District, null=True, related_name='pieces', db_column='secteur')
+    restricted_area = models.ForeignKey(RestrictedArea, null=True, related_name='pieces', db_column='zone')
+    geom = models.PolygonField(srid=settings.SRID, spatial_index=False)
+
+    class Meta:
+        db_table = 'l_zonage_decoupe'
+
+
+class Zones(object):
+    """
+    Cities, districts and restricted areas of an object, ordered along its geometry.
+    """
+    def __init__(self, pk):
+        self.pk = pk
+        self.cities = []
+        self.districts = []
+        self.areas = []
+        self._seen = set()
+
+    def add(self, membership):
+        for attr, field in (('cities', 'city'), ('districts', 'district'), ('areas', 'restricted_area')):
+            pk = getattr(membership, field + '_id')
+            if pk is not None and (field, pk) not in self._seen:
+                self._seen.add((field, pk))
+                getattr(self, attr).append(getattr(membership, field))
+
+
+class ZonesDescriptor(object):
+    """
+    ``zones`` attribute of objects, read from ``ZoneMembership``.
+
+    ``prefetch_related('zones')`` loads zones of all objects of a queryset at
+    once. Otherwise, they are read again at each access.
+    """
+    cache_name = '_zones'
+
+    def __init__(self, keys):
+        # Function returning {object pk: [(table, object id), ...]} for a list of objects
+        self.keys = keys
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        if self.is_cached(instance):
+            return getattr(instance, self.cache_name)
+        return self.load([instance])[0]
+
+    def is_cached(self, instance):
+        return hasattr(instance, self.cache_name)
+
+    def get_prefetch_queryset(self, instances, queryset=None):
+        return self.load(instances), attrgetter('pk'), attrgetter('pk'), True, self.cache_name
+
+    def load(self, instances):
+        zones = {obj.pk: Zones(obj.pk) for obj in instances}
+        objects = defaultdict(list)
+        for pk, keys in self.keys(instances).items():
+            for key in keys:
+                objects[key].append(pk)
+        ids = defaultdict(set)
+        for table, object_id in objects:
+            ids[table].add(object_id)
+        for table, object_ids in ids.items():
+            memberships = ZoneMembership.objects.filter(table=table, object_id__in=object_ids)
+            memberships = memberships.select_related('city', 'district', 'restricted_area__area_type')
+            for membership in memberships.order_by('position', 'pk'):
+                for pk in objects[(table, membership.object_id)]:
+                    zones[pk].add(membership)
+        return [zones[obj.pk] for obj in instances]
+
+
+def topology_zones_keys(objects):
+    return {obj.pk: [(Topology._meta.db_table, obj.pk)] for obj in objects}
+
+
+def zones_keys(objects):
+    return {obj.pk: [(obj._meta.db_table, obj.pk)] for obj in objects}
+
+
+def intervention_zones_keys(objects):
+    return {obj.pk: [(Topology._meta.db_table, obj.topology_id)] if obj.topology_id else [] for obj in objects}
+
+
+def project_zones_keys(objects):
+    keys = {obj.pk: [] for obj in objects}
+    interventions = Intervention.objects.existing().filter(project__in=list(keys), topology__isnull=False)
+    for project, topology in interventions.order_by('pk').values_list('project', 'topology'):
+        keys[project].append((Topology._meta.db_table, topology))
+    return keys
+
+
+Topology.zones = ZonesDescriptor(topology_zones_keys)
+Intervention.zones = ZonesDescriptor(intervention_zones_keys)
+Project.zones = ZonesDescriptor(project_zones_keys)
+TouristicContent.zones = ZonesDescriptor(zones_keys)
+TouristicEvent.zones = ZonesDescriptor(zones_keys)
 if 'geotrek.diving' in settings.INSTALLED_APPS:
-    Dive.add_property('districts', lambda self: uniquify(intersecting(District, self, distance=0)), _("Districts"))
+    Dive.zones = ZonesDescriptor(zones_keys)
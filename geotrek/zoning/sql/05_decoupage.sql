@@ -0,0 +1,124 @@
+SELECT create_schema_if_not_exist('zonage');
+
+-------------------------------------------------------------------------------
+-- Zones subdivided in pieces (see ZonePiece model)
+-------------------------------------------------------------------------------
+
+DROP INDEX IF EXISTS l_zonage_decoupe_geom_idx;
+CREATE INDEX l_zonage_decoupe_geom_idx ON l_zonage_decoupe USING gist(geom);
+
+-- Pieces of at most 256 vertices
+CREATE OR REPLACE FUNCTION zonage.decoupe(zone_geom geometry) RETURNS SETOF geometry AS $$
+    SELECT d.geom FROM ST_Subdivide(zone_geom, 256) AS s, ST_Dump(s) AS d
+    WHERE GeometryType(d.geom) = 'POLYGON';
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Refresh pieces of zones of layer table (all layers if NULL) whose id is in
+-- zones (all if NULL).
+CREATE OR REPLACE FUNCTION zonage.decoupage(layer varchar DEFAULT NULL, zones varchar[] DEFAULT NULL) RETURNS void SECURITY DEFINER AS $$
+DECLARE
+    l record;
+BEGIN
+    FOR l IN SELECT * FROM (VALUES ('l_commune', 'insee', 'commune'),
+                                   ('l_secteur', 'id', 'secteur'),
+                                   ('l_zonage_reglementaire', 'id', 'zone'))
+                           AS v(table_name, id_name, fk_name)
+             WHERE layer IS NULL OR table_name = layer
+    LOOP
+        EXECUTE 'DELETE FROM l_zonage_decoupe WHERE ' || quote_ident(l.fk_name) || ' IS NOT NULL'
+                ' AND ($1 IS NULL OR ' || quote_ident(l.fk_name) || '::varchar = ANY($1))'
+                USING zones;
+
+        EXECUTE 'INSERT INTO l_zonage_decoupe (' || quote_ident(l.fk_name) || ', geom)
+                 SELECT z.' || quote_ident(l.id_name) || ', zonage.decoupe(z.geom)
+                 FROM ' || quote_ident(l.table_name) || ' z
+                 WHERE $1 IS NULL OR z.' || quote_ident(l.id_name) || '::varchar = ANY($1)'
+                USING zones;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-------------------------------------------------------------------------------
+-- Sync when Commune/Zonage/Secteur modified
+-------------------------------------------------------------------------------
+
+-- BEFORE triggers, so that pieces are up-to-date when edges and memberships
+-- are refreshed by AFTER triggers (or at once, see deferred_edges())
+CREATE OR REPLACE FUNCTION zonage.decoupage_zone_iu() RETURNS trigger SECURITY DEFINER AS $$
+DECLARE
+    obj record;
+    fk_name varchar;
+BEGIN
+    -- Harmonize ID name
+    BEGIN
+        SELECT NEW.insee AS id INTO obj;
+    EXCEPTION
+        WHEN undefined_column THEN
+            SELECT NEW.id AS id INTO obj;
+    END;
+    fk_name := CASE TG_TABLE_NAME WHEN 'l_commune' THEN 'commune' WHEN 'l_secteur' THEN 'secteur' ELSE 'zone' END;
+
+    EXECUTE 'DELETE FROM l_zonage_decoupe WHERE ' || quote_ident(fk_name) || ' = $1' USING obj.id;
+    EXECUTE 'INSERT INTO l_zonage_decoupe (' || quote_ident(fk_name) || ', geom)'
+            ' SELECT $1, zonage.decoupe($2)'
+            USING obj.id, NEW.geom;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION zonage.decoupage_zone_d() RETURNS trigger SECURITY DEFINER AS $$
+BEGIN
+    IF TG_TABLE_NAME = 'l_commune' THEN
+        DELETE FROM l_zonage_decoupe WHERE commune = OLD.insee;
+    ELSIF TG_TABLE_NAME = 'l_secteur' THEN
+        DELETE FROM l_zonage_decoupe WHERE secteur = OLD.id;
+    ELSE
+        DELETE FROM l_zonage_decoupe WHERE zone = OLD.id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS l_commune_decoupage_iu_tgr ON l_commune;
+CREATE TRIGGER l_commune_decoupage_iu_tgr
+BEFORE INSERT OR UPDATE OF geom ON l_commune
+FOR EACH ROW EXECUTE PROCEDURE zonage.decoupage_zone_iu();
+
+DROP TRIGGER IF EXISTS l_secteur_decoupage_iu_tgr ON l_secteur;
+CREATE TRIGGER l_secteur_decoupage_iu_tgr
+BEFORE INSERT OR UPDATE OF geom ON l_secteur
+FOR EACH ROW EXECUTE PROCEDURE zonage.decoupage_zone_iu();
+
+DROP TRIGGER IF EXISTS l_zonage_reglementaire_decoupage_iu_tgr ON l_zonage_reglementaire;
+CREATE TRIGGER l_zonage_reglementaire_decoupage_iu_tgr
+BEFORE INSERT OR UPDATE OF geom ON l_zonage_reglementaire
+FOR EACH ROW EXECUTE PROCEDURE zonage.decoupage_zone_iu();
+
+DROP TRIGGER IF EXISTS l_commune_decoupage_d_tgr ON l_commune;
+CREATE TRIGGER l_commune_decoupage_d_tgr
+AFTER DELETE ON l_commune
+FOR EACH ROW EXECUTE PROCEDURE zonage.decoupage_zone_d();
+
+DROP TRIGGER IF EXISTS l_secteur_decoupage_d_tgr ON l_secteur;
+CREATE TRIGGER l_secteur_decoupage_d_tgr
+AFTER DELETE ON l_secteur
+FOR EACH ROW EXECUTE PROCEDURE zonage.decoupage_zone_d();
+
+DROP TRIGGER IF EXISTS l_zonage_reglementaire_decoupage_d_tgr ON l_zonage_reglementaire;
+CREATE TRIGGER l_zonage_reglementaire_decoupage_d_tgr
+AFTER DELETE ON l_zonage_reglementaire
+FOR EACH ROW EXECUTE PROCEDURE zonage.decoupage_zone_d();
+
+
+-------------------------------------------------------------------------------
+-- Initial computation
+-------------------------------------------------------------------------------
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM l_zonage_decoupe) THEN
+        PERFORM zonage.decoupage();
+    END IF;
+END;
+$$;
@@ -95,52 +95,86 @@ FOR EACH ROW EXECUTE PROCEDURE nettoyage_auto_couches_sig_d();
 
 
 -------------------------------------------------------------------------------
--- Sync when Troncon modified
+-- Compute Commune/Zonage/Secteur of a set of paths and/or zones
 -------------------------------------------------------------------------------
 
-DROP TRIGGER IF EXISTS l_t_troncon_couches_sig_iu_tgr ON l_t_troncon;
-
-CREATE OR REPLACE FUNCTION lien_auto_troncon_couches_sig_iu() RETURNS trigger SECURITY DEFINER AS $$
+-- Refresh evenements between paths of troncons (all paths if NULL) and zones
+-- of layer table (all layers if NULL) whose id is in zones (all if NULL).
+CREATE OR REPLACE FUNCTION zonage.lien_auto_couches_sig(troncons integer[], layer varchar DEFAULT NULL, zones varchar[] DEFAULT NULL) RETURNS void SECURITY DEFINER AS $$
 DECLARE
-    rec record;
-    tab varchar;
-    eid integer;
+    l record;
 BEGIN
-    -- Remove obsolete evenement
-    IF TG_OP = 'UPDATE' THEN
+    FOR l IN SELECT * FROM (VALUES ('l_commune', 'insee', 'f_t_commune', 'commune', 'CITYEDGE'),
+                                   ('l_secteur', 'id', 'f_t_secteur', 'secteur', 'DISTRICTEDGE'),
+                                   ('l_zonage_reglementaire', 'id', 'f_t_zonage', 'zone', 'RESTRICTEDAREAEDGE'))
+                           AS v(table_name, id_name, link_name, fk_name, kind_name)
+             WHERE layer IS NULL OR table_name = layer
+    LOOP
+        -- Remove obsolete evenement
         -- Related evenement/zonage/secteur/commune will be cleared by another trigger
-        DELETE FROM e_r_evenement_troncon et USING f_t_zonage z WHERE et.troncon = OLD.id AND et.evenement = z.evenement;
-        DELETE FROM e_r_evenement_troncon et USING f_t_secteur s WHERE et.troncon = OLD.id AND et.evenement = s.evenement;
-        DELETE FROM e_r_evenement_troncon et USING f_t_commune c WHERE et.troncon = OLD.id AND et.evenement = c.evenement;
-    END IF;
+        EXECUTE 'DELETE FROM e_r_evenement_troncon et USING ' || quote_ident(l.link_name) || ' l WHERE et.evenement = l.evenement'
+                ' AND ($1 IS NULL OR et.troncon = ANY($1)) AND ($2 IS NULL OR l.' || quote_ident(l.fk_name) || '::varchar = ANY($2))'
+                USING troncons, zones;
+
+        -- Add new evenement, all paths and zones at once
+        -- Intersections are computed against zone pieces (see 05_decoupage.sql),
+        -- lines cut at pieces boundaries are merged back.
+        EXECUTE '
+            WITH edges AS (
+                SELECT nextval(pg_get_serial_sequence(''e_t_evenement'', ''id'')) AS eid, troncon, zone, tgeom,
+                       ST_LineLocatePoint(tgeom, COALESCE(ST_StartPoint(geom), geom)) AS pk_a,
+                       ST_LineLocatePoint(tgeom, COALESCE(ST_EndPoint(geom), geom)) AS pk_b
+                FROM (SELECT troncon, zone, tgeom,
+                             (ST_Dump(ST_Collect(ST_LineMerge(ST_CollectionExtract(u, 2)), ST_CollectionExtract(u, 1)))).geom AS geom
+                      FROM (SELECT t.id AS troncon, p.' || quote_ident(l.fk_name) || ' AS zone, t.geom AS tgeom,
+                                   ST_ForceCollection(ST_Union(ST_Intersection(p.geom, t.geom))) AS u
+                            FROM l_t_troncon t JOIN l_zonage_decoupe p ON ST_Intersects(p.geom, t.geom)
+                            WHERE p.' || quote_ident(l.fk_name) || ' IS NOT NULL
+                              AND ($1 IS NULL OR t.id = ANY($1))
+                              AND ($2 IS NULL OR p.' || quote_ident(l.fk_name) || '::varchar = ANY($2))
+                            GROUP BY t.id, p.' || quote_ident(l.fk_name) || ') AS pieces) AS sub
+                WHERE NOT ST_IsEmpty(geom)
+            ), evenements AS (
+                INSERT INTO e_t_evenement (id, date_insert, date_update, kind, decallage, longueur, geom, supprime)
+                SELECT eid, now(), now(), $3, 0, 0, tgeom, FALSE FROM edges
+            ), links AS (
+                INSERT INTO e_r_evenement_troncon (troncon, evenement, pk_debut, pk_fin)
+                SELECT troncon, eid, least(pk_a, pk_b), greatest(pk_a, pk_b) FROM edges
+            )
+            INSERT INTO ' || quote_ident(l.link_name) || ' (evenement, ' || quote_ident(l.fk_name) || ')
+            SELECT eid, zone FROM edges'
+            USING troncons, zones, l.kind_name;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
 
-    -- Add new evenement
-    -- Note: Column names differ between commune, secteur and zonage, we can not use an elegant loop.
+CREATE OR REPLACE FUNCTION zonage.lien_auto_troncons_couches_sig(troncons integer[]) RETURNS void SECURITY DEFINER AS $$
+BEGIN
+    PERFORM zonage.lien_auto_couches_sig(troncons);
+END;
+$$ LANGUAGE plpgsql;
 
-    -- Commune
-    FOR rec IN EXECUTE 'SELECT id, ST_LineLocatePoint($1, COALESCE(ST_StartPoint(geom), geom)) as pk_a, ST_LineLocatePoint($1, COALESCE(ST_EndPoint(geom), geom)) as pk_b FROM (SELECT insee AS id, (ST_Dump(ST_Multi(ST_Intersection(geom, $1)))).geom AS geom FROM l_commune WHERE ST_Intersects(geom, $1)) AS sub' USING NEW.geom
-    LOOP
-        INSERT INTO e_t_evenement (date_insert, date_update, kind, decallage, longueur, geom, supprime) VALUES (now(), now(), 'CITYEDGE', 0, 0, NEW.geom, FALSE) RETURNING id INTO eid;
-        INSERT INTO e_r_evenement_troncon (troncon, evenement, pk_debut, pk_fin) VALUES (NEW.id, eid, least(rec.pk_a, rec.pk_b), greatest(rec.pk_a, rec.pk_b));
-        INSERT INTO f_t_commune (evenement, commune) VALUES (eid, rec.id);
-    END LOOP;
+CREATE OR REPLACE FUNCTION zonage.lien_auto_couches_sig_troncons(layer varchar, zones varchar[]) RETURNS void SECURITY DEFINER AS $$
+BEGIN
+    PERFORM zonage.lien_auto_couches_sig(NULL, layer, zones);
+END;
+$$ LANGUAGE plpgsql;
 
-    -- Secteur
-    FOR rec IN EXECUTE 'SELECT id, ST_LineLocatePoint($1,COALESCE(ST_StartPoint(geom), geom)) as pk_a, ST_LineLocatePoint($1, COALESCE(ST_EndPoint(geom), geom)) as pk_b FROM (SELECT id, (ST_Dump(ST_Multi(ST_Intersection(geom, $1)))).geom AS geom FROM l_secteur WHERE ST_Intersects(geom, $1)) AS sub' USING NEW.geom
-    LOOP
-        INSERT INTO e_t_evenement (date_insert, date_update, kind, decallage, longueur, geom, supprime) VALUES (now(), now(), 'DISTRICTEDGE', 0, 0, NEW.geom, FALSE) RETURNING id INTO eid;
-        INSERT INTO e_r_evenement_troncon (troncon, evenement, pk_debut, pk_fin) VALUES (NEW.id, eid, least(rec.pk_a, rec.pk_b), greatest(rec.pk_a, rec.pk_b));
-        INSERT INTO f_t_secteur (evenement, secteur) VALUES (eid, rec.id);
-    END LOOP;
 
-    -- Zonage
-    FOR rec IN EXECUTE 'SELECT id, ST_LineLocatePoint($1, COALESCE(ST_StartPoint(geom), geom)) as pk_a, ST_LineLocatePoint($1, COALESCE(ST_EndPoint(geom), geom)) as pk_b FROM (SELECT id, (ST_Dump(ST_Multi(ST_Intersection(geom, $1)))).geom AS geom FROM l_zonage_reglementaire WHERE ST_Intersects(geom, $1)) AS sub' USING NEW.geom
-    LOOP
-        INSERT INTO e_t_evenement (date_insert, date_update, kind, decallage, longueur, geom, supprime) VALUES (now(), now(), 'RESTRICTEDAREAEDGE', 0, 0, NEW.geom, FALSE) RETURNING id INTO eid;
-        INSERT INTO e_r_evenement_troncon (troncon, evenement, pk_debut, pk_fin) VALUES (NEW.id, eid, least(rec.pk_a, rec.pk_b), greatest(rec.pk_a, rec.pk_b));
-        INSERT INTO f_t_zonage (evenement, zone) VALUES (eid, rec.id);
-    END LOOP;
+-------------------------------------------------------------------------------
+-- Sync when Troncon modified
+-------------------------------------------------------------------------------
+
+DROP TRIGGER IF EXISTS l_t_troncon_couches_sig_iu_tgr ON l_t_troncon;
 
+CREATE OR REPLACE FUNCTION lien_auto_troncon_couches_sig_iu() RETURNS trigger SECURITY DEFINER AS $$
+BEGIN
+    -- Linked at once by loadpaths command
+    IF troncons_bulk_load() THEN
+        RETURN NULL;
+    END IF;
+
+    PERFORM zonage.lien_auto_troncons_couches_sig(ARRAY[NEW.id]);
     RETURN NULL;
 END;
 $$ LANGUAGE plpgsql;
@@ -159,16 +193,26 @@ DROP TRIGGER IF EXISTS commune_troncons_iu_tgr ON l_commune;
 DROP TRIGGER IF EXISTS secteur_troncons_iu_tgr ON l_secteur;
 DROP TRIGGER IF EXISTS zonage_troncons_iu_tgr ON l_zonage_reglementaire;
 
+CREATE OR REPLACE FUNCTION zonage.lien_auto_couches_sig_deferred() RETURNS boolean AS $$
+BEGIN
+    -- Set with SET LOCAL geotrek.defer_zone_edges = 'on'
+    -- (see geotrek.zoning.helpers.deferred_edges())
+    RETURN current_setting('geotrek.defer_zone_edges') = 'on';
+EXCEPTION
+    WHEN undefined_object THEN
+        RETURN false;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
 CREATE OR REPLACE FUNCTION lien_auto_couches_sig_troncon_iu() RETURNS trigger SECURITY DEFINER AS $$
 DECLARE
-    table_name varchar := TG_ARGV[0];
-    id_name varchar := TG_ARGV[1];
-    fk_name varchar := TG_ARGV[2];
-    kind_name varchar := TG_ARGV[3];
     obj record;
-    rec record;
-    eid integer;
 BEGIN
+    -- Changed zones will be refreshed all at once
+    IF zonage.lien_auto_couches_sig_deferred() THEN
+        RETURN NULL;
+    END IF;
+
     -- Harmonize ID name
     BEGIN
         SELECT NEW.insee AS id INTO obj;
@@ -177,33 +221,19 @@ BEGIN
             SELECT NEW.id AS id INTO obj;
     END;
 
-    -- Remove obsolete evenement
-    IF TG_OP = 'UPDATE' THEN
-        EXECUTE 'DELETE FROM '|| quote_ident(table_name) ||' WHERE '|| quote_ident(fk_name) ||' = $1' USING obj.id;
-    END IF;
-
-    -- Add new evenement
-    FOR rec IN EXECUTE 'SELECT id, egeom AS geom, ST_LineLocatePoint(tgeom, ST_StartPoint(egeom)) AS pk_a, ST_LineLocatePoint(tgeom, ST_EndPoint(egeom)) AS pk_b FROM (SELECT id, geom AS tgeom, (ST_Dump(ST_Multi(ST_Intersection(geom, $1)))).geom AS egeom FROM l_t_troncon WHERE ST_Intersects(geom, $1)) AS sub' USING NEW.geom
-    LOOP
-        IF rec.pk_a IS NOT NULL AND rec.pk_b IS NOT NULL THEN
-            INSERT INTO e_t_evenement (date_insert, date_update, kind, decallage, longueur, geom, supprime) VALUES (now(), now(), kind_name, 0, 0, rec.geom, FALSE) RETURNING id INTO eid;
-            INSERT INTO e_r_evenement_troncon (troncon, evenement, pk_debut, pk_fin) VALUES (rec.id, eid, least(rec.pk_a, rec.pk_b), greatest(rec.pk_a, rec.pk_b));
-            EXECUTE 'INSERT INTO '|| quote_ident(table_name) ||' (evenement, '|| quote_ident(fk_name) ||') VALUES ($1, $2)' USING eid, obj.id;
-        END IF;
-    END LOOP;
-
+    PERFORM zonage.lien_auto_couches_sig_troncons(TG_TABLE_NAME, ARRAY[obj.id::varchar]);
     RETURN NULL;
 END;
 $$ LANGUAGE plpgsql;
 
 CREATE TRIGGER commune_troncons_iu_tgr
 AFTER INSERT OR UPDATE OF geom ON l_commune
-FOR EACH ROW EXECUTE PROCEDURE lien_auto_couches_sig_troncon_iu('f_t_commune', 'insee', 'commune', 'CITYEDGE');
+FOR EACH ROW EXECUTE PROCEDURE lien_auto_couches_sig_troncon_iu();
 
 CREATE TRIGGER secteur_troncons_iu_tgr
 AFTER INSERT OR UPDATE OF geom ON l_secteur
-FOR EACH ROW EXECUTE PROCEDURE lien_auto_couches_sig_troncon_iu('f_t_secteur', 'id', 'secteur', 'DISTRICTEDGE');
+FOR EACH ROW EXECUTE PROCEDURE lien_auto_couches_sig_troncon_iu();
 
 CREATE TRIGGER zonage_troncons_iu_tgr
 AFTER INSERT OR UPDATE OF geom ON l_zonage_reglementaire
-FOR EACH ROW EXECUTE PROCEDURE lien_auto_couches_sig_troncon_iu('f_t_zonage', 'id', 'zone', 'RESTRICTEDAREAEDGE');
+FOR EACH ROW EXECUTE PROCEDURE lien_auto_couches_sig_troncon_iu();
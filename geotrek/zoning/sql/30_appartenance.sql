@@ -0,0 +1,196 @@
+-------------------------------------------------------------------------------
+-- Zones intersecting objects (see ZoneMembership model)
+-------------------------------------------------------------------------------
+
+-- Refresh memberships of objects of table_objet (all objects tables if NULL)
+-- whose id is in objets (all if NULL), with zones of layer (all layers if
+-- NULL) whose id is in zones (all if NULL).
+CREATE OR REPLACE FUNCTION zonage.appartenance(table_objet varchar, objets integer[], layer varchar DEFAULT NULL, zones varchar[] DEFAULT NULL) RETURNS void SECURITY DEFINER AS $$
+DECLARE
+    o record;
+    l record;
+BEGIN
+    FOR o IN SELECT table_name,
+                    CASE table_name WHEN 'e_t_evenement' THEN 'AND NOT o.kind IN (''CITYEDGE'', ''DISTRICTEDGE'', ''RESTRICTEDAREAEDGE'')' ELSE '' END AS filter
+             FROM unnest(ARRAY['e_t_evenement', 't_t_contenu_touristique', 't_t_evenement_touristique', 'g_t_plongee']) AS table_name
+             WHERE (table_objet IS NULL OR table_name = table_objet) AND to_regclass(table_name) IS NOT NULL
+    LOOP
+        FOR l IN SELECT * FROM (VALUES ('l_commune', 'insee', 'commune'),
+                                       ('l_secteur', 'id', 'secteur'),
+                                       ('l_zonage_reglementaire', 'id', 'zone'))
+                               AS v(table_name, id_name, fk_name)
+                 WHERE layer IS NULL OR table_name = layer
+        LOOP
+            EXECUTE 'DELETE FROM f_t_appartenance WHERE table_objet = $1 AND ' || quote_ident(l.fk_name) || ' IS NOT NULL'
+                    ' AND ($2 IS NULL OR objet = ANY($2)) AND ($3 IS NULL OR ' || quote_ident(l.fk_name) || '::varchar = ANY($3))'
+                    USING o.table_name, objets, zones;
+
+            -- Position of the first intersection along lines, to sort zones as intersecting() does.
+            -- Intersections are computed against zone pieces (see 05_decoupage.sql).
+            EXECUTE '
+                INSERT INTO f_t_appartenance (table_objet, objet, ' || quote_ident(l.fk_name) || ', position)
+                SELECT $1, o.id, p.' || quote_ident(l.fk_name) || ',
+                       COALESCE(min(CASE WHEN GeometryType(o.geom) = ''LINESTRING'' THEN
+                                    (SELECT min(ST_LineLocatePoint(o.geom, ST_StartPoint(d.geom)))
+                                     FROM ST_Dump(ST_Intersection(o.geom, p.geom)) AS d)
+                                END), 0)
+                FROM ' || quote_ident(o.table_name) || ' o JOIN l_zonage_decoupe p ON ST_Intersects(o.geom, p.geom)
+                WHERE p.' || quote_ident(l.fk_name) || ' IS NOT NULL
+                  AND ($2 IS NULL OR o.id = ANY($2))
+                  AND ($3 IS NULL OR p.' || quote_ident(l.fk_name) || '::varchar = ANY($3)) ' || o.filter || '
+                GROUP BY o.id, p.' || quote_ident(l.fk_name)
+                USING o.table_name, objets, zones;
+        END LOOP;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-------------------------------------------------------------------------------
+-- Sync when objects are modified
+-------------------------------------------------------------------------------
+
+CREATE OR REPLACE FUNCTION zonage.appartenance_objet_iu() RETURNS trigger SECURITY DEFINER AS $$
+BEGIN
+    PERFORM zonage.appartenance(TG_TABLE_NAME, ARRAY[NEW.id]);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION zonage.appartenance_objet_d() RETURNS trigger SECURITY DEFINER AS $$
+BEGIN
+    DELETE FROM f_t_appartenance WHERE table_objet = TG_TABLE_NAME AND objet = OLD.id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS e_t_evenement_appartenance_iu_tgr ON e_t_evenement;
+CREATE TRIGGER e_t_evenement_appartenance_iu_tgr
+AFTER INSERT OR UPDATE OF geom ON e_t_evenement
+FOR EACH ROW WHEN (NOT NEW.kind IN ('CITYEDGE', 'DISTRICTEDGE', 'RESTRICTEDAREAEDGE'))
+EXECUTE PROCEDURE zonage.appartenance_objet_iu();
+
+DROP TRIGGER IF EXISTS e_t_evenement_appartenance_d_tgr ON e_t_evenement;
+CREATE TRIGGER e_t_evenement_appartenance_d_tgr
+AFTER DELETE ON e_t_evenement
+FOR EACH ROW EXECUTE PROCEDURE zonage.appartenance_objet_d();
+
+DROP TRIGGER IF EXISTS t_t_contenu_touristique_appartenance_iu_tgr ON t_t_contenu_touristique;
+CREATE TRIGGER t_t_contenu_touristique_appartenance_iu_tgr
+AFTER INSERT OR UPDATE OF geom ON t_t_contenu_touristique
+FOR EACH ROW EXECUTE PROCEDURE zonage.appartenance_objet_iu();
+
+DROP TRIGGER IF EXISTS t_t_contenu_touristique_appartenance_d_tgr ON t_t_contenu_touristique;
+CREATE TRIGGER t_t_contenu_touristique_appartenance_d_tgr
+AFTER DELETE ON t_t_contenu_touristique
+FOR EACH ROW EXECUTE PROCEDURE zonage.appartenance_objet_d();
+
+DROP TRIGGER IF EXISTS t_t_evenement_touristique_appartenance_iu_tgr ON t_t_evenement_touristique;
+CREATE TRIGGER t_t_evenement_touristique_appartenance_iu_tgr
+AFTER INSERT OR UPDATE OF geom ON t_t_evenement_touristique
+FOR EACH ROW EXECUTE PROCEDURE zonage.appartenance_objet_iu();
+
+DROP TRIGGER IF EXISTS t_t_evenement_touristique_appartenance_d_tgr ON t_t_evenement_touristique;
+CREATE TRIGGER t_t_evenement_touristique_appartenance_d_tgr
+AFTER DELETE ON t_t_evenement_touristique
+FOR EACH ROW EXECUTE PROCEDURE zonage.appartenance_objet_d();
+
+-- Diving is optional
+DO $$
+BEGIN
+    IF to_regclass('g_t_plongee') IS NOT NULL THEN
+        DROP TRIGGER IF EXISTS g_t_plongee_appartenance_iu_tgr ON g_t_plongee;
+        CREATE TRIGGER g_t_plongee_appartenance_iu_tgr
+        AFTER INSERT OR UPDATE OF geom ON g_t_plongee
+        FOR EACH ROW EXECUTE PROCEDURE zonage.appartenance_objet_iu();
+
+        DROP TRIGGER IF EXISTS g_t_plongee_appartenance_d_tgr ON g_t_plongee;
+        CREATE TRIGGER g_t_plongee_appartenance_d_tgr
+        AFTER DELETE ON g_t_plongee
+        FOR EACH ROW EXECUTE PROCEDURE zonage.appartenance_objet_d();
+    END IF;
+END;
+$$;
+
+
+-------------------------------------------------------------------------------
+-- Sync when Commune/Zonage/Secteur modified
+-------------------------------------------------------------------------------
+
+CREATE OR REPLACE FUNCTION zonage.appartenance_zone_iu() RETURNS trigger SECURITY DEFINER AS $$
+DECLARE
+    obj record;
+BEGIN
+    -- Changed zones will be refreshed all at once (see lien_auto_couches_sig_deferred())
+    IF zonage.lien_auto_couches_sig_deferred() THEN
+        RETURN NULL;
+    END IF;
+
+    -- Harmonize ID name
+    BEGIN
+        SELECT NEW.insee AS id INTO obj;
+    EXCEPTION
+        WHEN undefined_column THEN
+            SELECT NEW.id AS id INTO obj;
+    END;
+
+    PERFORM zonage.appartenance(NULL, NULL, TG_TABLE_NAME, ARRAY[obj.id::varchar]);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION zonage.appartenance_zone_d() RETURNS trigger SECURITY DEFINER AS $$
+BEGIN
+    IF TG_TABLE_NAME = 'l_commune' THEN
+        DELETE FROM f_t_appartenance WHERE commune = OLD.insee;
+    ELSIF TG_TABLE_NAME = 'l_secteur' THEN
+        DELETE FROM f_t_appartenance WHERE secteur = OLD.id;
+    ELSE
+        DELETE FROM f_t_appartenance WHERE zone = OLD.id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS l_commune_appartenance_iu_tgr ON l_commune;
+CREATE TRIGGER l_commune_appartenance_iu_tgr
+AFTER INSERT OR UPDATE OF geom ON l_commune
+FOR EACH ROW EXECUTE PROCEDURE zonage.appartenance_zone_iu();
+
+DROP TRIGGER IF EXISTS l_secteur_appartenance_iu_tgr ON l_secteur;
+CREATE TRIGGER l_secteur_appartenance_iu_tgr
+AFTER INSERT OR UPDATE OF geom ON l_secteur
+FOR EACH ROW EXECUTE PROCEDURE zonage.appartenance_zone_iu();
+
+DROP TRIGGER IF EXISTS l_zonage_reglementaire_appartenance_iu_tgr ON l_zonage_reglementaire;
+CREATE TRIGGER l_zonage_reglementaire_appartenance_iu_tgr
+AFTER INSERT OR UPDATE OF geom ON l_zonage_reglementaire
+FOR EACH ROW EXECUTE PROCEDURE zonage.appartenance_zone_iu();
+
+DROP TRIGGER IF EXISTS l_commune_appartenance_d_tgr ON l_commune;
+CREATE TRIGGER l_commune_appartenance_d_tgr
+AFTER DELETE ON l_commune
+FOR EACH ROW EXECUTE PROCEDURE zonage.appartenance_zone_d();
+
+DROP TRIGGER IF EXISTS l_secteur_appartenance_d_tgr ON l_secteur;
+CREATE TRIGGER l_secteur_appartenance_d_tgr
+AFTER DELETE ON l_secteur
+FOR EACH ROW EXECUTE PROCEDURE zonage.appartenance_zone_d();
+
+DROP TRIGGER IF EXISTS l_zonage_reglementaire_appartenance_d_tgr ON l_zonage_reglementaire;
+CREATE TRIGGER l_zonage_reglementaire_appartenance_d_tgr
+AFTER DELETE ON l_zonage_reglementaire
+FOR EACH ROW EXECUTE PROCEDURE zonage.appartenance_zone_d();
+
+
+-------------------------------------------------------------------------------
+-- Initial computation
+-------------------------------------------------------------------------------
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM f_t_appartenance) THEN
+        PERFORM zonage.appartenance(NULL, NULL);
+    END IF;
+END;
+$$;
@@ -1,10 +1,16 @@
 import os
 from io import StringIO
+from unittest import skipIf
 
+from django.conf import settings
 from django.contrib.gis.gdal import GDALException
+from django.contrib.gis.geos import LineString, MultiPolygon, Polygon
 from django.core.management import call_command
 from django.test import TestCase, override_settings
 from django.core.management.base import CommandError
+from geotrek.core.factories import PathFactory
+from geotrek.zoning.factories import CityFactory, DistrictFactory
+from geotrek.zoning.helpers import deferred_edges
 from geotrek.zoning.models import RestrictedArea, RestrictedAreaType, City, District
 
 
@@ -273,3 +279,47 @@ class DistrictsCommandTest(TestCase):
         self.assertIn('NOM, Insee', output.getvalue())
         call_command('loaddistricts', self.filename, '-i', name='toto', code='tata', stdout=output)
         self.assertIn('NOM, Insee', output.getvalue())
+
+
+@skipIf(not settings.TREKKING_TOPOLOGY_ENABLED, 'Test with dynamic segmentation only')
+class RefreshZoningCommandTest(TestCase):
+    def setUp(self):
+        self.path = PathFactory(geom=LineString((0, 0), (10, 0)))
+        self.city = CityFactory(geom=MultiPolygon(Polygon.from_bbox((-5, -5, 5, 5)), srid=settings.SRID))
+        self.district = DistrictFactory(geom=MultiPolygon(Polygon.from_bbox((-5, -5, 5, 5)), srid=settings.SRID))
+        self.far = MultiPolygon(Polygon.from_bbox((100, 100, 105, 105)), srid=settings.SRID)
+
+    def test_deferred_edges(self):
+        with deferred_edges(City) as changed:
+            City.objects.filter(pk=self.city.pk).update(geom=self.far)
+            self.assertEqual(self.path.cities, [self.city])
+            changed.add(self.city.pk)
+        self.assertEqual(self.path.cities, [])
+
+    def test_refresh_zones(self):
+        with deferred_edges(City):
+            City.objects.filter(pk=self.city.pk).update(geom=self.far)
+        self.assertEqual(self.path.cities, [self.city])
+        call_command('refreshzoning', cities=[self.city.pk], verbosity=0)
+        self.assertEqual(self.path.cities, [])
+        self.assertEqual(self.path.districts, [self.district])
+
+    def test_refresh_all(self):
+        with deferred_edges(City), deferred_edges(District):
+            City.objects.filter(pk=self.city.pk).update(geom=self.far)
+            District.objects.filter(pk=self.district.pk).update(geom=self.far)
+        output = StringIO()
+        call_command('refreshzoning', stdout=output)
+        self.assertIn('Refreshed all paths', output.getvalue())
+        self.assertEqual(self.path.cities, [])
+        self.assertEqual(self.path.districts, [])
+
+    def test_refresh_paths(self):
+        path = PathFactory(geom=LineString((100, 102), (104, 102)))
+        with deferred_edges(City):
+            City.objects.filter(pk=self.city.pk).update(geom=self.far)
+        call_command('refreshzoning', paths=[self.path.pk], verbosity=0)
+        self.assertEqual(self.path.cities, [])
+        # Not refreshed
+        self.assertEqual(path.cities, [])
+        self.assertEqual(self.path.districts, [self.district])
@@ -1,12 +1,15 @@
 from django.test import TestCase
 from django.conf import settings
-from django.contrib.gis.geos import LineString, Polygon, MultiPolygon
+from django.contrib.gis.geos import LineString, Point, Polygon, MultiPolygon
 
+from geotrek.common.utils import intersecting
 from geotrek.core.models import Topology
 from geotrek.core.factories import PathFactory
 from geotrek.land.tests.test_views import EdgeHelperTest
-from geotrek.zoning.models import City
-from geotrek.zoning.factories import (DistrictEdgeFactory, CityEdgeFactory,
+from geotrek.tourism.factories import TouristicContentFactory
+from geotrek.tourism.models import TouristicContent
+from geotrek.zoning.models import City, ZoneMembership, ZonePiece
+from geotrek.zoning.factories import (DistrictEdgeFactory, CityEdgeFactory, CityFactory, DistrictFactory,
                                       RestrictedAreaFactory, RestrictedAreaEdgeFactory)
 
 
@@ -168,3 +171,74 @@ class LandLayersUpdateTest(TestCase):
         self.assertEqual(Topology.objects.filter(pk=t_ra1.pk).count(), 0)
         self.assertEqual(ra2.restrictedareaedge_set.count(), 0)
         self.assertEqual(Topology.objects.filter(pk=t_ra2.pk).count(), 0)
+
+
+class ZoneMembershipTest(TestCase):
+
+    def setUp(self):
+        self.city = CityFactory.create(geom=MultiPolygon(Polygon(((0, 0), (10, 0), (10, 10), (0, 10), (0, 0)),
+                                                                 srid=settings.SRID)))
+        self.district = DistrictFactory.create(geom=MultiPolygon(Polygon(((5, 0), (20, 0), (20, 10), (5, 10), (5, 0)),
+                                                                         srid=settings.SRID)))
+
+    def test_membership_follows_object_geometry(self):
+        content = TouristicContentFactory.create(geom=Point(1, 1, srid=settings.SRID))
+        self.assertEqual(content.cities, [self.city])
+        self.assertEqual(content.districts, [])
+        content.geom = Point(15, 1, srid=settings.SRID)
+        content.save()
+        self.assertEqual(content.cities, [])
+        self.assertEqual(content.districts, [self.district])
+        content.delete()
+        self.assertFalse(ZoneMembership.objects.filter(object_id=content.pk).exists())
+
+    def test_membership_follows_zone_geometry(self):
+        content = TouristicContentFactory.create(geom=Point(1, 1, srid=settings.SRID))
+        self.district.geom = MultiPolygon(Polygon(((0, 0), (20, 0), (20, 10), (0, 10), (0, 0)), srid=settings.SRID))
+        self.district.save()
+        self.assertEqual(content.districts, [self.district])
+        self.district.delete()
+        self.assertEqual(content.districts, [])
+
+    def test_prefetch_zones(self):
+        TouristicContentFactory.create(geom=Point(1, 1, srid=settings.SRID))
+        TouristicContentFactory.create(geom=Point(6, 1, srid=settings.SRID))
+        with self.assertNumQueries(2):
+            contents = list(TouristicContent.objects.order_by('pk').prefetch_related('zones'))
+            self.assertEqual([c.cities for c in contents], [[self.city], [self.city]])
+            self.assertEqual([c.districts for c in contents], [[], [self.district]])
+
+
+class ZonePieceTest(TestCase):
+
+    def setUp(self):
+        # Disc of 801 vertices
+        self.city = CityFactory.create(geom=MultiPolygon(Point(50, 50, srid=settings.SRID).buffer(40, quadsegs=200)))
+
+    def test_pieces_follow_zone_geometry(self):
+        pieces = ZonePiece.objects.filter(city=self.city)
+        self.assertGreater(pieces.count(), 1)
+        self.assertTrue(all(piece.geom.num_coords <= 256 for piece in pieces))
+        self.assertAlmostEqual(sum(piece.geom.area for piece in pieces), self.city.geom.area, places=5)
+        self.city.geom = MultiPolygon(Polygon(((0, 0), (10, 0), (10, 10), (0, 10), (0, 0)), srid=settings.SRID))
+        self.city.save()
+        self.assertEqual(pieces.count(), 1)
+        self.assertAlmostEqual(pieces.get().geom.area, 100)
+        self.city.delete()
+        self.assertFalse(ZonePiece.objects.exists())
+
+    def test_edges_are_merged_across_pieces(self):
+        path = PathFactory.create(geom=LineString((0, 50), (100, 50)))
+        edges = self.city.cityedge_set.all()
+        self.assertEqual(len(edges), 1)
+        aggregation = edges[0].aggregations.get()
+        self.assertEqual(aggregation.path, path)
+        self.assertAlmostEqual(aggregation.start_position, 0.1, places=3)
+        self.assertAlmostEqual(aggregation.end_position, 0.9, places=3)
+
+    def test_intersecting_pieces(self):
+        CityFactory.create(geom=MultiPolygon(Polygon(((0, 0), (10, 0), (10, 10), (0, 10), (0, 0)),
+                                                     srid=settings.SRID)))
+        content = TouristicContentFactory.create(geom=Point(50, 50, srid=settings.SRID))
+        self.assertEqual(list(intersecting(City, content)), [self.city])
+        self.assertEqual(content.cities, [self.city])